@@ -3,9 +3,13 @@ import os
 from typing import List
 from langchain_core.messages import ToolMessage, HumanMessage, SystemMessage
 # Assuming your LLM setup from the previous step is available here
-from .views import tool_calling_llm
-from .tools import search_web, execute_system_command, all_tools
+from .views import get_tool_calling_llm
+from .tools import search_web, execute_system_command, all_tools, run_tool_calls
 from .agent_state import AgentState
+from .history import get_history_manager, message_tokens, truncate_tokens
+
+# Prompt budget for one tool output quoted in the reflection prompt
+REFLECTION_TOOL_OUTPUT_TOKENS = int(os.getenv("COGNITO_REFLECTION_TOOL_OUTPUT_TOKENS", "1000"))
 
 # --- Tool Execution Mapping ---
 TOOL_MAP = {
@@ -20,55 +24,42 @@ def execute_agent_or_tool(state: AgentState) -> dict:
     """
     print("--- 1. ENTERING EXECUTION NODE ---")
     messages = state["messages"]
+    history = get_history_manager()
     
-    # 1. Invoke the LLM with the current conversation history
-    agent_response = tool_calling_llm.invoke(messages)
+    # 1. Invoke the LLM with the token-budgeted history (pinned request + summary + recent turns)
+    agent_response = get_tool_calling_llm().invoke(history.window(messages, state.get("history_summary", "")))
     
     # 2. Check for tool calls
     if agent_response.tool_calls:
         print(f"AI decided to call tool(s): {', '.join([tc['name'] for tc in agent_response.tool_calls])}")
         
-        # Add the LLM's tool-request message to history
-        messages.append(agent_response)
-        
-        # 3. Execute the tool(s) and create ToolMessage
+        # 3. Execute the independent tool calls concurrently (per-tool timeout, errors isolated)
+        # and create one ToolMessage per call, in the LLM's tool_call order
         tool_outputs = []
-        for tool_call in agent_response.tool_calls:
-            tool_name = tool_call['name']
-            tool_args = tool_call['args']
-            tool_call_id = tool_call['id']
-            
-            # Use the actual function from the map
-            tool_func = TOOL_MAP.get(tool_name)
-            
-            if tool_func:
-                try:
-                    tool_result = tool_func.invoke(tool_args)
-                except Exception as e:
-                    tool_result = f"TOOL EXECUTION ERROR: {str(e)}"
-            else:
-                tool_result = f"TOOL ERROR: Unknown tool '{tool_name}'."
-                
-            print(f"Tool {tool_name} result: {tool_result[:50]}...")
+        for result in run_tool_calls(agent_response.tool_calls, TOOL_MAP):
+            print(f"Tool {result['name']} result: {result['content'][:50]}...")
             
             # Create the ToolMessage containing the result
             tool_outputs.append(
                 ToolMessage(
-                    content=tool_result,
-                    tool_call_id=tool_call_id
+                    content=result["content"],
+                    tool_call_id=result["tool_call_id"]
                 )
             )
         
-        # 4. Add all ToolMessage results to history
-        messages.extend(tool_outputs)
+        # 4. Add the LLM's tool request and its ToolMessage results to history (add_messages appends
+        # them), trimming older turns into the rolling summary so the state stays within budget
+        new_messages = [agent_response, *tool_outputs]
+        update = history.compact(messages, state.get("history_summary", ""),
+                                 reserve=sum(message_tokens(m) for m in new_messages))
         
         # 5. Transition to the reflection phase to critique the tool's result
-        return {"messages": messages, "status": "tool_executed", "iterations": state["iterations"] + 1}
+        return {**update, "messages": update.get("messages", []) + new_messages,
+                "status": "tool_executed", "iterations": state["iterations"] + 1}
     
     else:
         # No tool call, LLM generated a final answer
-        messages.append(agent_response)
-        return {"messages": messages, "status": "finished"}
+        return {"messages": [agent_response], "status": "finished"}
 
 def reflect_and_critique(state: AgentState) -> dict:
     """
@@ -77,7 +68,8 @@ def reflect_and_critique(state: AgentState) -> dict:
     """
     print("--- 2. ENTERING REFLECTION NODE ---")
     messages = state["messages"]
-    last_tool_message = messages[-1].content
+    # Only the goal and the latest tool output are quoted, capped so a huge result cannot blow the prompt
+    last_tool_message = truncate_tokens(str(messages[-1].content), REFLECTION_TOOL_OUTPUT_TOKENS)
     user_prompt = messages[0].content
     
     # Create a dedicated reflection prompt
@@ -95,22 +87,20 @@ def reflect_and_critique(state: AgentState) -> dict:
     """)
     
     # Invoke a simple LLM (or the same one) specifically for critique
-    reflection_agent_llm = tool_calling_llm.base_model # Use base LLM without tools for pure critique
+    reflection_agent_llm = get_tool_calling_llm().base_model # Use base LLM without tools for pure critique
     reflection_response = reflection_agent_llm.invoke([reflection_prompt])
     
     reflection_text = reflection_response.content
     print(f"Reflection: {reflection_text[:100]}...")
 
-    # Update state with the reflection and determine next status
-    state["reflection"] = reflection_text
-    
+    # Update state with the reflection and determine next status (messages are unchanged)
     if "Success. Proceed to final answer." in reflection_text:
         # Reflection confirms the data is good, move to generating the final response
-        return {"messages": messages, "status": "proceed_to_answer", "reflection": reflection_text}
+        return {"status": "proceed_to_answer", "reflection": reflection_text}
     
     # Otherwise, assume more work is needed (either re-plan or re-execute)
     # The next transition will decide whether to retry or fail
-    return {"messages": messages, "status": "reflection_needed", "reflection": reflection_text}
+    return {"status": "reflection_needed", "reflection": reflection_text}
 
 def generate_final_answer(state: AgentState) -> dict:
     """
@@ -126,8 +116,9 @@ def generate_final_answer(state: AgentState) -> dict:
     DO NOT mention the reflection process.
     """)
     
-    messages.append(final_prompt)
-    final_response = tool_calling_llm.base_model.invoke(messages)
+    # The synthesis prompt is sent with the budgeted history but not stored in it
+    prompt = get_history_manager().window(messages, state.get("history_summary", ""),
+                                          reserve=message_tokens(final_prompt))
+    final_response = get_tool_calling_llm().base_model.invoke(prompt + [final_prompt])
     
-    messages.append(final_response)
-    return {"messages": messages, "status": "final_answer_generated"}
\ No newline at end of file
+    return {"messages": [final_response], "status": "final_answer_generated"}
\ No newline at end of file
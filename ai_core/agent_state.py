@@ -1,6 +1,8 @@
 # D:\cognito_ai_assistant\ai_core\agent_state.py
-from typing import TypedDict, List
+from typing import TypedDict, List, Annotated
+from typing_extensions import NotRequired
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, ToolMessage
+from langgraph.graph.message import add_messages
 
 # Define the structure of the data passed around the LangGraph workflow
 class AgentState(TypedDict):
@@ -8,8 +10,12 @@ class AgentState(TypedDict):
     Represents the state of our agent's workflow.
     The keys here are available to all nodes in the graph.
     """
-    # History of the conversation/attempt, including tool calls and results
-    messages: List[BaseMessage]
+    # History of the conversation/attempt, including tool calls and results.
+    # Nodes return only new messages (or RemoveMessage ids); add_messages merges them.
+    messages: Annotated[List[BaseMessage], add_messages]
+
+    # Rolling summary of the turns trimmed out of `messages` (see history.HistoryManager)
+    history_summary: NotRequired[str]
 
     # Status of the last executed step
     status: str # e.g., "tool_executed", "reflection_needed", "finished"
@@ -0,0 +1,353 @@
+# D:\cognito_ai_assistant\ai_core\audit_log.py
+
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from .merkle import merkle_root
+from .metrics import METRICS
+
+# --- 1. CONFIGURATION AND SCHEMA ---
+
+AUDIT_DB_PATH = os.getenv("AUDIT_DB_PATH", "audit_log.sqlite3")
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "256"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "0.5"))  # seconds
+AUDIT_MAX_PENDING = int(os.getenv("AUDIT_MAX_PENDING", "10000"))
+AUDIT_SUBMIT_TIMEOUT = float(os.getenv("AUDIT_SUBMIT_TIMEOUT", "2.0"))  # seconds a caller may block on a full queue
+
+GENESIS_HASH = "0" * 64
+
+# Entries are hashed individually. Each batch stores the Merkle root of its entry hashes and is
+# chained to the previous batch: batch_hash = H(prev_hash | batch_id | first_seq | last_seq | root).
+# Altering, dropping or reordering any entry or batch breaks every later batch hash.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_entries (
+    seq INTEGER PRIMARY KEY,
+    batch_id INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    thread_id TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    details TEXT NOT NULL,
+    entry_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS audit_batches (
+    batch_id INTEGER PRIMARY KEY,
+    first_seq INTEGER NOT NULL,
+    last_seq INTEGER NOT NULL,
+    merkle_root TEXT NOT NULL,
+    prev_hash TEXT NOT NULL,
+    batch_hash TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_audit_entries_thread_id ON audit_entries (thread_id);
+"""
+
+INSERT_ENTRY = ("INSERT INTO audit_entries (seq, batch_id, timestamp, thread_id, event_type, details, entry_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)")
+INSERT_BATCH = ("INSERT INTO audit_batches (batch_id, first_seq, last_seq, merkle_root, prev_hash, batch_hash, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+class AuditQueueFull(RuntimeError):
+    """Raised when the audit queue stays full for the whole submit timeout (backpressure)."""
+
+# --- 2. HASHING ---
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def entry_hash(seq: int, timestamp: float, thread_id: str, event_type: str, details: str) -> str:
+    """details is the stored canonical JSON string, so verification hashes exactly what was written."""
+    return _sha256(json.dumps([seq, repr(timestamp), thread_id, event_type, details], separators=(",", ":")))
+
+def batch_hash(prev_hash: str, batch_id: int, first_seq: int, last_seq: int, root: str) -> str:
+    return _sha256(f"{prev_hash}|{batch_id}|{first_seq}|{last_seq}|{root}")
+
+def connect(db_path: str = AUDIT_DB_PATH) -> sqlite3.Connection:
+    """Opens the audit database in WAL mode and ensures the schema exists."""
+    conn = sqlite3.connect(db_path, timeout=10.0, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def write_batch(conn: sqlite3.Connection, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Appends entries as one chained batch in a single transaction. BEGIN IMMEDIATE takes the
+    write lock before the chain tip is read, so several processes can share one audit DB
+    without forking the chain.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        tip = conn.execute(
+            "SELECT batch_id, last_seq, batch_hash FROM audit_batches ORDER BY batch_id DESC LIMIT 1").fetchone()
+        batch_id, prev_seq, prev_hash = (tip[0] + 1, tip[1], tip[2]) if tip else (1, 0, GENESIS_HASH)
+        rows, hashes = [], []
+        for offset, entry in enumerate(entries, start=1):
+            seq = prev_seq + offset
+            details = json.dumps(entry.get("details", {}), sort_keys=True, default=str, separators=(",", ":"))
+            timestamp = float(entry.get("timestamp") or time.time())
+            thread_id, event_type = str(entry.get("thread_id", "N/A")), str(entry["event_type"])
+            digest = entry_hash(seq, timestamp, thread_id, event_type, details)
+            rows.append((seq, batch_id, timestamp, thread_id, event_type, details, digest))
+            hashes.append(digest)
+        root = merkle_root(hashes)
+        first_seq, last_seq = prev_seq + 1, prev_seq + len(entries)
+        this_hash = batch_hash(prev_hash, batch_id, first_seq, last_seq, root)
+        conn.executemany(INSERT_ENTRY, rows)
+        conn.execute(INSERT_BATCH, (batch_id, first_seq, last_seq, root, prev_hash, this_hash, time.time()))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return {"batch_id": batch_id, "first_seq": first_seq, "last_seq": last_seq, "batch_hash": this_hash}
+
+# --- 3. BATCHED WRITER ---
+
+_FLUSH = object()
+_STOP = object()
+
+class AuditLogWriter:
+    """
+    Queues audit entries in memory and appends them from a background thread as chained
+    batches (one multi-row transaction per batch). A batch is written when it reaches
+    batch_size or when its oldest entry is flush_interval seconds old.
+    The queue is bounded: when it is full, submit() blocks the caller for up to
+    submit_timeout seconds and then raises AuditQueueFull. Audit entries are never dropped silently:
+    a batch that fails to write is kept and retried with backoff (the queue then fills up and
+    callers get AuditQueueFull), and submit()/flush() fail fast once the writer is closed or dead.
+    At most max_pending + batch_size entries are held in memory.
+    """
+
+    def __init__(self, db_path: str = AUDIT_DB_PATH, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval: float = AUDIT_FLUSH_INTERVAL, max_pending: int = AUDIT_MAX_PENDING,
+                 submit_timeout: float = AUDIT_SUBMIT_TIMEOUT):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.submit_timeout = submit_timeout
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._stop_by: Optional[float] = None  # close() deadline for retrying a failed batch
+        self.written = 0
+        self.batches = 0
+        self.rejected = 0
+        self.failed_attempts = 0
+        self.unwritten = 0  # entries still held when the writer stopped
+        self.last_batch: Optional[Dict[str, Any]] = None
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, event_type: str, details: Dict[str, Any], thread_id: Optional[str] = None,
+               timeout: Optional[float] = None) -> None:
+        """Enqueues one entry; blocks (backpressure) while the queue is full."""
+        if self._closed:
+            raise RuntimeError("Audit log writer is closed.")
+        if not self._thread.is_alive():
+            raise RuntimeError("Audit log writer thread is not running.")
+        entry = {
+            "timestamp": time.time(),
+            "thread_id": thread_id or details.get("thread_id", "N/A"),
+            "event_type": event_type,
+            "details": details,
+        }
+        try:
+            self._queue.put(entry, timeout=self.submit_timeout if timeout is None else timeout)
+        except queue.Full:
+            self.rejected += 1
+            METRICS.inc("cognito_audit_entries_total", outcome="rejected")
+            raise AuditQueueFull(f"Audit queue full ({self._queue.maxsize} pending); entry '{event_type}' not accepted.")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until every entry submitted so far is committed. Returns False on timeout, and
+        immediately if the writer is closed or its thread has stopped.
+        """
+        if self._closed or not self._thread.is_alive():
+            return False
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put((_FLUSH, done), timeout=timeout)
+        except queue.Full:
+            return False
+        while not done.wait(0.1):
+            if not self._thread.is_alive() or (deadline is not None and time.monotonic() >= deadline):
+                return done.is_set()
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Writes pending entries and stops the writer thread (registered with atexit)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_by = time.monotonic() + (timeout if timeout is not None else 10.0)
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        unwritten = self.unwritten + (self.pending() if self._thread.is_alive() else 0)
+        if unwritten:
+            print(f"🔒 [AUDIT] CRITICAL ERROR: {unwritten} audit entries were not written before shutdown.")
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"written": self.written, "batches": self.batches, "rejected": self.rejected,
+                "failed_attempts": self.failed_attempts, "pending": self.pending(),
+                "alive": self._thread.is_alive(), "last_batch": self.last_batch}
+
+    def _run(self) -> None:
+        conn: Optional[sqlite3.Connection] = None
+        pending: List[Dict[str, Any]] = []
+        flushes: List[threading.Event] = []
+        deadline: Optional[float] = None
+        stopping = False
+        retries = 0
+        try:
+            while True:
+                # Gather until the batch is full, its oldest entry is due, or a flush/stop arrives.
+                # While a failed batch is being retried nothing more is taken from the queue.
+                if not stopping and not flushes and not retries and len(pending) < self.batch_size:
+                    wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    try:
+                        item = self._queue.get(timeout=wait)
+                    except queue.Empty:
+                        item = None
+                    if isinstance(item, dict):
+                        pending.append(item)
+                        if deadline is None:
+                            deadline = time.monotonic() + self.flush_interval
+                        if len(pending) < self.batch_size:
+                            continue
+                    elif isinstance(item, tuple) and item[0] is _FLUSH:
+                        flushes.append(item[1])
+                    elif item is _STOP:
+                        stopping = True
+
+                if pending:
+                    try:
+                        if conn is None:
+                            conn = connect(self.db_path)
+                        self._write(conn, pending)
+                    except Exception as e:
+                        # Lock contention with another process, a full disk...: keep the batch and retry
+                        retries += 1
+                        self.failed_attempts += 1
+                        METRICS.inc("cognito_audit_entries_total", len(pending), outcome="retried")
+                        print(f"🔒 [AUDIT] Batch write failed (attempt {retries}): {e}")
+                        if conn is not None:
+                            conn.close()
+                            conn = None
+                        if stopping and self._stop_by is not None and time.monotonic() >= self._stop_by:
+                            self.unwritten = len(pending) + self.pending()
+                            return
+                        time.sleep(min(5.0, 0.1 * 2 ** min(retries - 1, 6)))
+                        continue
+                    pending, deadline, retries = [], None, 0
+
+                for done in flushes:
+                    done.set()
+                flushes = []
+                if stopping:
+                    return
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _write(self, conn: sqlite3.Connection, entries: List[Dict[str, Any]]) -> None:
+        self.last_batch = write_batch(conn, entries)
+        self.written += len(entries)
+        self.batches += 1
+        METRICS.inc("cognito_audit_entries_total", len(entries), outcome="written")
+
+# --- 4. PROCESS-WIDE WRITER ---
+
+_WRITER: Optional[AuditLogWriter] = None
+_WRITER_LOCK = threading.Lock()
+
+def get_audit_log() -> AuditLogWriter:
+    """Returns the shared writer, starting its thread on first use."""
+    global _WRITER
+    if _WRITER is None:
+        with _WRITER_LOCK:
+            if _WRITER is None:
+                _WRITER = AuditLogWriter()
+                atexit.register(_WRITER.close)
+    return _WRITER
+
+# --- 5. VERIFIER ---
+
+def _iter_batches(conn: sqlite3.Connection, chunk: int = 256) -> Iterator[tuple]:
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT batch_id, first_seq, last_seq, merkle_root, prev_hash, batch_hash FROM audit_batches "
+            "WHERE batch_id > ? ORDER BY batch_id LIMIT ?", (last_id, chunk)).fetchall()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+
+def verify_chain(db_path: str = AUDIT_DB_PATH) -> Dict[str, Any]:
+    """
+    Streams the chain batch by batch (memory bounded by one batch), recomputing every entry
+    hash, Merkle root and batch link. Stops at the first inconsistency.
+    """
+    conn = connect(db_path)
+    report: Dict[str, Any] = {"ok": True, "batches": 0, "entries": 0, "error": None, "tip": GENESIS_HASH}
+    prev_hash, expected_id, expected_seq = GENESIS_HASH, 1, 1
+    try:
+        for batch_id, first_seq, last_seq, root, stored_prev, stored_hash in _iter_batches(conn):
+            problem = None
+            if batch_id != expected_id or first_seq != expected_seq:
+                problem = f"gap before batch {batch_id} (expected batch {expected_id} starting at seq {expected_seq})"
+            elif stored_prev != prev_hash:
+                problem = f"batch {batch_id} does not link to the previous batch hash"
+            else:
+                hashes, seq = [], first_seq
+                for row in conn.execute(
+                        "SELECT seq, timestamp, thread_id, event_type, details, entry_hash FROM audit_entries "
+                        "WHERE seq BETWEEN ? AND ? ORDER BY seq", (first_seq, last_seq)):
+                    if row[0] != seq:
+                        problem = f"entry {seq} missing from batch {batch_id}"
+                        break
+                    if entry_hash(*row[:5]) != row[5]:
+                        problem = f"entry {seq} in batch {batch_id} was modified"
+                        break
+                    hashes.append(row[5])
+                    seq += 1
+                if problem is None and seq != last_seq + 1:
+                    problem = f"batch {batch_id} is missing entries {seq}..{last_seq}"
+                elif problem is None and merkle_root(hashes) != root:
+                    problem = f"batch {batch_id} Merkle root mismatch"
+                elif problem is None and batch_hash(prev_hash, batch_id, first_seq, last_seq, root) != stored_hash:
+                    problem = f"batch {batch_id} hash mismatch"
+            if problem:
+                report.update(ok=False, error=problem)
+                return report
+            report["batches"] += 1
+            report["entries"] += last_seq - first_seq + 1
+            prev_hash, expected_id, expected_seq = stored_hash, batch_id + 1, last_seq + 1
+        extra = conn.execute("SELECT COUNT(*) FROM audit_entries WHERE seq >= ?", (expected_seq,)).fetchone()[0]
+        if extra:
+            report.update(ok=False, error=f"{extra} entries after the last batch are not covered by the chain")
+        report["tip"] = prev_hash
+        return report
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audit log maintenance.")
+    parser.add_argument("command", choices=["verify"])
+    parser.add_argument("--db", default=AUDIT_DB_PATH)
+    args = parser.parse_args()
+    result = verify_chain(args.db)
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["ok"] else 1)
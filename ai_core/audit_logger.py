@@ -1,16 +1,22 @@
 # D:\cognito_ai_assistant\ai_core\audit_logger.py
 
-# Assume AUDIT_DB is a simple interface to a persistent database (e.g., SQLite, Postgres)
-AUDIT_DB = initialize_audit_database()
+from .audit_log import AuditQueueFull, get_audit_log
+
+# Batched, hash-chained audit pipeline (see audit_log.py); entries are committed in the background.
+# The shared writer (and its thread and DB connection) is only started by the first entry.
 
 def log_audit_entry(event_type: str, details: dict):
-    """Persists a single, timestamped audit record to the database."""
-    AUDIT_DB.insert({
-        "timestamp": datetime.now().isoformat(),
-        "thread_id": details.get("thread_id", "N/A"),
-        "event_type": event_type,
-        "details": details
-    })
+    """
+    Queues a timestamped audit record; it is written with its batch and chained to the previous one.
+    Raises AuditQueueFull under sustained backpressure: an entry that cannot be queued must
+    fail the transition rather than disappear.
+    """
+    try:
+        get_audit_log().submit(event_type, details, thread_id=details.get("thread_id", "N/A"))
+    except AuditQueueFull as e:
+        # Backpressure: the writer could not keep up for the whole submit timeout
+        print(f"🔒 [AUDIT] CRITICAL ERROR: {e}")
+        raise
     
 def audit_logger_node(state: AgentState) -> AgentState:
     """
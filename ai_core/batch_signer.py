@@ -0,0 +1,145 @@
+# D:\cognito_ai_assistant\ai_core\batch_signer.py
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .merkle import build_levels, inclusion_proof, root_from_proof
+from .metrics import METRICS
+from .tools import PUBLIC_DID, sign_data_with_did, verify_did_signature
+
+# --- 1. CONFIGURATION ---
+
+SIGNING_MODE = os.getenv("COGNITO_SIGNING_MODE", "per_response")  # 'per_response' (default) or opt-in 'batched' (Merkle root)
+SIGNING_BATCH_WINDOW_MS = float(os.getenv("COGNITO_SIGNING_BATCH_WINDOW_MS", "20"))
+SIGNING_MAX_BATCH = int(os.getenv("COGNITO_SIGNING_MAX_BATCH", "256"))  # a full batch is signed without waiting
+
+def root_payload(root: str) -> str:
+    """What the DID key actually signs for a batch."""
+    return f"MERKLE_ROOT:{root}|DID:{PUBLIC_DID}"
+
+# --- 2. MERKLE BATCH SIGNER ---
+
+class MerkleBatchSigner:
+    """
+    Collects response digests for up to window_ms (or max_batch digests), builds a Merkle
+    tree over them and signs only the root: one signature per batch instead of one per
+    response. Every caller receives a trust receipt holding its leaf index, inclusion proof,
+    the root and the root signature, which verify_receipt() checks offline.
+    """
+
+    def __init__(self, sign: Callable[[str], str] = sign_data_with_did, window_ms: float = SIGNING_BATCH_WINDOW_MS,
+                 max_batch: int = SIGNING_MAX_BATCH):
+        self.sign = sign
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: List[Tuple[str, Future]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.batches = 0
+
+    def submit(self, digest: str) -> Future:
+        """Queues a response digest; the future resolves to its trust receipt."""
+        future: Future = Future()
+        batch = None
+        with self._lock:
+            self.submitted += 1
+            self._pending.append((digest, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take_batch()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            # Full batch: sign from a fresh thread so the submitting caller is not delayed
+            threading.Thread(target=self._sign_batch, args=(batch,), name="merkle-signer", daemon=True).start()
+        return future
+
+    def sign_digest(self, digest: str) -> Dict[str, Any]:
+        return self.submit(digest).result()
+
+    async def asign_digest(self, digest: str) -> Dict[str, Any]:
+        return await asyncio.wrap_future(self.submit(digest))
+
+    def _take_batch(self) -> List[Tuple[str, Future]]:
+        # Caller holds the lock
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self) -> None:
+        with self._lock:
+            batch = self._take_batch()
+        if batch:
+            self._sign_batch(batch)
+
+    def _sign_batch(self, batch: List[Tuple[str, Future]]) -> None:
+        # Claim every future (running ones can no longer be cancelled) and drop the ones whose
+        # caller already gave up, e.g. an asign_digest awaiter cancelled by a timeout
+        batch = [(digest, future) for digest, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            levels = build_levels([digest for digest, _ in batch])
+            root = levels[-1][0]
+            root_signature = self.sign(root_payload(root))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self.batches += 1
+        METRICS.inc("cognito_signatures_total", mode="batched")
+        METRICS.inc("cognito_signed_responses_total", len(batch), mode="batched")
+        signed_at = time.time()
+        for index, (digest, future) in enumerate(batch):
+            future.set_result({
+                "did": PUBLIC_DID,
+                "digest": digest,
+                "leaf_index": index,
+                "batch_size": len(batch),
+                "proof": inclusion_proof(levels, index),
+                "merkle_root": root,
+                "root_signature": root_signature,
+                "signed_at": signed_at,
+            })
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "signatures": self.batches,
+                "mean_batch_size": round(self.submitted / self.batches, 2) if self.batches else 0.0,
+            }
+
+# --- 3. VERIFICATION ---
+
+def verify_receipt(digest: str, receipt: Dict[str, Any],
+                   verify_signature: Callable[[str, str], bool] = verify_did_signature) -> bool:
+    """True iff the digest is included under the receipt's root and the root signature is valid."""
+    try:
+        if root_from_proof(digest, [tuple(step) for step in receipt["proof"]]) != receipt["merkle_root"]:
+            return False
+        return verify_signature(root_payload(receipt["merkle_root"]), receipt["root_signature"])
+    except (KeyError, TypeError, ValueError):
+        return False
+
+# --- 4. PROCESS-WIDE SIGNER ---
+
+_SIGNER: Optional[MerkleBatchSigner] = None
+_SIGNER_LOCK = threading.Lock()
+
+def get_batch_signer() -> MerkleBatchSigner:
+    global _SIGNER
+    if _SIGNER is None:
+        with _SIGNER_LOCK:
+            if _SIGNER is None:
+                _SIGNER = MerkleBatchSigner()
+    return _SIGNER
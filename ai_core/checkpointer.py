@@ -0,0 +1,487 @@
+# D:\cognito_ai_assistant\ai_core\checkpointer.py
+
+import argparse
+import asyncio
+import atexit
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+
+# --- 1. CONFIGURATION AND SCHEMA ---
+
+CHECKPOINT_BACKEND = os.getenv("COGNITO_CHECKPOINT_BACKEND", "sqlite")  # 'sqlite' or 'postgres'
+CHECKPOINT_DB_PATH = os.getenv("COGNITO_CHECKPOINT_DB_PATH", "checkpoints.sqlite3")
+CHECKPOINT_TTL = float(os.getenv("COGNITO_CHECKPOINT_TTL", str(7 * 24 * 3600)))  # idle threads (e.g. unanswered approvals)
+CHECKPOINT_GC_INTERVAL = float(os.getenv("COGNITO_CHECKPOINT_GC_INTERVAL", "600"))  # seconds, 0 disables the GC thread
+CHECKPOINT_KEEP_LAST = int(os.getenv("COGNITO_CHECKPOINT_KEEP_LAST", "1"))  # >0: prune older checkpoints per thread on GC
+CHECKPOINT_COMPRESS_MIN_BYTES = int(os.getenv("COGNITO_CHECKPOINT_COMPRESS_MIN_BYTES", "512"))
+
+# Same connection settings as the Django DATABASES block (cognito_assistant/settings.py)
+POSTGRES_SETTINGS = {
+    "dbname": os.getenv("POSTGRES_DB", "postgres"),
+    "user": os.getenv("POSTGRES_USER", "postgresadmin"),
+    "password": os.getenv("POSTGRES_PASSWORD", ""),
+    "host": os.getenv("POSTGRES_HOST", "localhost"),
+    "port": os.getenv("POSTGRES_PORT", "5432"),
+}
+
+# Delta storage: a checkpoint row holds only channel *versions*; each channel value is stored
+# once per version in checkpoint_blobs, so a step writes only the channels it changed.
+# checkpoint_threads keeps one row per thread for TTL garbage collection.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint {blob} NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata {blob} NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob {blob},
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob {blob} NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at {real} NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_checkpoint_threads_updated_at ON checkpoint_threads (updated_at);
+"""
+
+UPSERT_CHECKPOINT = """
+INSERT INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id) DO UPDATE SET
+    parent_checkpoint_id = excluded.parent_checkpoint_id, type = excluded.type, checkpoint = excluded.checkpoint,
+    metadata_type = excluded.metadata_type, metadata = excluded.metadata
+"""
+INSERT_BLOB = """
+INSERT INTO checkpoint_blobs (thread_id, checkpoint_ns, channel, version, type, blob)
+VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (thread_id, checkpoint_ns, channel, version) DO NOTHING
+"""
+INSERT_WRITE = """
+INSERT INTO checkpoint_writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, blob, task_path)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id, task_id, idx) DO NOTHING
+"""
+UPSERT_WRITE = INSERT_WRITE.replace(
+    "DO NOTHING", "DO UPDATE SET channel = excluded.channel, type = excluded.type, blob = excluded.blob"
+)
+TOUCH_THREAD = """
+INSERT INTO checkpoint_threads (thread_id, updated_at) VALUES (?, ?)
+ON CONFLICT (thread_id) DO UPDATE SET updated_at = excluded.updated_at
+"""
+THREAD_TABLES = ("checkpoint_writes", "checkpoint_blobs", "checkpoints", "checkpoint_threads")
+
+# --- 2. CHECKPOINT SAVER ---
+
+class SQLCheckpointSaver(BaseCheckpointSaver):
+    """
+    Durable LangGraph checkpointer on SQLite (WAL mode) or Postgres (psycopg2).
+
+    A graph paused by interrupt() is fully persisted, so the worker and its memory are released.
+    Any worker resumes it by thread_id with one indexed read of the latest checkpoint
+    plus its channel blobs.
+    Serialized values above compress_min_bytes are zlib-compressed. Threads idle for longer
+    than ttl are removed by gc(), which a background thread runs every gc_interval seconds.
+    """
+
+    def __init__(self, backend: str = CHECKPOINT_BACKEND, db_path: str = CHECKPOINT_DB_PATH,
+                 postgres: Optional[Dict[str, Any]] = None, ttl: float = CHECKPOINT_TTL,
+                 gc_interval: float = CHECKPOINT_GC_INTERVAL, keep_last: int = CHECKPOINT_KEEP_LAST,
+                 compress_min_bytes: int = CHECKPOINT_COMPRESS_MIN_BYTES, serde: Any = None):
+        super().__init__(serde=serde)
+        if backend not in ("sqlite", "postgres"):
+            raise ValueError(f"Unsupported checkpoint backend '{backend}'. Expected 'sqlite' or 'postgres'.")
+        self.backend = backend
+        self.db_path = db_path
+        self.postgres = dict(POSTGRES_SETTINGS if postgres is None else postgres)
+        self.ttl = ttl
+        self.keep_last = keep_last
+        self.compress_min_bytes = compress_min_bytes
+        self._local = threading.local()
+        self._connections: List[Any] = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._setup()
+        self._gc_thread: Optional[threading.Thread] = None
+        if gc_interval > 0:
+            self._gc_thread = threading.Thread(target=self._gc_loop, args=(gc_interval,),
+                                               name="checkpoint-gc", daemon=True)
+            self._gc_thread.start()
+
+    # Connections
+
+    def _conn(self) -> Any:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.backend == "sqlite":
+                conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            else:
+                import psycopg2
+                conn = psycopg2.connect(**self.postgres)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _sql(self, query: str) -> str:
+        return query if self.backend == "sqlite" else query.replace("?", "%s")
+
+    def _execute(self, query: str, params: Sequence[Any] = ()) -> List[tuple]:
+        conn = self._conn()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self._sql(query), params)
+            rows = cursor.fetchall() if cursor.description else []
+            conn.commit()
+            return rows
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def _transaction(self, statements: Sequence[Tuple[str, Sequence[Sequence[Any]]]]) -> None:
+        """Runs executemany() for each (query, rows) pair in one transaction."""
+        conn = self._conn()
+        cursor = conn.cursor()
+        try:
+            for query, rows in statements:
+                if rows:
+                    cursor.executemany(self._sql(query), rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def _setup(self) -> None:
+        types = {"blob": "BLOB", "real": "REAL"} if self.backend == "sqlite" else {"blob": "BYTEA", "real": "DOUBLE PRECISION"}
+        conn = self._conn()
+        cursor = conn.cursor()
+        for statement in SCHEMA.format(**types).split(";"):
+            if statement.strip():
+                cursor.execute(statement)
+        conn.commit()
+        cursor.close()
+
+    # Serialization
+
+    def _dump(self, value: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(value)
+        if len(data) >= self.compress_min_bytes:
+            return f"{type_}+zlib", zlib.compress(data)
+        return type_, data
+
+    def _load(self, type_: str, data: Any) -> Any:
+        data = bytes(data)
+        if type_.endswith("+zlib"):
+            type_, data = type_[:-len("+zlib")], zlib.decompress(data)
+        return self.serde.loads_typed((type_, data))
+
+    # BaseCheckpointSaver
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = ("SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                 "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?")
+        params: Tuple[Any, ...] = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        rows = self._execute(query, params)
+        return self._tuple(thread_id, checkpoint_ns, rows[0]) if rows else None
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                 "metadata_type, metadata FROM checkpoints")
+        clauses: List[str] = []
+        params: List[Any] = []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+        if limit is not None and not filter:
+            query += f" LIMIT {int(limit)}"
+
+        yielded = 0
+        for thread_id, checkpoint_ns, *row in self._execute(query, params):
+            if filter:
+                metadata = self._load(row[4], row[5])
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None and yielded >= limit:
+                return
+            yielded += 1
+            yield self._tuple(thread_id, checkpoint_ns, row)
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row: Sequence[Any]) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_data, metadata_type, metadata_data = row
+        checkpoint = self._load(type_, checkpoint_data)
+        versions = checkpoint.get("channel_versions", {})
+        channel_values: Dict[str, Any] = {}
+        if versions:
+            pairs = " OR ".join(["(channel = ? AND version = ?)"] * len(versions))
+            params: List[Any] = [thread_id, checkpoint_ns]
+            for channel, version in versions.items():
+                params += [channel, str(version)]
+            for channel, blob_type, blob in self._execute(
+                f"SELECT channel, type, blob FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ? AND ({pairs})",
+                params,
+            ):
+                if blob_type != "empty":
+                    channel_values[channel] = self._load(blob_type, blob)
+        writes = self._execute(
+            "SELECT task_id, channel, type, blob FROM checkpoint_writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        )
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self._load(metadata_type, metadata_data),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                  "checkpoint_id": parent_checkpoint_id}}
+                if parent_checkpoint_id else None
+            ),
+            pending_writes=[(task_id, channel, self._load(t, blob)) for task_id, channel, t, blob in writes],
+        )
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = dict(checkpoint)
+        values: Dict[str, Any] = stored.pop("channel_values", {})
+        # Only the channels that changed this step get a new blob
+        blobs = []
+        for channel, version in new_versions.items():
+            type_, data = self._dump(values[channel]) if channel in values else ("empty", b"")
+            blobs.append((thread_id, checkpoint_ns, channel, str(version), type_, data))
+        checkpoint_type, checkpoint_data = self._dump(stored)
+        metadata_type, metadata_data = self._dump({**config.get("metadata", {}), **metadata})
+        self._transaction([
+            (INSERT_BLOB, blobs),
+            (UPSERT_CHECKPOINT, [(thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                                  checkpoint_type, checkpoint_data, metadata_type, metadata_data)]),
+            (TOUCH_THREAD, [(thread_id, time.time())]),
+        ])
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        inserts, upserts = [], []
+        for idx, (channel, value) in enumerate(writes):
+            type_, data = self._dump(value)
+            special_idx = WRITES_IDX_MAP.get(channel)
+            row = (thread_id, checkpoint_ns, checkpoint_id, task_id,
+                   idx if special_idx is None else special_idx, channel, type_, data, task_path)
+            # Special channels (errors, interrupts, resume values) replace; regular writes are idempotent
+            (inserts if special_idx is None else upserts).append(row)
+        self._transaction([(INSERT_WRITE, inserts), (UPSERT_WRITE, upserts),
+                           (TOUCH_THREAD, [(thread_id, time.time())])])
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._transaction([(f"DELETE FROM {table} WHERE thread_id = ?", [(thread_id,)]) for table in THREAD_TABLES])
+
+    def prune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        """'keep_latest' keeps the newest keep_last (at least 1) checkpoints per namespace; 'delete' drops the threads."""
+        for thread_id in thread_ids:
+            if strategy == "delete":
+                self.delete_thread(thread_id)
+            else:
+                self._prune_thread(thread_id, max(1, self.keep_last))
+
+    def _prune_thread(self, thread_id: str, keep: int) -> int:
+        rows = self._execute(
+            "SELECT checkpoint_ns, checkpoint_id, type, checkpoint FROM checkpoints WHERE thread_id = ? "
+            "ORDER BY checkpoint_ns, checkpoint_id DESC", (thread_id,))
+        kept: Dict[str, List[Any]] = {}
+        stale: List[Tuple[str, str, str]] = []
+        for checkpoint_ns, checkpoint_id, type_, data in rows:
+            if len(kept.setdefault(checkpoint_ns, [])) < keep:
+                kept[checkpoint_ns].append(self._load(type_, data))
+            else:
+                stale.append((thread_id, checkpoint_ns, checkpoint_id))
+        if not stale:
+            return 0
+        # Blobs still referenced by a kept checkpoint survive; superseded versions go
+        referenced = {(ns, channel, str(version)) for ns, checkpoints in kept.items()
+                      for checkpoint in checkpoints for channel, version in checkpoint.get("channel_versions", {}).items()}
+        orphaned = [(thread_id, ns, channel, version) for ns, channel, version in self._execute(
+            "SELECT checkpoint_ns, channel, version FROM checkpoint_blobs WHERE thread_id = ?", (thread_id,))
+            if (ns, channel, version) not in referenced]
+        self._transaction([
+            ("DELETE FROM checkpoint_writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", stale),
+            ("DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", stale),
+            ("DELETE FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?", orphaned),
+        ])
+        return len(stale)
+
+    def get_next_version(self, current: Optional[str], channel: Any = None) -> str:
+        # Zero-padded so versions sort as text; the random suffix keeps concurrent branches distinct
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(str(current).split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # Async variants run the blocking DB call in a worker thread so the event loop stays free
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def aprune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        await asyncio.to_thread(self.prune, thread_ids, strategy=strategy)
+
+    # Garbage collection
+
+    def gc(self, ttl: Optional[float] = None) -> Dict[str, int]:
+        """Deletes threads idle for longer than ttl and, if keep_last > 0, prunes the live ones."""
+        cutoff = time.time() - (self.ttl if ttl is None else ttl)
+        expired = [row[0] for row in self._execute(
+            "SELECT thread_id FROM checkpoint_threads WHERE updated_at < ?", (cutoff,))]
+        if expired:
+            self._transaction([(f"DELETE FROM {table} WHERE thread_id = ?", [(t,) for t in expired])
+                               for table in THREAD_TABLES])
+        pruned = 0
+        if self.keep_last > 0:
+            for (thread_id,) in self._execute("SELECT thread_id FROM checkpoint_threads"):
+                pruned += self._prune_thread(thread_id, self.keep_last)
+        return {"expired_threads": len(expired), "pruned_checkpoints": pruned}
+
+    def _gc_loop(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            try:
+                result = self.gc()
+                if any(result.values()):
+                    print(f"🗄️ [CHECKPOINT] GC removed {result['expired_threads']} expired thread(s), "
+                          f"pruned {result['pruned_checkpoints']} checkpoint(s).")
+            except Exception as e:
+                print(f"🗄️ [CHECKPOINT] GC failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {table: self._execute(f"SELECT COUNT(*) FROM {table}")[0][0] for table in THREAD_TABLES}
+        return {"backend": self.backend, "threads": counts["checkpoint_threads"],
+                "checkpoints": counts["checkpoints"], "blobs": counts["checkpoint_blobs"],
+                "writes": counts["checkpoint_writes"]}
+
+    def close(self) -> None:
+        """Stops the GC thread and closes every connection (registered with atexit)."""
+        self._closed.set()
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+# --- 3. PROCESS-WIDE SAVER ---
+
+_SAVER: Optional[SQLCheckpointSaver] = None
+_SAVER_LOCK = threading.Lock()
+
+def get_checkpointer() -> SQLCheckpointSaver:
+    """Returns the shared saver for the configured backend, creating its schema on first use."""
+    global _SAVER
+    if _SAVER is None:
+        with _SAVER_LOCK:
+            if _SAVER is None:
+                _SAVER = SQLCheckpointSaver()
+                atexit.register(_SAVER.close)
+    return _SAVER
+
+def thread_config(thread_id: str) -> RunnableConfig:
+    """Config that starts or resumes the graph run persisted under thread_id."""
+    return {"configurable": {"thread_id": thread_id}}
+
+# --- 4. CLI ---
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkpoint store maintenance.")
+    parser.add_argument("command", choices=["gc", "stats"])
+    parser.add_argument("--ttl", type=float, default=None, help="seconds of inactivity before a thread expires")
+    args = parser.parse_args()
+    saver = SQLCheckpointSaver(gc_interval=0)
+    print(saver.gc(args.ttl) if args.command == "gc" else saver.stats())
+    saver.close()
@@ -1,28 +1,46 @@
 # D:\cognito_ai_assistant\ai_core\experts.py
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import os
 import random
 import json
 import time
 from langchain_core.messages import AIMessage, HumanMessage
-from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
-from dotenv import load_dotenv
 
 from .graph import AgentState, EXPERT_OPTIONS 
 from .tools import (
-    calculate_verifiable_hash, sign_data_with_did, PUBLIC_DID,
-    save_fusion_block, log_training_script, 
-    mock_external_search, mock_finance_api, mock_legal_database, mock_fitness_tracker
+    calculate_verifiable_hash, sign_data_with_did, PUBLIC_DID, StreamingHasher,
+    save_fusion_block, log_training_script, asave_fusion_block, alog_training_script,
+    run_tool, arun_tool
 )
+from .llm_registry import MODERATOR, JUDGE, TIERS, lazy_llm
+from .metrics import METRICS
+from .response_cache import get_response_cache
+from .history import get_history_manager, message_tokens
+from .audit_log import get_audit_log
+from .batch_signer import SIGNING_MODE, get_batch_signer
+from .human_in_the_loop import human_approval_gate
 
-# Load environment variables
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# The LLM instance (built through the shared registry on first use)
+llm = lazy_llm(JUDGE, model="gpt-4o", temperature=0.0)
 
-# Initialize the LLM instance
-llm = ChatOpenAI(model="gpt-4o", temperature=0.0, api_key=OPENAI_API_KEY)
+# Model routing: regulated advice always runs on gpt-4o; everything else starts on a cheap
+# tier and (in cascade mode) escalates to JUDGE when critique or confidence is low
+REGULATED_EXPERTS = ["legal_expert", "health_expert", "finance_expert"]
+REGULATED_MODEL = "gpt-4o"
+CASCADE_ROUTING = os.getenv("COGNITO_CASCADE_ROUTING", "1") == "1"
+CASCADE_START_TIER = os.getenv("COGNITO_CASCADE_START_TIER", MODERATOR)  # MODERATOR or EXECUTION
+CASCADE_CONFIDENCE_THRESHOLD = float(os.getenv("COGNITO_CASCADE_CONFIDENCE", "0.6"))
+
+# Latency policy used by cognitive_latency_check
+LATENCY_BUDGET_MS = float(os.getenv("COGNITO_LATENCY_BUDGET_MS", "8000"))
+FAST_MODEL = TIERS[MODERATOR]["model"]
+EXPERT_PATH_NODES = ("dynamic_tool_manager", "causal_risk_assessor", "critique_revise")
+
+# Revision budget for the critique -> expert loop: whichever limit is hit first ends it
+MAX_REVISIONS = int(os.getenv("COGNITO_MAX_REVISIONS", "2"))
+REVISION_DEADLINE_MS = float(os.getenv("COGNITO_REVISION_DEADLINE_MS", "5000"))
 
 # --- Tool Call Schema (Structured Output for Experts) ---
 class ToolCall(BaseModel):
@@ -61,8 +79,9 @@ def mlcc_nlu_agent(state: Dict[str, Any]) -> Dict[str, Any]:
 
 # --- 3. EMOTION/INTENT DETECTOR (EID) ---
 def emotion_intent_detector(state: Dict[str, Any]) -> Dict[str, Any]:
-    # Mock intent setting (for complexity, we just pass the state)
-    return state 
+    # Mock intent setting (for complexity, we set nothing). Runs alongside mlcc_nlu_agent,
+    # so it must only return the keys it owns, never the whole state.
+    return {}
 
 # --- 4. SUPERVISOR/ROUTER ---
 def supervisor(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -80,9 +99,18 @@ def supervisor(state: Dict[str, Any]) -> Dict[str, Any]:
 def universal_model_selector(state: Dict[str, Any]) -> Dict[str, Any]:
     target_expert = state["target_expert"]
     # Dynamic selection logic
-    current_model = "gpt-4o" if target_expert in ["legal_expert", "health_expert", "finance_expert"] else "gpt-3.5-turbo"
+    if target_expert in REGULATED_EXPERTS:
+        model_tier, current_model = JUDGE, REGULATED_MODEL
+    elif CASCADE_ROUTING:
+        # Cascade: cheapest tier first, critique_revise escalates on a low signal
+        model_tier = CASCADE_START_TIER
+        current_model = TIERS[model_tier]["model"]
+        METRICS.inc("cognito_cascade_requests_total", expert=target_expert)
+    else:
+        model_tier, current_model = MODERATOR, FAST_MODEL
         
-    return {"current_model": current_model}
+    # routed_model is the initial decision (the cache key); current_model may later escalate
+    return {"current_model": current_model, "model_tier": model_tier, "routed_model": current_model}
 
 # --- 6. Q-VALUE PRIORITIZER (RL-Informed Routing) ---
 def q_value_prioritizer(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -96,8 +124,46 @@ def q_value_prioritizer(state: Dict[str, Any]) -> Dict[str, Any]:
 
 # --- 7. COGNITIVE LATENCY CHECK ---
 def cognitive_latency_check(state: Dict[str, Any]) -> Dict[str, Any]:
-    # Mock: check latency, but always proceed
-    return state 
+    """
+    Projects the expert path's latency from the recorded p95 node timings. Over budget,
+    non-regulated experts move to the fast model and critique_revise stops asking for revisions.
+    """
+    target_expert = state["target_expert"]
+    p95s = [METRICS.node_quantile(node, 0.95) for node in (target_expert, *EXPERT_PATH_NODES)]
+    if any(p is None for p in p95s):
+        return {"latency_budget_exceeded": False} # Not enough history yet: proceed
+
+    projected_ms = sum(p95s) * 1000
+    if projected_ms <= LATENCY_BUDGET_MS:
+        return {"latency_budget_exceeded": False}
+
+    METRICS.inc("cognito_latency_budget_exceeded_total", expert=target_expert)
+    update: Dict[str, Any] = {"latency_budget_exceeded": True}
+    if target_expert not in REGULATED_EXPERTS and state.get("current_model") != FAST_MODEL:
+        update.update(current_model=FAST_MODEL, model_tier=MODERATOR, routed_model=FAST_MODEL)
+    print(f"⏱️ [LATENCY] {target_expert} projected p95 {projected_ms:.1f} ms > {LATENCY_BUDGET_MS:.1f} ms budget; "
+          f"model={update.get('current_model', state.get('current_model'))}, revisions disabled.")
+    return update
+
+# --- 7a. RESPONSE CACHE LOOKUP ---
+def response_cache_lookup(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    On an exact or semantic (paraphrase) hit, replays the cached expert/tool/risk/critique
+    result and skips straight to signing.
+    """
+    cached = get_response_cache().lookup(state)
+    if cached is None:
+        return {"cache_hit": False}
+
+    match = f"semantic, similarity {cached['similarity']:.2f}" if "similarity" in cached else "exact"
+    print(f"⚡ [CACHE] Hit ({match}) for {state.get('target_expert')} ({state.get('current_model')}).")
+    return {
+        "cache_hit": True,
+        "messages": [AIMessage(content=cached["answer"])],
+        "risk_score": cached["risk_score"],
+        "risk_assessment_report": cached["risk_assessment_report"],
+        "critique_report": cached["critique_report"],
+    }
 
 # --- 8. DOMAIN EXPERTS ---
 
@@ -125,7 +191,17 @@ def _run_expert_agent(state: Dict[str, Any], expert_role: str, disclaimer: str)
         expert_response = f"**{expert_role.upper()} RESPONSE:** {disclaimer} I have analyzed your query based on established principles."
         
     final_answer_message = AIMessage(content=expert_response)
-    return {"messages": state["messages"] + [final_answer_message], "target_expert": expert_role}
+    # Revision loops add a pass per iteration: older passes are folded into the rolling summary
+    update = get_history_manager().compact(state["messages"], state.get("history_summary", ""),
+                                           reserve=message_tokens(final_answer_message))
+    return {
+        **update,
+        "messages": update.get("messages", []) + [final_answer_message],
+        "target_expert": expert_role,
+        # The revision budget's clock starts at the first expert pass
+        "revision_started_at": state.get("revision_started_at") or time.time(),
+        "attempt_started_at": time.time(),
+    }
 
 # Expert definitions calling the template
 def finance_expert(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -148,32 +224,26 @@ def general_qa(state: Dict[str, Any]) -> Dict[str, Any]:
 
 
 # --- 9. DYNAMIC TOOL MANAGER (Security Enhancement: JSON Parsing) ---
+def _parse_tool_call(last_message: str) -> ToolCall:
+    """Parses and validates the expert's tool request (raises JSONDecodeError for plain answers)."""
+    # **CORRECTION:** Use json.loads() and Pydantic validation for security
+    tool_call_dict = json.loads(last_message)
+    return ToolCall(**tool_call_dict) # Validate structure with Pydantic
+
+def _tool_result_update(state: Dict[str, Any], tool_name: str, tool_output: str) -> Dict[str, Any]:
+    # Expert response is now the tool result + original expert response
+    tool_message = AIMessage(content=f"TOOL RESULT: {tool_output}")
+    print(f"🛠️ [TOOL MGR] Executed {tool_name}.")
+    return {"messages": [tool_message]}
+
 def dynamic_tool_manager(state: Dict[str, Any]) -> Dict[str, Any]:
     """Manages the execution of external tools based on expert output."""
     last_message = state["messages"][-1].content
     
-    tool_output = None
     try:
-        # **CORRECTION:** Use json.loads() and Pydantic validation for security
-        tool_call_dict = json.loads(last_message)
-        ToolCall(**tool_call_dict) # Validate structure with Pydantic
-        
-        tool_name = tool_call_dict['tool_name']
-        query = tool_call_dict['tool_query']
-        
-        if tool_name == "finance":
-            tool_output = mock_finance_api(query)
-        elif tool_name == "legal":
-            tool_output = mock_legal_database(query)
-        elif tool_name == "fitness":
-            tool_output = mock_fitness_tracker(query)
-        else: 
-            tool_output = mock_external_search(query)
-        
-        # Expert response is now the tool result + original expert response
-        tool_message = AIMessage(content=f"TOOL RESULT: {tool_output}")
-        print(f"🛠️ [TOOL MGR] Executed {tool_name}.")
-        return {"messages": state["messages"] + [tool_message]}
+        tool_call = _parse_tool_call(last_message)
+        tool_output = run_tool(tool_call.tool_name, tool_call.tool_query)
+        return _tool_result_update(state, tool_call.tool_name, tool_output)
             
     except json.JSONDecodeError:
         # Not a tool call (just a plain answer), proceed
@@ -185,6 +255,22 @@ def dynamic_tool_manager(state: Dict[str, Any]) -> Dict[str, Any]:
 
     return state 
 
+async def adynamic_tool_manager(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of dynamic_tool_manager: the tool call is awaited instead of blocking."""
+    last_message = state["messages"][-1].content
+    
+    try:
+        tool_call = _parse_tool_call(last_message)
+        tool_output = await arun_tool(tool_call.tool_name, tool_call.tool_query)
+        return _tool_result_update(state, tool_call.tool_name, tool_output)
+            
+    except json.JSONDecodeError:
+        pass 
+    except Exception as e:
+        print(f"🛠️ [TOOL MGR] Tool execution failed: {e}. Proceeding without tool result.")
+
+    return state 
+
 # --- 10. CAUSAL RISK ASSESSOR (CRA) ---
 def causal_risk_assessor(state: Dict[str, Any]) -> Dict[str, Any]:
     """Assesses the risk level of the final answer before delivery."""
@@ -199,38 +285,139 @@ def causal_risk_assessor(state: Dict[str, Any]) -> Dict[str, Any]:
         
         # **CORRECTION:** Ensure the final message contains all necessary info (Tool result + expert answer)
         new_answer = "🛑 **MANDATORY HIGH-RISK WARNING** 🛑 \n\n" + last_message
-        state["messages"][-1] = AIMessage(content=new_answer)
+        # Same id, so add_messages replaces the answer instead of appending
+        update = {"messages": [AIMessage(content=new_answer, id=state["messages"][-1].id)]}
     else:
         risk_score = 0.2
         report = "Low risk assessment."
+        update = {}
         
-    return {"risk_score": risk_score, "risk_assessment_report": report, "messages": state["messages"]}
+    return {"risk_score": risk_score, "risk_assessment_report": report, **update}
 
 # --- 11. CRITIQUE/REVISE (Self-Correction) ---
+def _critique_score(critique: str) -> float:
+    """Ranks candidate answers by their critique: passed > minor issues > critical failure."""
+    critique = critique.upper()
+    if "PERFECT" in critique:
+        return 1.0
+    return 0.0 if "CRITICAL" in critique else 0.5
+
+def _message_tokens(message: Any) -> int:
+    """Provider-reported token usage when present, otherwise a ~4 chars/token estimate."""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return int(usage.get("total_tokens", 0))
+    return max(1, len(str(message.content)) // 4)
+
+def _record_cascade_attempt(state: Dict[str, Any]) -> None:
+    """Per expert and tier: tokens and latency of the attempt critique_revise is judging."""
+    target_expert, tier = state["target_expert"], state.get("model_tier", "unknown")
+    started = state.get("attempt_started_at") or state.get("revision_started_at") or time.time()
+    METRICS.observe_cascade_attempt(target_expert, tier, time.time() - started)
+    METRICS.inc("cognito_llm_tokens_total", _message_tokens(state["messages"][-1]), expert=target_expert, tier=tier)
+
+def _cascade_escalation(state: Dict[str, Any], score: float) -> Optional[str]:
+    """Reason to retry on JUDGE, if this answer came from a cheaper tier and a signal is low."""
+    if not CASCADE_ROUTING or state.get("model_tier", JUDGE) == JUDGE or state.get("latency_budget_exceeded"):
+        return None
+    if score < 1.0:
+        return "critique failed"
+    confidence = state.get("answer_confidence")
+    if confidence is not None and confidence < CASCADE_CONFIDENCE_THRESHOLD:
+        return f"low confidence ({confidence:.2f})"
+    return None
+
 def critique_revise(state: Dict[str, Any]) -> Dict[str, Any]:
     last_message = state["messages"][-1].content
     
     # Mock LLM call for Critique
     if "MANDATORY HIGH-RISK WARNING" in last_message:
         critique = "PERFECT: Response is safe, accurate, and includes all mandatory warnings."
+    elif state.get("latency_budget_exceeded"):
+        # Over the latency budget: accept the answer instead of paying for another expert pass
+        critique = "PERFECT: Accepted without revision (latency budget exceeded)."
     elif random.random() < 0.2: 
         critique = "CRITICAL FAILURE: The answer is incomplete and needs to incorporate the TOOL RESULT."
         # The routing logic will send this back to the expert for revision
     else:
         critique = "PERFECT: Answer is accurate, relevant, and well-structured."
-        
-    return {"critique_report": critique}
+
+    update: Dict[str, Any] = {"critique_report": critique}
+    target_expert = state["target_expert"]
+    revision_count = state.get("revision_count", 0)
+    loop_seconds = time.time() - (state.get("revision_started_at") or time.time())
+
+    # Keep the best candidate (earliest wins ties) so an exhausted budget still has an answer
+    score = _critique_score(critique)
+    best_answer = state.get("best_answer")
+    if best_answer is None or score > state.get("best_answer_score", 0.0):
+        best_answer = last_message
+        update.update(best_answer=last_message, best_answer_score=score)
+
+    _record_cascade_attempt(state)
+    escalation = _cascade_escalation(state, score)
+    if escalation and revision_count < MAX_REVISIONS:
+        # Retry on the JUDGE tier (counts as a revision, so the budget still bounds it)
+        judge_model = TIERS[JUDGE]["model"]
+        print(f"📈 [CASCADE] {target_expert}: {escalation} on {state.get('model_tier')}; escalating to {judge_model}.")
+        METRICS.inc("cognito_cascade_escalations_total", expert=target_expert)
+        update.update(
+            # The cheap-tier critique is not embedded: its PASS wording would read as success downstream
+            critique_report=f"ESCALATE: {escalation} on {state.get('model_tier')} (critique score {score:.1f}).",
+            model_tier=JUDGE, current_model=judge_model, cascade_escalated=True,
+            revision_count=revision_count + 1,
+        )
+        return update
+
+    if score == 1.0:
+        METRICS.observe_revision_loop(target_expert, loop_seconds, revision_count, exhausted=False)
+        return update
+
+    # Revision budget: a capped number of passes and a wall-clock deadline
+    if revision_count >= MAX_REVISIONS or loop_seconds * 1000 >= REVISION_DEADLINE_MS:
+        print(f"🔁 [CRITIQUE] Revision budget exhausted for {target_expert} after {revision_count} revision(s) "
+              f"in {loop_seconds * 1000:.0f} ms; delivering the best answer so far.")
+        METRICS.observe_revision_loop(target_expert, loop_seconds, revision_count, exhausted=True)
+        update["revision_budget_exhausted"] = True
+        # Same id, so add_messages replaces the rejected answer instead of appending
+        update["messages"] = [AIMessage(content=best_answer, id=state["messages"][-1].id)]
+        return update
+
+    update["revision_count"] = revision_count + 1
+    return update
+
+# --- 11a. RESPONSE CACHE STORE ---
+def response_cache_store(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Caches an answer that passed critique (identity/audit still run per request)."""
+    if state.get("revision_budget_exhausted"):
+        return {} # Best-effort answers are delivered, never replayed
+    get_response_cache().store(state, {
+        "answer": state["messages"][-1].content,
+        "risk_score": state.get("risk_score"),
+        "risk_assessment_report": state.get("risk_assessment_report", ""),
+        "critique_report": state.get("critique_report", ""),
+    })
+    return {}
 
 # --- 12. KNOWLEDGE FUSION NODE ---
-def knowledge_fusion_node(state: Dict[str, Any]) -> Dict[str, Any]:
+def _generalize(state: Dict[str, Any]) -> str:
     # Mock LLM call for generalization
-    fusion_block = f"GENERALIZATION: On {state['target_expert']} success, the CRA's risk warning was the key. | REASON: Safety compliance is the optimal path."
+    return f"GENERALIZATION: On {state['target_expert']} success, the CRA's risk warning was the key. | REASON: Safety compliance is the optimal path."
+
+def knowledge_fusion_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    fusion_block = _generalize(state)
     save_fusion_block({"block": fusion_block, "expert": state["target_expert"], "timestamp": time.time()})
     
     return {"fusion_block": fusion_block}
 
+async def aknowledge_fusion_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    fusion_block = _generalize(state)
+    await asave_fusion_block({"block": fusion_block, "expert": state["target_expert"], "timestamp": time.time()})
+    
+    return {"fusion_block": fusion_block}
+
 # --- 13. META-COGNITION LOOP (Self-Improvement) ---
-def meta_cognition_node(state: Dict[str, Any]) -> Dict[str, Any]:
+def _update_reputation(state: Dict[str, Any]) -> Dict[str, float]:
     expert = state["target_expert"]
     is_successful = "PERFECT" in state.get("critique_report", "").upper()
     
@@ -240,23 +427,43 @@ def meta_cognition_node(state: Dict[str, Any]) -> Dict[str, Any]:
     
     new_score = min(1.0, current_score + 0.05) if is_successful else max(0.1, current_score - 0.05)
     current_reputation[expert] = new_score
-    
+    return current_reputation
+
+def _training_record(state: Dict[str, Any]) -> Dict[str, Any]:
     # Autonomous Training Script Generation 
-    training_script = f"TRAINING PROMPT (Expert: {expert}): Example query related to {expert}. | IDEAL RESPONSE: A highly accurate and safe response."
-    log_training_script(training_script)
+    expert = state["target_expert"]
+    return {
+        "expert": expert,
+        "prompt": f"Example query related to {expert}.",
+        "ideal_response": "A highly accurate and safe response.",
+        "request_id": state.get("request_id"),
+    }
+
+def meta_cognition_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    current_reputation = _update_reputation(state)
+    log_training_script(_training_record(state))
     
     return {"agent_reputation": current_reputation}
 
-# --- 14. DECENTRALIZED VERIFIABLE IDENTITY NODE (DVID) ---
-def verifiable_identity_node(state: Dict[str, Any]) -> Dict[str, Any]:
-    final_answer = state["messages"][-1].content
-    audit_hash = state.get("audit_hash", "0xPENDING_HASH") 
+async def ameta_cognition_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    current_reputation = _update_reputation(state)
+    await alog_training_script(_training_record(state))
     
+    return {"agent_reputation": current_reputation}
+
+# --- 14. DECENTRALIZED VERIFIABLE IDENTITY NODE (DVID) ---
+def _identity_payload(state: Dict[str, Any]) -> StreamingHasher:
     # Data to sign (must include the hash from the next node for true immutability, 
-    # but we sign the data going *into* the hash for this flow)
-    data_to_sign = f"ANSWER:{final_answer}|HASH:{audit_hash}|DID:{PUBLIC_DID}"
-    digital_signature = sign_data_with_did(data_to_sign)
-    
+    # but we sign the data going *into* the hash for this flow). Fed field by field,
+    # so a long answer is never copied into one big string.
+    return (StreamingHasher()
+            .update("answer", state["messages"][-1].content)
+            .update("audit_hash", state.get("audit_hash", "0xPENDING_HASH"))
+            .update("did", PUBLIC_DID))
+
+def _identity_update(state: Dict[str, Any], digital_signature: str,
+                     receipt: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    final_answer = state["messages"][-1].content
     # Embed verification details into the final message for the user
     final_answer_with_id = (
         f"{final_answer}\n\n---\n"
@@ -264,10 +471,38 @@ def verifiable_identity_node(state: Dict[str, Any]) -> Dict[str, Any]:
         f"**Source DID:** {PUBLIC_DID}\n"
         f"**Digital Signature:** {digital_signature[:60]}..."
     )
+    if receipt is not None:
+        final_answer_with_id += (
+            f"\n**Merkle Root:** {receipt['merkle_root']} "
+            f"(leaf {receipt['leaf_index'] + 1} of {receipt['batch_size']}, {len(receipt['proof'])}-step inclusion proof)"
+        )
     
-    state["messages"][-1] = AIMessage(content=final_answer_with_id)
-    
-    return {"digital_signature": digital_signature, "messages": state["messages"]}
+    # Same id, so add_messages replaces the answer instead of appending
+    update = {"digital_signature": digital_signature,
+              "messages": [AIMessage(content=final_answer_with_id, id=state["messages"][-1].id)]}
+    if receipt is not None:
+        update["trust_receipt"] = receipt
+    return update
+
+def verifiable_identity_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    data_to_sign = _identity_payload(state)
+    if SIGNING_MODE != "batched":
+        METRICS.inc("cognito_signatures_total", mode="per_response")
+        return _identity_update(state, sign_data_with_did(data_to_sign))
+
+    # Batched: the response digest joins a Merkle batch whose root is signed once
+    receipt = get_batch_signer().sign_digest(calculate_verifiable_hash(data_to_sign))
+    return _identity_update(state, receipt["root_signature"], receipt)
+
+async def averifiable_identity_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    data_to_sign = _identity_payload(state)
+    if SIGNING_MODE != "batched":
+        METRICS.inc("cognito_signatures_total", mode="per_response")
+        return _identity_update(state, sign_data_with_did(data_to_sign))
+
+    # Waiting for the batch window does not block the event loop
+    receipt = await get_batch_signer().asign_digest(calculate_verifiable_hash(data_to_sign))
+    return _identity_update(state, receipt["root_signature"], receipt)
 
 
 # --- 15. VERIFIABLE AUDIT NODE (Error Handling Refined) ---
@@ -275,7 +510,7 @@ def verifiable_audit_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """Creates a final, tamper-evident audit log of the entire transaction."""
     
     try:
-        # Compile all critical state parts into a single string for hashing
+        # Compile all critical state parts for hashing
         audit_data = {
             "user_query": state["messages"][0].content,
             "final_response_snippet": state["messages"][-1].content[:100] + "...",
@@ -284,11 +519,56 @@ def verifiable_audit_node(state: Dict[str, Any]) -> Dict[str, Any]:
             "signature": state.get("digital_signature")
         }
         
-        # Calculate the hash
-        audit_hash = calculate_verifiable_hash(json.dumps(audit_data))
+        # Calculate the hash: each field is fed to the hasher as-is (no json.dumps of the whole record)
+        hasher = StreamingHasher()
+        for field, value in audit_data.items():
+            hasher.update(field, value)
+        audit_hash = calculate_verifiable_hash(hasher)
+
+        # Queue the record for the batched audit chain (committed by its batch's Merkle root)
+        get_audit_log().submit("TRANSACTION_COMPLETE", {**audit_data, "audit_hash": audit_hash},
+                               thread_id=state.get("request_id", "N/A"))
         
         return {"audit_hash": audit_hash}
     except Exception as e:
         # Safe fallback in case of audit failure
         print(f"🔒 [AUDIT] CRITICAL ERROR: Audit failed. {e}")
-        return {"audit_hash": "0xAUDIT_FAILED_SEC_ISSUE"}
\ No newline at end of file
+        return {"audit_hash": "0xAUDIT_FAILED_SEC_ISSUE"}
+
+
+# --- NODE REGISTRY ---
+
+# Sync node implementations, keyed by graph node name (used by run_app.py and api_server.py)
+NODE_MAP = {
+    "multi_modal_decoder": multi_modal_decoder,
+    "mlcc_nlu_agent": mlcc_nlu_agent,
+    "emotion_intent_detector": emotion_intent_detector,
+    "supervisor": supervisor,
+    "universal_model_selector": universal_model_selector,
+    "q_value_prioritizer": q_value_prioritizer,
+    "cognitive_latency_check": cognitive_latency_check,
+    "response_cache_lookup": response_cache_lookup,
+    "finance_expert": finance_expert,
+    "legal_expert": legal_expert,
+    "fitness_expert": fitness_expert,
+    "business_expert": business_expert,
+    "health_expert": health_expert,
+    "general_qa": general_qa,
+    "dynamic_tool_manager": dynamic_tool_manager,
+    "causal_risk_assessor": causal_risk_assessor,
+    "critique_revise": critique_revise,
+    "response_cache_store": response_cache_store,
+    "knowledge_fusion_node": knowledge_fusion_node,
+    "meta_cognition_node": meta_cognition_node,
+    "human_approval_gate": human_approval_gate,  # only wired in when compiled with a checkpointer
+    "verifiable_identity_node": verifiable_identity_node,
+    "verifiable_audit_node": verifiable_audit_node,
+}
+
+# Async variants of the I/O-bound nodes, used when the graph is driven with ainvoke/astream
+ASYNC_NODE_MAP = {
+    "dynamic_tool_manager": adynamic_tool_manager,
+    "knowledge_fusion_node": aknowledge_fusion_node,
+    "meta_cognition_node": ameta_cognition_node,
+    "verifiable_identity_node": averifiable_identity_node,
+}
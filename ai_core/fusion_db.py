@@ -0,0 +1,337 @@
+# D:\cognito_ai_assistant\ai_core\fusion_db.py
+
+import argparse
+import atexit
+import csv
+import hashlib
+import io
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# --- 1. CONFIGURATION AND SCHEMA ---
+
+# SQLite in WAL mode: appends are atomic transactions, so several workers/processes can write safely
+FUSION_DB_PATH = os.getenv("FUSION_DB_PATH", "fusion_db.sqlite3")
+FUSION_BATCH_SIZE = int(os.getenv("FUSION_BATCH_SIZE", "64"))
+FUSION_FLUSH_INTERVAL = float(os.getenv("FUSION_FLUSH_INTERVAL", "1.0"))  # seconds
+FUSION_MAX_PENDING = int(os.getenv("FUSION_MAX_PENDING", "10000"))
+
+# Content-addressed storage: each distinct block text is stored once, and
+# block_occurrences keeps one compact row per (block, expert) with counts and first/last-seen times.
+# The (expert, last_seen) index makes "latest N blocks for an expert" an index range scan.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS block_contents (
+    content_hash TEXT PRIMARY KEY,
+    block TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS block_occurrences (
+    content_hash TEXT NOT NULL REFERENCES block_contents(content_hash),
+    expert TEXT NOT NULL,
+    occurrences INTEGER NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (content_hash, expert)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_block_occurrences_expert_last_seen
+    ON block_occurrences (expert, last_seen DESC);
+CREATE INDEX IF NOT EXISTS idx_block_occurrences_last_seen
+    ON block_occurrences (last_seen DESC);
+CREATE TABLE IF NOT EXISTS imported_sources (
+    source TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL,
+    prefix_hash TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    imported_at REAL NOT NULL
+);
+"""
+
+UPSERT_CONTENT = "INSERT OR IGNORE INTO block_contents (content_hash, block) VALUES (?, ?)"
+UPSERT_OCCURRENCE = """
+INSERT INTO block_occurrences (content_hash, expert, occurrences, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (content_hash, expert) DO UPDATE SET
+    occurrences = occurrences + excluded.occurrences,
+    first_seen = MIN(first_seen, excluded.first_seen),
+    last_seen = MAX(last_seen, excluded.last_seen)
+"""
+
+# --- 2. STORAGE ---
+
+def content_hash(block: str) -> str:
+    return hashlib.sha256(block.encode('utf-8')).hexdigest()
+
+def connect(db_path: str = FUSION_DB_PATH) -> sqlite3.Connection:
+    """Opens a FusionDB connection in WAL mode and ensures the schema exists."""
+    conn = sqlite3.connect(db_path, timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def write_blocks(conn: sqlite3.Connection, rows: List[Dict[str, Any]]) -> int:
+    """
+    Deduplicates rows in memory, then upserts them in one transaction.
+    Returns the number of (block, expert) groups written.
+    """
+    with conn:
+        return _upsert_blocks(conn, rows)
+
+def _upsert_blocks(conn: sqlite3.Connection, rows: List[Dict[str, Any]]) -> int:
+    # Runs inside the caller's transaction
+    contents: Dict[str, str] = {}
+    groups: Dict[tuple, List[float]] = {}  # (hash, expert) -> [count, first_seen, last_seen]
+    for row in rows:
+        block = str(row.get("block", ""))
+        expert = str(row.get("expert") or "unknown")
+        ts = float(row.get("timestamp") or time.time())
+        digest = contents.get(block)
+        if digest is None:
+            digest = contents[block] = content_hash(block)
+        key = (digest, expert)
+        if key in groups:
+            stats = groups[key]
+            stats[0] += 1
+            stats[1], stats[2] = min(stats[1], ts), max(stats[2], ts)
+        else:
+            groups[key] = [1, ts, ts]
+
+    conn.executemany(UPSERT_CONTENT, [(digest, block) for block, digest in contents.items()])
+    conn.executemany(UPSERT_OCCURRENCE, [(h, e, int(c), f, l) for (h, e), (c, f, l) in groups.items()])
+    return len(groups)
+
+def latest_blocks(expert: Optional[str] = None, limit: int = 10, db_path: str = FUSION_DB_PATH) -> List[Dict[str, Any]]:
+    """Most recently seen distinct blocks (optionally for one expert), served from the last_seen indexes."""
+    query = (
+        "SELECT c.block, o.expert, o.occurrences, o.first_seen, o.last_seen "
+        "FROM block_occurrences o JOIN block_contents c ON c.content_hash = o.content_hash "
+    )
+    params: tuple = ()
+    if expert is not None:
+        query += "WHERE o.expert = ? "
+        params = (expert,)
+    query += "ORDER BY o.last_seen DESC LIMIT ?"
+    conn = connect(db_path)
+    try:
+        cursor = conn.execute(query, params + (limit,))
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+# --- 3. BUFFERED WRITER ---
+
+_FLUSH = object()
+_STOP = object()
+
+class FusionDBWriter:
+    """
+    Buffers Fusion Blocks in memory and writes them from a background thread,
+    one multi-row transaction per batch. A batch is flushed when it reaches
+    batch_size or when its oldest block is flush_interval seconds old.
+    """
+
+    def __init__(self, db_path: str = FUSION_DB_PATH, batch_size: int = FUSION_BATCH_SIZE,
+                 flush_interval: float = FUSION_FLUSH_INTERVAL, max_pending: int = FUSION_MAX_PENDING):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="fusion-db-writer", daemon=True)
+        self._closed = False
+        self._thread.start()
+
+    def submit(self, fusion_data: Dict[str, Any]) -> None:
+        """Enqueues a block without touching the disk (called on the request path)."""
+        if self._closed:
+            raise RuntimeError("FusionDB writer is closed.")
+        try:
+            self._queue.put_nowait(dict(fusion_data))
+        except queue.Full:
+            # Storage is best-effort learning data: never stall a request on it
+            print("Error saving fusion block: FusionDB write buffer is full, block dropped.")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until every block submitted so far is on disk. Returns False on timeout, and
+        immediately if the writer is closed or its thread has stopped (nothing would answer).
+        """
+        if self._closed or not self._thread.is_alive():
+            return False
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put((_FLUSH, done), timeout=timeout)
+        except queue.Full:
+            return False
+        while not done.wait(0.1):
+            if not self._thread.is_alive() or (deadline is not None and time.monotonic() >= deadline):
+                return done.is_set()
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Flushes pending blocks and stops the writer thread (registered with atexit)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        conn = connect(self.db_path)
+        pending: List[Dict[str, Any]] = []
+        deadline: Optional[float] = None
+        try:
+            while True:
+                wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=wait)
+                except queue.Empty:
+                    item = None
+
+                if isinstance(item, dict):
+                    pending.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                    if len(pending) < self.batch_size:
+                        continue
+
+                # Size threshold, time threshold, explicit flush or shutdown
+                if pending:
+                    self._write_batch(conn, pending)
+                    pending, deadline = [], None
+                if isinstance(item, tuple) and item[0] is _FLUSH:
+                    item[1].set()
+                elif item is _STOP:
+                    return
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, rows: List[Dict[str, Any]]) -> None:
+        try:
+            write_blocks(conn, rows)
+            print(f"🧠 [TOOL] {len(rows)} Fusion Block(s) flushed to {self.db_path}.")
+        except Exception as e:
+            # Graceful failure on logging/storage errors
+            print(f"Error saving fusion block: {e}")
+
+# --- 4. PROCESS-WIDE WRITER ---
+
+_WRITER: Optional[FusionDBWriter] = None
+_WRITER_LOCK = threading.Lock()
+
+def get_fusion_writer() -> FusionDBWriter:
+    """Returns the shared writer, starting its thread on first use."""
+    global _WRITER
+    if _WRITER is None:
+        with _WRITER_LOCK:
+            if _WRITER is None:
+                _WRITER = FusionDBWriter()
+                atexit.register(_WRITER.close)
+    return _WRITER
+
+# --- 5. COMPACTION (legacy fusion_db.csv -> content-addressed SQLite) ---
+
+def _prefix_hash(path: str, size: int) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        remaining = size
+        while remaining:
+            chunk = f.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher.hexdigest()
+
+def _import_csv(conn: sqlite3.Connection, csv_path: str, batch_size: int) -> int:
+    """
+    Imports the part of the CSV not imported before, inside the caller's transaction.
+    imported_sources remembers how many bytes of the file were folded in (and their hash),
+    so re-running compact is a no-op and an appended CSV only contributes its new rows.
+    """
+    source = os.path.realpath(csv_path)
+    previous = conn.execute("SELECT bytes, prefix_hash, rows FROM imported_sources WHERE source = ?",
+                            (source,)).fetchone()
+    start, total_rows = 0, 0
+    if previous:
+        start, prefix_hash, total_rows = previous
+        if os.path.getsize(csv_path) < start or _prefix_hash(csv_path, start) != prefix_hash:
+            raise ValueError(f"{csv_path} changed since it was imported (not just appended to); "
+                             "refusing to import it again and double-count its blocks.")
+
+    imported = 0
+    with open(csv_path, 'rb') as raw:
+        header = next(csv.reader([raw.readline().decode('utf-8')]), [])
+        if start:
+            raw.seek(start)
+        text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+        batch: List[Dict[str, Any]] = []
+        for row in csv.DictReader(text, fieldnames=header):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _upsert_blocks(conn, batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            _upsert_blocks(conn, batch)
+            imported += len(batch)
+        end = raw.tell()
+
+    conn.execute("INSERT OR REPLACE INTO imported_sources (source, bytes, prefix_hash, rows, imported_at) "
+                 "VALUES (?, ?, ?, ?, ?)", (source, end, _prefix_hash(csv_path, end), total_rows + imported, time.time()))
+    return imported
+
+def compact(csv_path: Optional[str] = "fusion_db.csv", db_path: str = FUSION_DB_PATH, batch_size: int = 5000) -> Dict[str, int]:
+    """
+    Folds the append-only CSV (and any rows left in the pre-dedup fusion_blocks table)
+    into the deduplicated store, then vacuums the database. Idempotent: each source is
+    imported in one transaction together with the record of what was imported.
+    """
+    conn = connect(db_path)
+    imported = 0
+    try:
+        if csv_path and os.path.exists(csv_path):
+            with conn:
+                imported += _import_csv(conn, csv_path, batch_size)
+
+        legacy = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='fusion_blocks'").fetchone()
+        if legacy:
+            rows = [{"block": b, "expert": e, "timestamp": t}
+                    for b, e, t in conn.execute("SELECT block, expert, timestamp FROM fusion_blocks")]
+            with conn:
+                _upsert_blocks(conn, rows)
+                conn.execute("DROP TABLE fusion_blocks")
+            imported += len(rows)
+
+        conn.execute("VACUUM")
+        distinct = conn.execute("SELECT COUNT(*) FROM block_contents").fetchone()[0]
+        groups = conn.execute("SELECT COUNT(*) FROM block_occurrences").fetchone()[0]
+    finally:
+        conn.close()
+
+    return {"rows_imported": imported, "distinct_blocks": distinct, "block_expert_rows": groups}
+
+if __name__ == '__main__':
+    # Usage: python -m ai_core.fusion_db compact --csv fusion_db.csv --db fusion_db.sqlite3
+    #        python -m ai_core.fusion_db latest --expert finance_expert --limit 5
+    parser = argparse.ArgumentParser(description="FusionDB maintenance commands.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact_cmd = sub.add_parser("compact", help="Convert/compact fusion_db.csv into the deduplicated SQLite store.")
+    compact_cmd.add_argument("--csv", default="fusion_db.csv")
+    compact_cmd.add_argument("--db", default=FUSION_DB_PATH)
+    latest_cmd = sub.add_parser("latest", help="Show the most recently seen blocks.")
+    latest_cmd.add_argument("--expert", default=None)
+    latest_cmd.add_argument("--limit", type=int, default=10)
+    latest_cmd.add_argument("--db", default=FUSION_DB_PATH)
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        summary = compact(args.csv, args.db)
+        print(f"🧠 [FUSION DB] Compacted into {args.db}: {summary}")
+    else:
+        for row in latest_blocks(args.expert, args.limit, args.db):
+            print(f"- [{row['expert']}] x{row['occurrences']} last_seen={row['last_seen']:.0f}: {row['block']}")
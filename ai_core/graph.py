@@ -1,11 +1,14 @@
 # D:\cognito_ai_assistant\ai_core\graph.py
 
-from typing import TypedDict, Dict, Any, List, Literal, Annotated
+from typing import TypedDict, Dict, Any, List, Literal, Annotated, Optional
 from typing_extensions import NotRequired
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableLambda
+from .metrics import timed_node
 from langgraph.graph.message import add_messages
 import os
+import threading
 
 # --- 1. CONFIGURATION AND TYPES ---
 
@@ -19,13 +22,23 @@ EXPERT_OPTIONS = Literal[
     "general_qa"
 ]
 
+# Run the independent pre-routing analyzers (language/culture NLU and emotion/intent
+# detection) concurrently after the decoder instead of as a linear chain
+PARALLEL_PRE_ROUTING = os.getenv("COGNITO_PARALLEL_PRE_ROUTING", "1") == "1"
+PRE_ROUTING_ANALYZERS = ("mlcc_nlu_agent", "emotion_intent_detector")
+
+# Human sign-off before signing/delivery; needs a checkpointer to pause and resume the run
+APPROVAL_NODE = "human_approval_gate"
+
 # --- 2. STATE DEFINITION (TypedDict for LangGraph State) ---
 
 class AgentState(TypedDict):
     """The shared state for the multi-agent graph, ensuring type-safe data flow."""
     
     # Core Communication (History of messages)
+    # Nodes return only new messages (or same-id replacements / RemoveMessage); add_messages merges
     messages: Annotated[List[BaseMessage], add_messages] 
+    history_summary: NotRequired[str]  # rolling summary of turns trimmed by history.HistoryManager
 
     # Multi-Lingual / Multi-Modal Context
     raw_user_input: str      # The original, unprocessed input
@@ -37,6 +50,10 @@ class AgentState(TypedDict):
     # Routing and Expert Selection
     target_expert: NotRequired[EXPERT_OPTIONS]
     current_model: str 
+    model_tier: NotRequired[str]              # llm_registry tier behind current_model
+    routed_model: NotRequired[str]            # universal_model_selector's choice, before any escalation
+    answer_confidence: NotRequired[float]     # optional expert self-confidence (0..1) for the cascade
+    cascade_escalated: NotRequired[bool]
     
     # Safety and Risk Assessment
     risk_score: float        # Numeric score (0.0 to 1.0)
@@ -50,6 +67,24 @@ class AgentState(TypedDict):
     # Audit and Trust
     audit_hash: str
     digital_signature: str
+    trust_receipt: NotRequired[Dict[str, Any]]  # Merkle inclusion proof + signed root (batched signing)
+
+    # Revision budget for the critique -> expert loop (see critique_revise)
+    revision_count: NotRequired[int]          # revisions requested so far
+    revision_started_at: NotRequired[float]   # wall-clock start of the first expert pass
+    attempt_started_at: NotRequired[float]    # wall-clock start of the latest expert pass
+    best_answer: NotRequired[str]             # highest-scoring candidate seen by critique_revise
+    best_answer_score: NotRequired[float]
+    revision_budget_exhausted: NotRequired[bool]
+
+    # Set by cognitive_latency_check when the projected p95 path latency exceeds the budget
+    latency_budget_exceeded: NotRequired[bool]
+
+    # Response cache (set by response_cache_lookup)
+    cache_hit: NotRequired[bool]
+
+    # Correlates storage/training records with the originating API request
+    request_id: NotRequired[str]
     
 # --- 3. HELPER FUNCTIONS (Conditional Edges Logic) ---
 
@@ -61,11 +96,23 @@ def route_to_expert(state: AgentState) -> str:
         return "general_qa"
     return expert
 
+def route_cache_lookup(state: AgentState) -> str:
+    """Cache hits skip the expert pipeline and go straight to signing/audit."""
+    if state.get("cache_hit"):
+        return "cache_hit"
+    return route_to_expert(state)
+
 def route_critique_final(state: AgentState) -> str:
-    """Routes to Knowledge Fusion on success, or back to revision on failure."""
+    """
+    Routes to Knowledge Fusion on success (or once the revision budget is spent and the
+    best answer so far was selected), or back to revision on failure. A cascade escalation
+    always goes back to the expert for its retry on the stronger tier.
+    """
     critique = state.get("critique_report", "").upper()
     
-    if "PERFECT" in critique:
+    if critique.startswith("ESCALATE"):
+        return state.get("target_expert", "general_qa") # Retry on the escalated tier
+    if "PERFECT" in critique or state.get("revision_budget_exhausted"):
         return "knowledge_fusion" # Success path
     else:
         # Revision path: return to the expert for another attempt
@@ -73,14 +120,37 @@ def route_critique_final(state: AgentState) -> str:
 
 # --- 4. GRAPH CONSTRUCTION ---
 
-def create_cognito_omega_graph(nodes_map: Dict[str, Any]):
-    """Creates and compiles the final Cognito Omega StateGraph."""
+def create_cognito_omega_graph(nodes_map: Dict[str, Any], async_nodes_map: Optional[Dict[str, Any]] = None,
+                               instrument: bool = True, parallel_pre_routing: bool = PARALLEL_PRE_ROUTING,
+                               checkpointer: Optional[Any] = None):
+    """
+    Creates and compiles the final Cognito Omega StateGraph.
+    Nodes listed in async_nodes_map get their async variant under ainvoke/astream,
+    while invoke/stream keep using the sync implementation from nodes_map.
+    With instrument=True every node is timed into ai_core.metrics.METRICS.
+    With parallel_pre_routing=True the PRE_ROUTING_ANALYZERS fan out from the decoder in one
+    superstep and the supervisor waits for both (their updates must touch disjoint keys).
+    Pass checkpointer (e.g. ai_core.checkpointer.get_checkpointer()) to persist runs per
+    thread_id so interrupted runs can be resumed on any worker; the APPROVAL_NODE (if in
+    nodes_map) is then wired in front of verifiable_identity_node on every delivery path.
+    """
     
     workflow = StateGraph(AgentState)
+    async_nodes_map = async_nodes_map or {}
+    use_approval = checkpointer is not None and APPROVAL_NODE in nodes_map
 
     # Add all nodes 
     for name, func in nodes_map.items():
-        workflow.add_node(name, func)
+        if name == APPROVAL_NODE and not use_approval:
+            continue # interrupt() cannot pause a run without a checkpointer
+        afunc = async_nodes_map.get(name)
+        if instrument:
+            func = timed_node(name, func)
+            afunc = timed_node(name, afunc) if afunc else None
+        if afunc:
+            workflow.add_node(name, RunnableLambda(func, afunc=afunc, name=name))
+        else:
+            workflow.add_node(name, func)
         
     # --- Define Flow ---
 
@@ -88,21 +158,39 @@ def create_cognito_omega_graph(nodes_map: Dict[str, Any]):
     workflow.set_entry_point("multi_modal_decoder")
     
     # 2. Initial Flow
-    workflow.add_edge("multi_modal_decoder", "mlcc_nlu_agent")
-    workflow.add_edge("mlcc_nlu_agent", "emotion_intent_detector")
-    workflow.add_edge("emotion_intent_detector", "supervisor")
+    if parallel_pre_routing:
+        # Fan-out: both analyzers only read the decoded message; fan-in: their updates are
+        # merged into the state before the supervisor routes
+        for analyzer in PRE_ROUTING_ANALYZERS:
+            workflow.add_edge("multi_modal_decoder", analyzer)
+        workflow.add_edge(list(PRE_ROUTING_ANALYZERS), "supervisor")
+    else:
+        workflow.add_edge("multi_modal_decoder", "mlcc_nlu_agent")
+        workflow.add_edge("mlcc_nlu_agent", "emotion_intent_detector")
+        workflow.add_edge("emotion_intent_detector", "supervisor")
     workflow.add_edge("supervisor", "universal_model_selector")
     
     # 3. Prioritization Path
     workflow.add_edge("universal_model_selector", "q_value_prioritizer")
     workflow.add_edge("q_value_prioritizer", "cognitive_latency_check")
     
-    # 4. Expert Routing (Conditional)
-    workflow.add_conditional_edges(
-        "cognitive_latency_check",
-        route_to_expert,
-        {expert: expert for expert in EXPERT_OPTIONS.__args__} 
-    )
+    # 4. Expert Routing (Conditional), optionally behind the response cache
+    expert_routes = {expert: expert for expert in EXPERT_OPTIONS.__args__}
+    deliver = APPROVAL_NODE if use_approval else "verifiable_identity_node"
+    use_cache = "response_cache_lookup" in nodes_map and "response_cache_store" in nodes_map
+    if use_cache:
+        workflow.add_edge("cognitive_latency_check", "response_cache_lookup")
+        workflow.add_conditional_edges(
+            "response_cache_lookup",
+            route_cache_lookup,
+            {"cache_hit": deliver, **expert_routes}
+        )
+    else:
+        workflow.add_conditional_edges(
+            "cognitive_latency_check",
+            route_to_expert,
+            expert_routes
+        )
     
     # 5. Execution Path (Expert -> Tool Manager -> Risk Assessor -> Critique)
     for expert in EXPERT_OPTIONS.__args__:
@@ -116,18 +204,44 @@ def create_cognito_omega_graph(nodes_map: Dict[str, Any]):
         "critique_revise",
         route_critique_final,
         {
-            "knowledge_fusion": "knowledge_fusion_node", # Success path
+            # Success path (answers that passed critique are cached first)
+            "knowledge_fusion": "response_cache_store" if use_cache else "knowledge_fusion_node",
             # All other options route back to the expert for revision
             **{expert: expert for expert in EXPERT_OPTIONS.__args__}
         } 
     )
 
     # 7. Trust and Final Audit Path
+    if use_cache:
+        workflow.add_edge("response_cache_store", "knowledge_fusion_node")
     workflow.add_edge("knowledge_fusion_node", "meta_cognition_node")
-    workflow.add_edge("meta_cognition_node", "verifiable_identity_node")
+    workflow.add_edge("meta_cognition_node", deliver)
+    if use_approval:
+        workflow.add_edge(APPROVAL_NODE, "verifiable_identity_node")
     workflow.add_edge("verifiable_identity_node", "verifiable_audit_node")
     workflow.add_edge("verifiable_audit_node", END)
     
     # Compile the final graph
-    app = workflow.compile()
-    return app
\ No newline at end of file
+    app = workflow.compile(checkpointer=checkpointer)
+    return app
+
+# --- 5. PROCESS-WIDE COMPILED GRAPH ---
+
+_GRAPHS: Dict[Any, Any] = {}
+_GRAPHS_LOCK = threading.Lock()
+
+def get_cognito_omega_graph(checkpointer: Optional[Any] = None):
+    """
+    The graph over ai_core.experts.NODE_MAP / ASYNC_NODE_MAP, compiled on the first call and
+    then shared by every caller in the process (one per checkpointer). A compiled graph keeps
+    no per-run state, so concurrent requests can use the same instance.
+    """
+    app = _GRAPHS.get(checkpointer)
+    if app is None:
+        with _GRAPHS_LOCK:
+            app = _GRAPHS.get(checkpointer)
+            if app is None:
+                from .experts import ASYNC_NODE_MAP, NODE_MAP  # experts imports this module
+                app = _GRAPHS[checkpointer] = create_cognito_omega_graph(NODE_MAP, ASYNC_NODE_MAP,
+                                                                         checkpointer=checkpointer)
+    return app
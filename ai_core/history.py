@@ -0,0 +1,166 @@
+# D:\cognito_ai_assistant\ai_core\history.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, RemoveMessage, SystemMessage, ToolMessage
+
+# --- 1. CONFIGURATION ---
+
+HISTORY_MAX_TOKENS = int(os.getenv("COGNITO_HISTORY_MAX_TOKENS", "3000"))  # sliding window kept in state/prompts
+HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("COGNITO_HISTORY_SUMMARY_MAX_TOKENS", "400"))
+HISTORY_SUMMARY_LINE_TOKENS = int(os.getenv("COGNITO_HISTORY_SUMMARY_LINE_TOKENS", "40"))  # per dropped message
+HISTORY_ENCODING = os.getenv("COGNITO_HISTORY_ENCODING", "cl100k_base")
+MESSAGE_OVERHEAD_TOKENS = 4  # role/separator tokens the chat format adds per message
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("COGNITO_TOKEN_COUNT_CACHE_SIZE", "4096"))
+
+# --- 2. TOKEN COUNTING ---
+
+_ENCODING: Any = None
+_ENCODING_LOCK = threading.Lock()
+
+def _encoding() -> Any:
+    """tiktoken encoding, loaded once. False if it cannot be loaded (e.g. no network for the BPE file)."""
+    global _ENCODING
+    if _ENCODING is None:
+        with _ENCODING_LOCK:
+            if _ENCODING is None:
+                try:
+                    import tiktoken
+                    _ENCODING = tiktoken.get_encoding(HISTORY_ENCODING)
+                except Exception as e:
+                    print(f"⚠️ [HISTORY] tiktoken encoding unavailable ({e}); estimating ~4 chars/token.")
+                    _ENCODING = False
+    return _ENCODING
+
+# Windows are re-counted every turn, so recent counts are cached. Keys are digests of the
+# text, never the text itself, so large tool outputs are not kept alive by the cache.
+_TOKEN_COUNTS: "OrderedDict[bytes, int]" = OrderedDict()
+_TOKEN_COUNTS_LOCK = threading.Lock()
+
+def count_tokens(text: str) -> int:
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    with _TOKEN_COUNTS_LOCK:
+        count = _TOKEN_COUNTS.get(key)
+        if count is not None:
+            _TOKEN_COUNTS.move_to_end(key)
+            return count
+    encoding = _encoding()
+    count = len(encoding.encode(text, disallowed_special=())) if encoding else (len(text) + 3) // 4
+    with _TOKEN_COUNTS_LOCK:
+        _TOKEN_COUNTS[key] = count
+        while len(_TOKEN_COUNTS) > TOKEN_COUNT_CACHE_SIZE:
+            _TOKEN_COUNTS.popitem(last=False)
+    return count
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cuts text to at most max_tokens tokens."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _encoding()
+    if encoding:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens]) + "…"
+    return text[:max_tokens * 4] + "…"
+
+def message_tokens(message: BaseMessage) -> int:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    tokens = count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+    for call in getattr(message, "tool_calls", None) or []:
+        tokens += count_tokens(f"{call.get('name')}{call.get('args')}")
+    return tokens
+
+# --- 3. HISTORY MANAGER ---
+
+def extractive_summary(previous: str, dropped: Sequence[BaseMessage]) -> str:
+    """Default summarizer: one clipped line per dropped message, no LLM call."""
+    lines = [previous] if previous else []
+    for message in dropped:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        lines.append(f"- {message.type}: {truncate_tokens(' '.join(content.split()), HISTORY_SUMMARY_LINE_TOKENS)}")
+    return "\n".join(lines)
+
+class HistoryManager:
+    """
+    Keeps message history within a token budget. The first message (the user's request) is
+    pinned. The newest messages that fit the budget are kept verbatim, and older messages are
+    folded into a rolling summary capped at summary_max_tokens (oldest lines go first).
+    Tool results are never separated from the AI message that requested them.
+
+    summarize(previous_summary, dropped_messages) -> str can be swapped for an LLM summarizer.
+    """
+
+    def __init__(self, max_tokens: int = HISTORY_MAX_TOKENS, summary_max_tokens: int = HISTORY_SUMMARY_MAX_TOKENS,
+                 summarize: Callable[[str, Sequence[BaseMessage]], str] = extractive_summary):
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.summarize = summarize
+
+    def split(self, messages: Sequence[BaseMessage], reserve: int = 0) -> Tuple[List[BaseMessage], List[BaseMessage]]:
+        """Returns (kept, dropped); reserve is budget already claimed by messages about to be added."""
+        if len(messages) <= 1:
+            return list(messages), []
+        pinned, rest = messages[0], messages[1:]
+        budget = self.max_tokens - reserve - message_tokens(pinned)
+        start = len(rest)
+        while start > 0 and budget - message_tokens(rest[start - 1]) >= 0:
+            start -= 1
+            budget -= message_tokens(rest[start])
+        # A ToolMessage without its tool-calling AI message is rejected by chat APIs
+        while start < len(rest) and isinstance(rest[start], ToolMessage):
+            start += 1
+        return [pinned, *rest[start:]], list(rest[:start])
+
+    def _cap_summary(self, summary: str) -> str:
+        lines = summary.split("\n")
+        while len(lines) > 1 and count_tokens("\n".join(lines)) > self.summary_max_tokens:
+            lines.pop(0)
+        return truncate_tokens("\n".join(lines), self.summary_max_tokens)
+
+    def compact(self, messages: Sequence[BaseMessage], summary: str = "",
+                reserve: int = 0) -> Dict[str, Any]:
+        """
+        State update that trims the history in place: RemoveMessage entries for the add_messages
+        reducer plus the new history_summary. Empty when everything fits.
+        """
+        _, dropped = self.split(messages, reserve)
+        if not dropped:
+            return {}
+        return {
+            "messages": [RemoveMessage(id=message.id) for message in dropped if message.id],
+            "history_summary": self._cap_summary(self.summarize(summary, dropped)),
+        }
+
+    @staticmethod
+    def _summary_message(summary: str) -> SystemMessage:
+        return SystemMessage(content=f"Summary of earlier conversation:\n{summary}")
+
+    def window(self, messages: Sequence[BaseMessage], summary: str = "", reserve: int = 0) -> List[BaseMessage]:
+        """
+        Prompt view: pinned request, rolling summary (if any) and the newest messages within budget.
+        The budget is reserved for the summary actually sent: if folding the dropped messages
+        makes it longer, the split is redone against the new length (it is capped, so this ends).
+        """
+        summary_tokens = message_tokens(self._summary_message(summary)) if summary else 0
+        while True:
+            kept, dropped = self.split(messages, reserve + summary_tokens)
+            new_summary = self._cap_summary(self.summarize(summary, dropped)) if dropped else summary
+            needed = message_tokens(self._summary_message(new_summary)) if new_summary else 0
+            if needed <= summary_tokens:
+                break
+            summary_tokens = needed
+        if not new_summary:
+            return kept
+        return [kept[0], self._summary_message(new_summary), *kept[1:]]
+
+# --- 4. PROCESS-WIDE MANAGER ---
+
+_HISTORY: Optional[HistoryManager] = None
+
+def get_history_manager() -> HistoryManager:
+    global _HISTORY
+    if _HISTORY is None:
+        _HISTORY = HistoryManager()
+    return _HISTORY
@@ -1,11 +1,20 @@
 # D:\cognito_ai_assistant\ai_core\human_in_the_loop.py
 
-from langgraph.types import Interrupt, Command
-from typing import Literal
+from langgraph.types import interrupt, Command
+from langchain_core.messages import AIMessage
+from typing import Any, Literal, Optional
+import os
+
+from .checkpointer import thread_config
+from .graph import AgentState
 
 # List of tools that require human sign-off
 CRITICAL_TOOLS = ["code_executor", "send_email", "delete_database_record"]
 
+# Answers at or above this risk_score (causal_risk_assessor) wait for a human before delivery
+APPROVAL_RISK_THRESHOLD = float(os.getenv("COGNITO_APPROVAL_RISK_THRESHOLD", "0.9"))
+WITHHELD_ANSWER = "Human Oversight: This high-risk answer was REJECTED by a reviewer and has been withheld."
+
 def check_approval(state: AgentState) -> Command[Literal["execute_tool", "reject_tool_call", "continue_planning"]]:
     """
     Checks the proposed tool calls. If a critical tool is requested, 
@@ -26,8 +35,9 @@ def check_approval(state: AgentState) -> Command[Literal["execute_tool", "reject
 
     if requires_approval:
         # --- PAUSE EXECUTION AND REQUEST APPROVAL ---
-        # The interrupt function pauses the graph and returns an InterruptionMetadata object
-        # The return value of interrupt() will be the human's input upon resume
+        # interrupt() persists the paused run through the graph's checkpointer (compile the graph
+        # with checkpointer=get_checkpointer()) and ends the invocation, freeing the worker.
+        # On resume_approval() the node re-runs and interrupt() returns the human's input.
         
         tool_call_summary = "\n".join([
             f"- Tool: {call.name}\n  Args: {call.args}" 
@@ -35,20 +45,17 @@ def check_approval(state: AgentState) -> Command[Literal["execute_tool", "reject
         ])
         
         # This payload is what the UI/CLI must present to the human
-        human_decision = Interrupt(
-            payload={
-                "action_type": "Critical Action Approval Required",
-                "tool_calls": tool_call_summary,
-                "risk_reasoning": "This action is irreversible or costly."
-            }
-        )
+        human_decision = interrupt({
+            "action_type": "Critical Action Approval Required",
+            "tool_calls": tool_call_summary,
+            "risk_reasoning": "This action is irreversible or costly."
+        })
         
         # When resumed, the graph will continue from this point.
         # The resume input should be a string like "APPROVE" or "REJECT".
         
         # The decision logic is now dependent on the external human input.
-        # For the script, we assume the input is available on resume.
-        if human_decision.lower() == "approve":
+        if str(human_decision).lower() == "approve":
             return Command(goto="execute_tool") # Continue to the Tool Node
         else:
             return Command(goto="reject_tool_call") # Route to a node that informs the agent of the rejection
@@ -56,6 +63,51 @@ def check_approval(state: AgentState) -> Command[Literal["execute_tool", "reject
     else:
         # Non-critical tool, allow direct execution
         return Command(goto="execute_tool")
+
+def human_approval_gate(state: AgentState) -> dict:
+    """
+    Served-graph approval step: a high-risk answer is paused with interrupt() before it is
+    signed and delivered (graph.py wires this node in only when a checkpointer is given).
+    A rejected answer is replaced (same message id) by WITHHELD_ANSWER.
+    """
+    if state.get("risk_score", 0.0) < APPROVAL_RISK_THRESHOLD:
+        return {}
+
+    answer = state["messages"][-1]
+    human_decision = interrupt({
+        "action_type": "High-Risk Answer Approval Required",
+        "expert": state.get("target_expert"),
+        "risk_score": state.get("risk_score"),
+        "risk_reasoning": state.get("risk_assessment_report", ""),
+        "answer": answer.content,
+    })
+
+    if str(human_decision).lower() == "approve":
+        return {}
+    return {"messages": [AIMessage(content=WITHHELD_ANSWER, id=answer.id)]}
+
+def _first_interrupt(snapshot) -> Optional[Any]:
+    interrupts = [i for task in snapshot.tasks for i in task.interrupts]
+    return interrupts[0].value if interrupts else None
+
+def pending_approval(app, thread_id: str) -> Any:
+    """The interrupt payload a paused thread is waiting on (None if it is not paused)."""
+    return _first_interrupt(app.get_state(thread_config(thread_id)))
+
+async def apending_approval(app, thread_id: str) -> Any:
+    """Async variant of pending_approval (the checkpoint read runs off the event loop)."""
+    return _first_interrupt(await app.aget_state(thread_config(thread_id)))
+
+def resume_approval(app, thread_id: str, decision: str) -> dict:
+    """
+    Resumes a paused run from its persisted checkpoint on any worker (the graph must be
+    compiled with checkpointer=get_checkpointer()). decision is "APPROVE" or "REJECT".
+    """
+    return app.invoke(Command(resume=decision), thread_config(thread_id))
+
+async def aresume_approval(app, thread_id: str, decision: str) -> dict:
+    """Async variant of resume_approval, used by api_server.py."""
+    return await app.ainvoke(Command(resume=decision), thread_config(thread_id))
     # D:\cognito_ai_assistant\ai_core\human_in_the_loop.py
 
 from langchain_core.messages import ToolMessage
@@ -70,4 +122,4 @@ def reject_tool_call(state: AgentState) -> AgentState:
     )
     
     # Add the rejection to the message history
-    return AgentState(messages=state["messages"] + [rejection_message], status="replan_after_rejection")
\ No newline at end of file
+    return AgentState(messages=[rejection_message], status="replan_after_rejection")
\ No newline at end of file
@@ -0,0 +1,184 @@
+# D:\cognito_ai_assistant\ai_core\llm_batching.py
+
+import asyncio
+import os
+import re
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .llm_registry import LLM_MAX_RETRIES, LLM_TIMEOUT, get_llm
+
+# --- 1. CONFIGURATION ---
+
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "10"))  # gather window, 5-20 ms is typical
+LLM_MAX_BATCH_SIZE = int(os.getenv("LLM_MAX_BATCH_SIZE", "16"))  # a full batch is sent without waiting
+# How long a caller waits for its batch (every attempt of the underlying request, by default)
+LLM_BATCH_TIMEOUT = float(os.getenv("LLM_BATCH_TIMEOUT", str(LLM_TIMEOUT * (LLM_MAX_RETRIES + 1))))
+
+# --- 2. MICRO-BATCHER ---
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prompts for one model. The first prompt of a batch opens a
+    window_ms window; everything that arrives meanwhile (up to max_batch) goes out as one
+    model.batch() call and each caller gets its own result back. Identical prompts already
+    pending or in flight share a single call (single-flight), but every caller holds its own
+    future, so one cancelled caller (asyncio.wait_for, client disconnect) never affects the rest.
+    Usable from sync nodes (invoke blocks the worker thread) and async nodes (ainvoke); both
+    give up after timeout seconds, so a stuck batch cannot hang its callers.
+    """
+
+    def __init__(self, model: Any, window_ms: float = LLM_BATCH_WINDOW_MS, max_batch: int = LLM_MAX_BATCH_SIZE,
+                 timeout: float = LLM_BATCH_TIMEOUT):
+        self.model = model
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._pending: List[Tuple[str, Any]] = []  # (key, prompt) to send in the next batch
+        self._waiters: Dict[str, List[Future]] = {}  # key -> caller futures, pending or in flight
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.prompts_sent = 0
+
+    @staticmethod
+    def _key(prompt: Any) -> str:
+        return prompt if isinstance(prompt, str) else repr(prompt)
+
+    def submit(self, prompt: Any) -> Future:
+        """Queues a prompt and returns a future for the model's output."""
+        key = self._key(prompt)
+        future: Future = Future()
+        batch = None
+        with self._lock:
+            self.submitted += 1
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                self.coalesced += 1
+                waiters.append(future)
+                return future
+
+            self._waiters[key] = [future]
+            self._pending.append((key, prompt))
+
+            if len(self._pending) >= self.max_batch:
+                batch = self._take_batch()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if batch:
+            # Full batch: send from a fresh thread so the submitting caller is not delayed
+            threading.Thread(target=self._send, args=(batch,), name="llm-batch", daemon=True).start()
+        return future
+
+    def invoke(self, prompt: Any, timeout: Optional[float] = None) -> Any:
+        future = self.submit(prompt)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()  # batch-mates sharing the call keep their own futures
+            raise
+
+    async def ainvoke(self, prompt: Any, timeout: Optional[float] = None) -> Any:
+        # wait_for cancels the wrapper on timeout, which cancels the caller's future
+        return await asyncio.wait_for(asyncio.wrap_future(self.submit(prompt)),
+                                      self.timeout if timeout is None else timeout)
+
+    def _take_batch(self) -> List[Tuple[str, Any]]:
+        # Caller holds the lock
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self) -> None:
+        with self._lock:
+            batch = self._take_batch()
+        if batch:
+            self._send(batch)
+
+    def _send(self, batch: List[Tuple[str, Any]]) -> None:
+        prompts = [prompt for _, prompt in batch]
+        with self._lock:
+            self.batches += 1
+            self.prompts_sent += len(prompts)
+        try:
+            # return_exceptions keeps one bad prompt from failing its batch-mates; the whole batch
+            # runs concurrently (the shared HTTP pool still caps in-flight requests per provider)
+            results = self.model.batch(prompts, config={"max_concurrency": len(prompts)}, return_exceptions=True)
+        except Exception as e:
+            results = [e] * len(prompts)
+        for (key, _), result in zip(batch, results):
+            with self._lock:
+                waiters = self._waiters.pop(key, [])
+            for future in waiters:
+                # False if the caller cancelled meanwhile; running futures can no longer be cancelled
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "batches": self.batches,
+                "prompts_sent": self.prompts_sent,
+                "mean_batch_size": round(self.prompts_sent / self.batches, 2) if self.batches else 0.0,
+            }
+
+# --- 3. PROCESS-WIDE DISPATCHERS ---
+
+_BATCHERS: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], MicroBatcher] = {}
+_BATCHERS_LOCK = threading.Lock()
+
+def get_batcher(tier: str, **overrides: Any) -> MicroBatcher:
+    """One shared MicroBatcher per registry model, so all requests in the worker coalesce."""
+    key = (tier, tuple(sorted(overrides.items())))
+    with _BATCHERS_LOCK:
+        if key not in _BATCHERS:
+            _BATCHERS[key] = MicroBatcher(get_llm(tier, **overrides))
+        return _BATCHERS[key]
+
+def reset_batchers() -> None:
+    """Drops the shared batchers (e.g. after set_llm_registry in tests)."""
+    with _BATCHERS_LOCK:
+        _BATCHERS.clear()
+
+class BatchedLLM:
+    """Module-level handle with the LLM's invoke/ainvoke interface, resolved and batched on first use."""
+
+    def __init__(self, tier: str, **overrides: Any):
+        self._tier = tier
+        self._overrides = overrides
+
+    def invoke(self, prompt: Any) -> Any:
+        return get_batcher(self._tier, **self._overrides).invoke(prompt)
+
+    async def ainvoke(self, prompt: Any) -> Any:
+        return await get_batcher(self._tier, **self._overrides).ainvoke(prompt)
+
+def batched_llm(tier: str, **overrides: Any) -> BatchedLLM:
+    return BatchedLLM(tier, **overrides)
+
+_LEADING_TOKEN = re.compile(r"\W*(\w+)")
+
+def parse_choice(output: Any, options: Sequence[str]) -> Optional[str]:
+    """
+    The option a classifier reply starts with (case-insensitive, leading markup ignored), or
+    None. Only the leading token counts: "I cannot APPROVE this" names no option.
+    """
+    match = _LEADING_TOKEN.match(str(getattr(output, "content", output)))
+    if match is None:
+        return None
+    token = match.group(1).lower()
+    return next((option for option in options if option.lower() == token), None)
@@ -0,0 +1,266 @@
+# D:\cognito_ai_assistant\ai_core\llm_registry.py
+
+import asyncio
+import atexit
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+# --- 1. CONFIGURATION ---
+
+# Model tiers, cheapest to most capable. Modules ask for a tier, never construct clients themselves.
+MODERATOR = "MODERATOR"  # low-cost/fast classification
+EXECUTION = "EXECUTION"  # speed/balance for primary execution
+JUDGE = "JUDGE"          # high-capability evaluation (highest cost)
+PLANNER = "PLANNER"      # non-OpenAI model for diversity/redundancy
+
+TIERS: Dict[str, Dict[str, Any]] = {
+    MODERATOR: {"provider": "openai", "model": os.getenv("LLM_MODERATOR_MODEL", "gpt-3.5-turbo-0125"), "temperature": 0.0},
+    EXECUTION: {"provider": "openai", "model": os.getenv("LLM_EXECUTION_MODEL", "gpt-4o-mini"), "temperature": 0.2},
+    JUDGE: {"provider": "openai", "model": os.getenv("LLM_JUDGE_MODEL", "gpt-4-turbo"), "temperature": 0.0},
+    PLANNER: {"provider": "anthropic", "model": os.getenv("LLM_PLANNER_MODEL", "claude-3-haiku-20240307"), "temperature": 0.1},
+}
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "live")  # 'live' or 'fake' (local, no network)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))  # in-flight requests per provider
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "16"))  # idle keep-alive connections kept per provider
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))  # seconds
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))  # seconds per request (read/write)
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_POOL_TIMEOUT = float(os.getenv("LLM_POOL_TIMEOUT", "30"))  # wait for a free connection at the concurrency cap
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# --- 2. FAKE BACKEND ---
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic local chat model for tests and benchmarks. Cycles through `responses`
+    (or echoes the last message), sleeps `latency` seconds per call and counts calls
+    (one per prompt) and batches (one per batch()/abatch() request).
+    """
+
+    tier: str = EXECUTION
+    model_name: str = "fake"
+    responses: List[str] = []
+    latency: float = 0.0
+    _calls: int = PrivateAttr(default=0)
+    _batches: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "cognito-fake"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    @property
+    def batches(self) -> int:
+        return self._batches
+
+    def batch(self, inputs: List[Any], config: Any = None, **kwargs: Any) -> List[Any]:
+        with self._lock:
+            self._batches += 1
+        return super().batch(inputs, config, **kwargs)
+
+    async def abatch(self, inputs: List[Any], config: Any = None, **kwargs: Any) -> List[Any]:
+        with self._lock:
+            self._batches += 1
+        return await super().abatch(inputs, config, **kwargs)
+
+    def _next_message(self, messages: List[BaseMessage]) -> ChatResult:
+        with self._lock:
+            self._calls += 1
+            index = self._calls - 1
+        if self.responses:
+            content = self.responses[index % len(self.responses)]
+        else:
+            content = f"[{self.tier}:{self.model_name}] {messages[-1].content if messages else ''}"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._next_message(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._next_message(messages)
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        # Tool schemas are irrelevant to canned responses
+        return self
+
+# --- 3. REGISTRY ---
+
+class LoopLocalAsyncClient(httpx.AsyncClient):
+    """
+    httpx.AsyncClient whose connection pool is per event loop. Pooled connections belong to
+    the loop that opened them, so a single async pool breaks once a second loop uses it (the
+    API server's loop, asyncio.run() in scripts and views, the speculative engine's loop
+    thread). send() runs on a pool owned by the running loop (limits apply per loop), and a
+    loop's pool is dropped when the loop is garbage-collected.
+    """
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._client_kwargs = kwargs
+        self._loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = \
+            weakref.WeakKeyDictionary()
+        self._loop_clients_lock = threading.Lock()
+
+    def _loop_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._loop_clients_lock:
+            client = self._loop_clients.get(loop)
+            if client is None or client.is_closed:
+                client = self._loop_clients[loop] = httpx.AsyncClient(**self._client_kwargs)
+            return client
+
+    async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        return await self._loop_client().send(request, **kwargs)
+
+    async def aclose(self) -> None:
+        """Closes the running loop's pool (other loops' pools close with their loop)."""
+        with self._loop_clients_lock:
+            client = self._loop_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+class LLMRegistry:
+    """
+    Hands out one chat model per (tier, overrides), built on first use. All models of a
+    provider share one keep-alive httpx pool, whose max_connections is the provider-wide
+    concurrency cap: requests beyond it wait up to pool_timeout. The async side keeps one
+    such pool per event loop (see LoopLocalAsyncClient).
+    """
+
+    def __init__(self, backend: str = LLM_BACKEND, tiers: Optional[Dict[str, Dict[str, Any]]] = None,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, pool_size: int = LLM_POOL_SIZE,
+                 timeout: float = LLM_TIMEOUT, max_retries: int = LLM_MAX_RETRIES):
+        self.backend = backend
+        self.tiers = dict(TIERS if tiers is None else tiers)
+        self.limits = httpx.Limits(max_connections=max_concurrency,
+                                   max_keepalive_connections=min(pool_size, max_concurrency),
+                                   keepalive_expiry=LLM_KEEPALIVE_EXPIRY)
+        self.timeout = httpx.Timeout(timeout, connect=LLM_CONNECT_TIMEOUT, pool=LLM_POOL_TIMEOUT)
+        self.max_retries = max_retries
+        self._models: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], BaseChatModel] = {}
+        self._pools: Dict[str, Tuple[httpx.Client, httpx.AsyncClient]] = {}
+        self._lock = threading.Lock()
+
+    def http_clients(self, provider: str) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        """The provider's shared (sync, async) keep-alive clients."""
+        with self._lock:
+            if provider not in self._pools:
+                self._pools[provider] = (
+                    httpx.Client(limits=self.limits, timeout=self.timeout),
+                    LoopLocalAsyncClient(limits=self.limits, timeout=self.timeout),
+                )
+            return self._pools[provider]
+
+    def get(self, tier: str, **overrides: Any) -> BaseChatModel:
+        """Returns the model for `tier`; overrides (model, temperature...) select a variant."""
+        if tier not in self.tiers:
+            raise ValueError(f"Unknown LLM tier '{tier}'. Expected one of {sorted(self.tiers)}.")
+        key = (tier, tuple(sorted(overrides.items())))
+        model = self._models.get(key)
+        if model is None:
+            spec = {**self.tiers[tier], **overrides}
+            built = self._build(tier, spec)
+            with self._lock:
+                model = self._models.setdefault(key, built)
+        return model
+
+    def _build(self, tier: str, spec: Dict[str, Any]) -> BaseChatModel:
+        spec = dict(spec)
+        provider = spec.pop("provider")
+        model_name = spec.pop("model")
+
+        if self.backend == "fake":
+            return FakeChatModel(tier=tier, model_name=model_name)
+
+        # API keys may live in .env: read it when the first live client is built, not at import
+        from dotenv import load_dotenv
+        load_dotenv()
+
+        if provider == "openai":
+            from langchain_openai import ChatOpenAI
+            http_client, http_async_client = self.http_clients(provider)
+            return ChatOpenAI(model=model_name, http_client=http_client, http_async_client=http_async_client,
+                              max_retries=self.max_retries, **spec)
+        if provider == "anthropic":
+            # langchain_anthropic does not accept an injected httpx client; it keeps its own pool
+            from langchain_anthropic import ChatAnthropic
+            return ChatAnthropic(model=model_name, default_request_timeout=self.timeout.read,
+                                 max_retries=self.max_retries, **spec)
+        raise ValueError(f"Unsupported LLM provider '{provider}'.")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "models": [f"{tier}{dict(overrides) or ''}" for tier, overrides in self._models],
+            "pooled_providers": sorted(self._pools),
+            "max_concurrency": self.limits.max_connections,
+            "pool_size": self.limits.max_keepalive_connections,
+        }
+
+    def close(self) -> None:
+        """Closes the shared sync pools (registered with atexit); async pools close with their loop."""
+        with self._lock:
+            for sync_client, _ in self._pools.values():
+                sync_client.close()
+            self._pools.clear()
+            self._models.clear()
+
+# --- 4. PROCESS-WIDE REGISTRY ---
+
+_REGISTRY: Optional[LLMRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+def get_llm_registry() -> LLMRegistry:
+    """Returns the shared registry (no clients are built until a model is requested)."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = LLMRegistry()
+                atexit.register(_REGISTRY.close)
+    return _REGISTRY
+
+def set_llm_registry(registry: LLMRegistry) -> LLMRegistry:
+    """Swaps the shared registry, e.g. LLMRegistry(backend='fake') in tests."""
+    global _REGISTRY
+    _REGISTRY = registry
+    return _REGISTRY
+
+def get_llm(tier: str, **overrides: Any) -> BaseChatModel:
+    return get_llm_registry().get(tier, **overrides)
+
+class LazyLLM:
+    """Module-level stand-in for a model: resolves through the registry on first attribute access."""
+
+    def __init__(self, tier: str, **overrides: Any):
+        self._tier = tier
+        self._overrides = overrides
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_llm(self._tier, **self._overrides), name)
+
+    def __repr__(self) -> str:
+        return f"LazyLLM({self._tier!r}, {self._overrides!r})"
+
+def lazy_llm(tier: str, **overrides: Any) -> LazyLLM:
+    return LazyLLM(tier, **overrides)
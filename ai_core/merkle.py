@@ -0,0 +1,51 @@
+# D:\cognito_ai_assistant\ai_core\merkle.py
+
+import hashlib
+from typing import List, Tuple
+
+# Domain-separated SHA-256 Merkle tree (RFC 6962 style): leaves and interior nodes use
+# different prefixes, so a leaf can never be passed off as a subtree. A node without a
+# sibling is promoted unchanged to the next level.
+# Hashes are hex strings throughout.
+
+EMPTY_ROOT = hashlib.sha256(b"").hexdigest()
+LEFT, RIGHT = "L", "R"
+
+def leaf_hash(data: str) -> str:
+    return hashlib.sha256(b"\x00" + data.encode("utf-8")).hexdigest()
+
+def node_hash(left: str, right: str) -> str:
+    return hashlib.sha256(b"\x01" + left.encode("ascii") + right.encode("ascii")).hexdigest()
+
+def build_levels(leaves: List[str]) -> List[List[str]]:
+    """All tree levels, from the hashed leaves up to [root]."""
+    if not leaves:
+        return [[EMPTY_ROOT]]
+    levels = [[leaf_hash(leaf) for leaf in leaves]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+def merkle_root(leaves: List[str]) -> str:
+    return build_levels(leaves)[-1][0]
+
+def inclusion_proof(levels: List[List[str]], index: int) -> List[Tuple[str, str]]:
+    """Sibling hashes from leaf `index` up to the root, each tagged with the side it sits on."""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append((LEFT if sibling < index else RIGHT, level[sibling]))
+        index //= 2
+    return proof
+
+def root_from_proof(leaf: str, proof: List[Tuple[str, str]]) -> str:
+    """Folds an inclusion proof over the leaf data; equals the root iff the leaf is in the tree."""
+    current = leaf_hash(leaf)
+    for side, sibling in proof:
+        current = node_hash(sibling, current) if side == LEFT else node_hash(current, sibling)
+    return current
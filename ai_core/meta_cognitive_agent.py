@@ -1,9 +1,10 @@
 # D:\cognito_ai_assistant\ai_core\meta_cognitive_agent.py
 
 from langchain_core.prompts import ChatPromptTemplate
+from .llm_registry import JUDGE, lazy_llm
 
 # Use a highly reflective LLM for this task
-REVISER_LLM = ChatOpenAI(model="gpt-4-turbo", temperature=0.1) 
+REVISER_LLM = lazy_llm(JUDGE, temperature=0.1) 
 
 def revise_meta_prompt(state: AgentState) -> AgentState:
     """
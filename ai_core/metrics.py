@@ -0,0 +1,229 @@
+# D:\cognito_ai_assistant\ai_core\metrics.py
+
+import asyncio
+import functools
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+# --- 1. CONFIGURATION ---
+
+# Prometheus-style cumulative buckets (seconds), from in-process mocks up to slow LLM calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+REVISION_BUCKETS = (0, 1, 2, 3, 5, 8)
+RESERVOIR_SIZE = 1024  # recent samples kept per series for p50/p95/p99
+QUANTILE_REFRESH_SAMPLES = 64  # the sorted reservoir is rebuilt after at most this many new samples
+
+# HELP text for the flat counters (METRICS.inc and the /metrics extras)
+COUNTER_HELP = {
+    "cognito_audit_entries_total": "Audit log entries by outcome (written/retried/rejected).",
+    "cognito_cascade_escalations_total": "Model cascade escalations to a stronger tier.",
+    "cognito_cascade_requests_total": "Requests routed through the model cascade.",
+    "cognito_latency_budget_exceeded_total": "Requests whose projected p95 latency exceeded the budget.",
+    "cognito_llm_tokens_total": "Tokens produced by expert LLM calls.",
+    "cognito_plan_cache_lookups_total": "Plan cache lookups by outcome.",
+    "cognito_response_cache_hits_total": "Response cache hits by kind (exact/semantic).",
+    "cognito_response_cache_misses_total": "Response cache misses.",
+    "cognito_signatures_total": "DID signatures computed, by signing mode.",
+    "cognito_signed_responses_total": "Responses covered by a signature, by signing mode.",
+    "cognito_speculative_tasks_total": "Speculative tasks by outcome.",
+    "cognito_step_memo_lookups_total": "Step-result memo lookups by outcome.",
+}
+
+EXPERT_NODES = frozenset(["finance_expert", "legal_expert", "fitness_expert", "business_expert", "health_expert", "general_qa"])
+
+# --- 2. HISTOGRAM ---
+
+class LatencyHistogram:
+    """
+    Cumulative bucket counts for exposition plus a sliding window of samples for quantiles.
+    Quantiles read a sorted copy of the window that is rebuilt only every few observations
+    (QUANTILE_REFRESH_SAMPLES, sooner while the window is small), not sorted per call.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self._recent: Deque[float] = deque(maxlen=RESERVOIR_SIZE)
+        self._sorted: List[float] = []
+        self._sorted_at = 0  # self.count when _sorted was built
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self._recent.append(seconds)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._recent:
+            return None
+        if self.count - self._sorted_at >= min(QUANTILE_REFRESH_SAMPLES, max(1, len(self._sorted))):
+            self._sorted = sorted(self._recent)
+            self._sorted_at = self.count
+        ordered = self._sorted
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+# --- 3. REGISTRY ---
+
+class MetricsRegistry:
+    """Process-wide latency/counter store read by cognitive_latency_check and rendered on /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.node_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.expert_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.request_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.revision_loops: Dict[str, int] = defaultdict(int)
+        self.revision_loop_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.revisions_per_request: Dict[str, LatencyHistogram] = defaultdict(lambda: LatencyHistogram(REVISION_BUCKETS))
+        self.revision_budget_exhausted: Dict[str, int] = defaultdict(int)
+        self.cascade_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+
+    def observe_node(self, node: str, seconds: float, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self.node_latency[node].observe(seconds)
+            if node in EXPERT_NODES:
+                self.expert_latency[node].observe(seconds)
+                # An expert that runs after a failed critique is a critique -> expert revision loop
+                critique = state.get("critique_report") or ""
+                if critique and "PERFECT" not in critique.upper():
+                    self.revision_loops[node] += 1
+
+    def observe_request(self, expert: Optional[str], seconds: float) -> None:
+        with self._lock:
+            self.request_latency[expert or "unknown"].observe(seconds)
+
+    def observe_revision_loop(self, expert: str, seconds: float, revisions: int, exhausted: bool) -> None:
+        """Records how long the expert -> critique loop ran and how many revisions it took."""
+        with self._lock:
+            self.revision_loop_latency[expert].observe(seconds)
+            self.revisions_per_request[expert].observe(revisions)
+            if exhausted:
+                self.revision_budget_exhausted[expert] += 1
+
+    def observe_cascade_attempt(self, expert: str, tier: str, seconds: float) -> None:
+        with self._lock:
+            self.cascade_latency[f"{expert}:{tier}"].observe(seconds)
+
+    def escalation_rates(self) -> Dict[str, float]:
+        """Cascade escalations / cascade-routed requests, per expert."""
+        with self._lock:
+            requests = {dict(labels)["expert"]: value for (name, labels), value in self.counters.items()
+                        if name == "cognito_cascade_requests_total"}
+            escalations = {dict(labels)["expert"]: value for (name, labels), value in self.counters.items()
+                           if name == "cognito_cascade_escalations_total"}
+        return {expert: round(escalations.get(expert, 0.0) / total, 4) for expert, total in requests.items() if total}
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        with self._lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def node_quantile(self, node: str, q: float) -> Optional[float]:
+        with self._lock:
+            histogram = self.node_latency.get(node)
+            return histogram.quantile(q) if histogram else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly view (count, mean, p50/p95/p99 in ms) per node and per expert."""
+        def summarize(series: Dict[str, LatencyHistogram]) -> Dict[str, Any]:
+            out = {}
+            for key, h in series.items():
+                out[key] = {"count": h.count, "mean_ms": round(h.total / h.count * 1000, 3) if h.count else None}
+                for q in QUANTILES:
+                    value = h.quantile(q)
+                    out[key][f"p{int(q * 100)}_ms"] = round(value * 1000, 3) if value is not None else None
+            return out
+        escalation_rates = self.escalation_rates()
+        with self._lock:
+            return {
+                "cascade": {"attempts": summarize(self.cascade_latency), "escalation_rate": escalation_rates},
+                "nodes": summarize(self.node_latency),
+                "experts": summarize(self.expert_latency),
+                "requests": summarize(self.request_latency),
+                "revision_loops": dict(self.revision_loops),
+                "revision_loop": summarize(self.revision_loop_latency),
+                "revision_budget_exhausted": dict(self.revision_budget_exhausted),
+            }
+
+    def render_prometheus(self, extra_counters: Iterable[Tuple[str, Dict[str, str], float]] = ()) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+
+        def histogram(name: str, help_text: str, label: str, series: Dict[str, LatencyHistogram]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, h in sorted(series.items()):
+                for bound, count in zip(h.buckets, h.bucket_counts):
+                    lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{label}="{key}",le="+Inf"}} {h.count}')
+                lines.append(f'{name}_sum{{{label}="{key}"}} {h.total:.6f}')
+                lines.append(f'{name}_count{{{label}="{key}"}} {h.count}')
+            lines.append(f"# HELP {name}_quantile {help_text} (p50/p95/p99 over recent samples)")
+            lines.append(f"# TYPE {name}_quantile gauge")
+            for key, h in sorted(series.items()):
+                for q in QUANTILES:
+                    value = h.quantile(q)
+                    if value is not None:
+                        lines.append(f'{name}_quantile{{{label}="{key}",quantile="{q}"}} {value:.6f}')
+
+        with self._lock:
+            histogram("cognito_node_latency_seconds", "Wall time per graph node.", "node", self.node_latency)
+            histogram("cognito_expert_latency_seconds", "Wall time per domain expert invocation.", "expert", self.expert_latency)
+            histogram("cognito_request_latency_seconds", "End-to-end /query latency by routed expert.", "expert", self.request_latency)
+            histogram("cognito_revision_loop_seconds", "Wall time from the first expert pass to the accepted answer.", "expert", self.revision_loop_latency)
+            histogram("cognito_cascade_attempt_seconds", "Expert attempt latency per expert:tier in the model cascade.", "route", self.cascade_latency)
+            histogram("cognito_revisions_per_request", "Critique-requested revisions per request.", "expert", self.revisions_per_request)
+
+            lines.append("# HELP cognito_revision_loops_total Critique -> expert revision loops.")
+            lines.append("# TYPE cognito_revision_loops_total counter")
+            for expert, count in sorted(self.revision_loops.items()):
+                lines.append(f'cognito_revision_loops_total{{expert="{expert}"}} {count}')
+            lines.append("# HELP cognito_revision_budget_exhausted_total Requests that hit the revision budget and shipped the best answer so far.")
+            lines.append("# TYPE cognito_revision_budget_exhausted_total counter")
+            for expert, count in sorted(self.revision_budget_exhausted.items()):
+                lines.append(f'cognito_revision_budget_exhausted_total{{expert="{expert}"}} {count}')
+
+            counters = [(name, dict(labels), value) for (name, labels), value in self.counters.items()]
+
+        previous = None
+        for name, labels, value in sorted(counters + list(extra_counters), key=lambda c: c[0]):
+            if name != previous:
+                lines.append(f"# HELP {name} {COUNTER_HELP.get(name, name.replace('_', ' '))}")
+                lines.append(f"# TYPE {name} counter")
+                previous = name
+            rendered = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+            lines.append(f"{name}{{{rendered}}} {value}" if rendered else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+METRICS = MetricsRegistry()
+
+# --- 4. NODE INSTRUMENTATION ---
+
+def timed_node(name: str, func: Callable, registry: MetricsRegistry = METRICS) -> Callable:
+    """Wraps a sync or async node so every call records its wall time under the node's name."""
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(state: Dict[str, Any], *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(state, *args, **kwargs)
+            finally:
+                registry.observe_node(name, time.perf_counter() - start, state)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(state: Dict[str, Any], *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(state, *args, **kwargs)
+        finally:
+            registry.observe_node(name, time.perf_counter() - start, state)
+    return wrapper
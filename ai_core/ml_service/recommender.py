@@ -1,54 +1,182 @@
 # D:\cognito_ai_assistant\ai_core\ml_service\recommender.py
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
-from pathlib import Path
 
 # Define the base path for relative file finding
 BASE_DIR = Path(__file__).resolve().parent
+DATA_PATH = BASE_DIR / 'tasks.csv'
 
-def train_and_recommend(task_description: str, top_n: int = 5):
+# On-disk index: the fitted vectorizer + task records (joblib) and the CSR arrays (.npy, memory-mapped)
+INDEX_DIR = BASE_DIR / 'tfidf_index'
+RECORD_FIELDS = ['title', 'description', 'category']
+
+# Max queries scored per sparse multiply in recommend_many (bounds the dense score block)
+QUERY_CHUNK_SIZE = 1024
+
+
+class TaskRecommender:
     """
-    Simple Content-Based Recommender.
-    Uses TF-IDF on task descriptions to find similar tasks.
+    Content-Based Recommender backed by a persistent TF-IDF index.
+    The index is fitted once, saved next to the CSV, memory-mapped back on load,
+    and rebuilt automatically whenever the CSV modification time changes.
     """
-    try:
+
+    def __init__(self, data_path: Path = DATA_PATH, index_dir: Path = INDEX_DIR):
+        self.data_path = Path(data_path)
+        self.index_dir = Path(index_dir)
+        self._lock = threading.Lock()
+        self._vectorizer: Optional[TfidfVectorizer] = None
+        self._matrix: Optional[sparse.csr_matrix] = None
+        self._records: List[Dict[str, Any]] = []
+        self._source_mtime: Optional[int] = None
+
+    # --- 1. INDEX LIFECYCLE ---
+
+    def _current_mtime(self) -> int:
+        return os.stat(self.data_path).st_mtime_ns
+
+    def fit(self) -> None:
+        """Reads the CSV, fits the vectorizer and persists the index to disk."""
         # 1. Data Ingestion (Local ETL - will be replaced by AWS Lambda/RDS)
-        data_path = BASE_DIR / 'tasks.csv'
-        tasks_df = pd.read_csv(data_path)
-    except Exception as e:
-        print(f"Error loading data: {e}")
-        return []
+        source_mtime = self._current_mtime()
+        tasks_df = pd.read_csv(self.data_path)
+
+        # Combine title and description for better features
+        features = tasks_df['title'] + " " + tasks_df['description']
+
+        # 2. Model Training (Vectorization)
+        # TF-IDF rows are L2-normalised, so a dot product is the cosine similarity
+        vectorizer = TfidfVectorizer(stop_words='english')
+        matrix = vectorizer.fit_transform(features).tocsr()
+        records = tasks_df[RECORD_FIELDS].to_dict('records')
+
+        # 3. Persist (write to a temp name and swap in, so readers never see a half-written index)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        for name in ('data', 'indices', 'indptr'):
+            tmp_path = self.index_dir / f'{name}.tmp.npy'
+            np.save(tmp_path, getattr(matrix, name))
+            os.replace(tmp_path, self.index_dir / f'{name}.npy')
+        meta = {
+            'vectorizer': vectorizer,
+            'records': records,
+            'shape': matrix.shape,
+            'source_mtime': source_mtime,
+        }
+        tmp_meta = self.index_dir / 'meta.tmp.joblib'
+        joblib.dump(meta, tmp_meta)
+        os.replace(tmp_meta, self.index_dir / 'meta.joblib')
+
+        self._vectorizer, self._matrix, self._records = vectorizer, matrix, records
+        self._source_mtime = source_mtime
+        print(f"📚 [RECOMMENDER] TF-IDF index built for {matrix.shape[0]} tasks.")
+
+    def load(self) -> bool:
+        """Memory-maps a previously saved index. Returns False if it is missing or stale."""
+        meta_path = self.index_dir / 'meta.joblib'
+        if not meta_path.exists():
+            return False
+        try:
+            meta = joblib.load(meta_path)
+            if meta['source_mtime'] != self._current_mtime():
+                return False
+            arrays = [np.load(self.index_dir / f'{name}.npy', mmap_mode='r') for name in ('data', 'indices', 'indptr')]
+            matrix = sparse.csr_matrix(tuple(arrays), shape=meta['shape'], copy=False)
+        except Exception as e:
+            print(f"Error loading TF-IDF index, rebuilding: {e}")
+            return False
 
-    # Combine title and description for better features
-    tasks_df['features'] = tasks_df['title'] + " " + tasks_df['description']
+        self._vectorizer, self._matrix, self._records = meta['vectorizer'], matrix, meta['records']
+        self._source_mtime = meta['source_mtime']
+        return True
 
-    # 2. Model Training (Vectorization)
-    # TF-IDF: Transforms text into a matrix of token counts
-    tfidf = TfidfVectorizer(stop_words='english')
-    tfidf_matrix = tfidf.fit_transform(tasks_df['features'])
+    def ensure_ready(self) -> None:
+        """Loads (or rebuilds) the index if it is not in memory or the CSV has changed."""
+        if self._matrix is not None and self._source_mtime == self._current_mtime():
+            return
+        with self._lock:
+            if self._matrix is not None and self._source_mtime == self._current_mtime():
+                return
+            if not self.load():
+                self.fit()
 
-    # 3. Model Prediction (Similarity Calculation)
-    # Linear Kernel: Computes the cosine similarity between all tasks
-    cosine_sim = linear_kernel(tfidf_matrix, tfidf_matrix)
+    # --- 2. QUERYING ---
 
-    # --- Recommendation Logic for the INPUT task ---
+    def recommend(self, task_description: str, top_n: int = 5) -> List[Dict[str, Any]]:
+        """Returns the top_n most similar tasks for a single description."""
+        return self.recommend_many([task_description], top_n)[0]
 
-    # Vectorize the input task description
-    input_vector = tfidf.transform([task_description])
+    def recommend_many(self, task_descriptions: List[str], top_n: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Batched top-k: all queries are vectorized into one sparse matrix and scored with a
+        single sparse-matrix multiply per chunk, then ranked row-wise with vectorized NumPy.
+        """
+        self.ensure_ready()
+        if top_n <= 0 or not self._records:
+            return [[] for _ in task_descriptions]
 
-    # Calculate similarity between the input and all existing tasks
-    input_sim_scores = linear_kernel(input_vector, tfidf_matrix).flatten()
+        top_n = min(top_n, len(self._records))
+        results: List[List[Dict[str, Any]]] = []
 
-    # Get the indices of the most similar tasks
-    # np.argsort returns the indices that would sort an array
-    sim_indices = input_sim_scores.argsort()[:-top_n-1:-1]
+        # Chunking bounds the dense (queries x tasks) score block for large batches
+        for start in range(0, len(task_descriptions), QUERY_CHUNK_SIZE):
+            chunk = task_descriptions[start:start + QUERY_CHUNK_SIZE]
+            query_matrix = self._vectorizer.transform(chunk)
+            # index @ queries.T reads the (memory-mapped) index CSR as stored; query @ index.T
+            # would build a full transposed copy of the index on every call
+            scores = (self._matrix @ query_matrix.T).T.toarray()
 
-    # Get the titles of the top recommendations
-    recommendations = tasks_df.iloc[sim_indices][['title', 'description', 'category']].to_dict('records')
+            # argpartition selects each row's top_n in O(N); only those top_n are then sorted
+            candidates = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+            candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+            order = np.argsort(-candidate_scores, axis=1, kind='stable')
+            sim_indices = np.take_along_axis(candidates, order, axis=1)
+
+            results.extend([dict(self._records[i]) for i in row] for row in sim_indices)
+
+        return results
+
+
+# Process-wide instance: the index is loaded once and shared by every caller
+_RECOMMENDER: Optional[TaskRecommender] = None
+
+
+def get_recommender() -> TaskRecommender:
+    """Returns the shared TaskRecommender, creating it on first use."""
+    global _RECOMMENDER
+    if _RECOMMENDER is None:
+        _RECOMMENDER = TaskRecommender()
+    return _RECOMMENDER
+
+
+def train_and_recommend(task_description: str, top_n: int = 5):
+    """
+    Simple Content-Based Recommender.
+    Uses TF-IDF on task descriptions to find similar tasks.
+    Kept for existing callers; the index is now fitted once and reused.
+    """
+    try:
+        return get_recommender().recommend(task_description, top_n)
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        return []
+
+
+def recommend_many(task_descriptions: List[str], top_n: int = 5) -> List[List[Dict[str, Any]]]:
+    """Batched entry point: one list of recommendations per input description."""
+    try:
+        return get_recommender().recommend_many(list(task_descriptions), top_n)
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        return [[] for _ in task_descriptions]
 
-    # Filter out the initial task itself if it was in the dataset (not applicable here, but good practice)
-    return recommendations
 
 # Simple test run (you can run this directly in PowerShell after training is complete)
 if __name__ == '__main__':
@@ -56,4 +184,4 @@ if __name__ == '__main__':
     recs = train_and_recommend(test_query)
     print(f"Recommendations for '{test_query}':")
     for rec in recs:
-        print(f"- {rec['title']} ({rec['category']}): {rec['description']}")
\ No newline at end of file
+        print(f"- {rec['title']} ({rec['category']}): {rec['description']}")
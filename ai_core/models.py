@@ -3,18 +3,20 @@ from django.db import models
 # Create your models here.
 # D:\cognito_ai_assistant\ai_core\models.py (New File for Model Definitions)
 
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
+# The tiers are defined in llm_registry.TIERS and share one pooled client per provider:
+# TIER 1 MODERATOR (low-cost/fast classification), TIER 2 EXECUTION (speed/balance),
+# TIER 3 JUDGE (high-capability evaluation), PLANNER (non-OpenAI, for diversity/redundancy).
+from .llm_registry import MODERATOR, EXECUTION, JUDGE, PLANNER, get_llm
 
-# TIER 1: Low-Cost/Fast for simple classification
-MODERATOR_LLM = ChatOpenAI(model="gpt-3.5-turbo-0125", temperature=0.0)
+_TIER_ATTRIBUTES = {
+    "MODERATOR_LLM": MODERATOR,
+    "EXECUTION_LLM": EXECUTION,
+    "JUDGE_LLM": JUDGE,
+    "PLANNER_LLM": PLANNER,
+}
 
-# TIER 2: Speed/Balance for primary execution
-# GPT-4o Mini is a good choice for balanced performance
-EXECUTION_LLM = ChatOpenAI(model="gpt-4o-mini", temperature=0.2)
-
-# TIER 3: High-Capability/Judge for complex evaluation (Highest Cost)
-JUDGE_LLM = ChatOpenAI(model="gpt-4-turbo", temperature=0.0) 
-
-# Example of a non-OpenAI model for diversity/redundancy
-PLANNER_LLM = ChatAnthropic(model="claude-3-haiku-20240307", temperature=0.1)
\ No newline at end of file
+def __getattr__(name):
+    # `from .models import EXECUTION_LLM` builds the client on first import of that name only
+    if name in _TIER_ATTRIBUTES:
+        return get_llm(_TIER_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,173 @@
+# D:\cognito_ai_assistant\ai_core\plan_cache.py
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import METRICS
+from .response_cache import InMemoryLRUBackend, normalize_query
+
+# --- 1. CONFIGURATION ---
+
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "1") == "1"
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", "3600"))  # seconds; recurring goals replan the same way
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "512"))
+STEP_MEMO_TTL = float(os.getenv("STEP_MEMO_TTL", "300"))  # seconds; tool results go stale (prices, news...)
+STEP_MEMO_MAX_ENTRIES = int(os.getenv("STEP_MEMO_MAX_ENTRIES", "4096"))
+
+# --- 2. PLAN CACHE ---
+
+class PlanCache:
+    """
+    Remembers the rewritten plan suffix for a (normalized user_query, root cause, completed
+    prefix) triple, so a recurring goal that fails the same way at the same point is replanned
+    without an LLM call. The prefix is part of the key because a suffix only fits the steps it
+    was written to follow.
+    """
+
+    def __init__(self, backend: Optional[InMemoryLRUBackend] = None, ttl: float = PLAN_CACHE_TTL,
+                 enabled: bool = PLAN_CACHE_ENABLED):
+        self.backend = backend if backend is not None else InMemoryLRUBackend(PLAN_CACHE_MAX_ENTRIES)
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def key_for(user_query: str, root_cause: str, completed: Sequence[str] = ()) -> str:
+        raw_key = json.dumps([normalize_query(user_query), root_cause, [normalize_query(step) for step in completed]])
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+    def lookup(self, user_query: str, root_cause: str, completed: Sequence[str] = ()) -> Optional[Dict[str, Any]]:
+        """Returns {'suffix': [...], 'justification': ...} or None."""
+        if not self.enabled:
+            return None
+        value = self.backend.get(self.key_for(user_query, root_cause, completed))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        METRICS.inc("cognito_plan_cache_lookups_total", outcome="hit" if value is not None else "miss")
+        return value
+
+    def store(self, user_query: str, root_cause: str, suffix: List[str], justification: str,
+              completed: Sequence[str] = ()) -> None:
+        if not self.enabled:
+            return
+        self.backend.set(self.key_for(user_query, root_cause, completed),
+                         {"suffix": list(suffix), "justification": justification}, self.ttl)
+        self.stores += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "entries": len(self.backend),
+            "evictions": self.backend.evictions,
+        }
+
+# --- 3. STEP RESULT MEMO ---
+
+class StepResultMemo:
+    """
+    Memoizes step results by (normalized step text, inputs). Only successful results are kept,
+    so a step that failed is really re-executed after a replan, while steps that already
+    succeeded (or recur in the new suffix with the same inputs) are cache hits.
+    Concurrent callers of the same key share one execution (single-flight).
+    """
+
+    def __init__(self, backend: Optional[InMemoryLRUBackend] = None, ttl: float = STEP_MEMO_TTL):
+        self.backend = backend if backend is not None else InMemoryLRUBackend(STEP_MEMO_MAX_ENTRIES)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._key_locks: Dict[str, List[Any]] = {}  # key -> [lock, callers holding or waiting on it]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(step: str, inputs: Any = None) -> str:
+        raw_key = json.dumps([normalize_query(step), inputs], sort_keys=True, default=str)
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+    def get(self, step: str, inputs: Any = None) -> Optional[str]:
+        value = self.backend.get(self.key_for(step, inputs))
+        return None if value is None else value["result"]
+
+    def put(self, step: str, inputs: Any, result: str) -> None:
+        if not str(result).startswith("FAILURE"):
+            self.backend.set(self.key_for(step, inputs), {"result": result}, self.ttl)
+
+    def run(self, step: str, inputs: Any, execute: Callable[[], str]) -> Tuple[str, bool]:
+        """Returns (result, hit); execute() runs only on a miss."""
+        key = self.key_for(step, inputs)
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+            key_lock = entry[0]
+        try:
+            with key_lock:
+                value = self.backend.get(key)
+                hit = value is not None
+                if hit:
+                    result = value["result"]
+                else:
+                    result = execute()
+                    self.put(step, inputs, result)
+        finally:
+            with self._lock:
+                # Dropped only by the last caller: a waiter still queued on it keeps the same lock,
+                # so after a failed (unstored) run it and a new caller cannot both execute the step
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        METRICS.inc("cognito_step_memo_lookups_total", outcome="hit" if hit else "miss")
+        return result, hit
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.backend),
+            "evictions": self.backend.evictions,
+        }
+
+# --- 4. INCREMENTAL REPLANNING ---
+
+def splice_plan(task_plan: List[str], failed_step: int, new_suffix: List[str]) -> Tuple[List[str], int]:
+    """
+    Keeps the steps that already succeeded and replaces everything from the failed step on.
+    Returns (new plan, index to resume at); the resume index is the first rewritten step.
+    """
+    failed_step = max(0, min(failed_step, len(task_plan)))
+    return task_plan[:failed_step] + list(new_suffix), failed_step
+
+# --- 5. PROCESS-WIDE CACHES ---
+
+_PLAN_CACHE: Optional[PlanCache] = None
+_STEP_MEMO: Optional[StepResultMemo] = None
+
+def get_plan_cache() -> PlanCache:
+    global _PLAN_CACHE
+    if _PLAN_CACHE is None:
+        _PLAN_CACHE = PlanCache()
+    return _PLAN_CACHE
+
+def get_step_memo() -> StepResultMemo:
+    global _STEP_MEMO
+    if _STEP_MEMO is None:
+        _STEP_MEMO = StepResultMemo()
+    return _STEP_MEMO
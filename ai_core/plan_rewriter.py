@@ -1,13 +1,16 @@
 # D:\cognito_ai_assistant\ai_core\plan_rewriter.py
 
 from langchain_core.pydantic_v1 import BaseModel, Field
-from typing import List
+from typing import Any, Callable, Dict, List, Optional
+
+from .plan_cache import get_plan_cache, get_step_memo, splice_plan
+from .speculative_executor import invalidate_speculation, take_speculative_result
 
 # Schema for the Plan Rewriter's structured output
 class NewPlan(BaseModel):
     """The new, revised sequence of task steps."""
     new_task_plan: List[str] = Field(
-        description="A completely new list of sequential steps to achieve the original goal, incorporating the reflection's recommendations."
+        description="The revised steps from the failed step onward (steps that already succeeded are kept and must not be repeated), incorporating the reflection's recommendations."
     )
     justification: str = Field(
         description="A brief explanation of how this new plan addresses the previous failure."
@@ -15,42 +18,100 @@ class NewPlan(BaseModel):
 
 def plan_rewrite_node(state: AgentState) -> AgentState:
     """
-    Uses the critique from the Reflector to generate a new task plan.
+    Uses the critique from the Reflector to rewrite the task plan incrementally: the steps
+    that succeeded (and their results) are kept and only the suffix from the failed step
+    onward is replaced. Suffixes are cached per (normalized user_query, root cause, completed steps).
     """
     reflection: Reflection = state['reflection']
-    
-    prompt = f"""
-    TASK: Rewrite the entire task plan based on the following critique.
-    
-    ORIGINAL GOAL: {state['user_query']}
-    CRITIQUE: {reflection.critique}
-    RECOMMENDATION: {reflection.recommendation}
-    
-    Generate a complete, new task plan (a list of steps) that avoids the failure 
-    and leads directly to the final answer. Use the Pydantic schema for output.
-    """
-    
-    # LLM invocation logic using NewPlan schema
-    # rewriter_llm.with_structured_output(NewPlan).invoke(prompt)
-    
-    # Mock NewPlan for illustration:
-    new_plan_output = NewPlan(
-        new_task_plan=["Step 1: Get the current stock price.", "Step 2: Retrieve the stock's 52-week high.", "Step 3: Calculate the percentage difference.", "Step 4: Synthesize final answer."],
-        justification="The new plan explicitly retrieves the 52-week high (Step 2) before attempting calculation, preventing the missing data error."
-    )
+    task_plan = state.get('task_plan', [])
+    failed_step = state.get('current_step', 0)
+    completed = task_plan[:failed_step]
+
+    plan_cache = get_plan_cache()
+    cached = plan_cache.lookup(state['user_query'], reflection.root_cause, completed)
+    if cached is not None:
+        new_plan_output = NewPlan(new_task_plan=cached["suffix"], justification=cached["justification"])
+        print(f"**Plan Rewriter:** Reusing cached revision for root cause {reflection.root_cause}.")
+    else:
+        completed_text = "\n".join(f"{i + 1}. {step}" for i, step in enumerate(completed)) or "(none)"
+        prompt = f"""
+        TASK: Rewrite the remaining task plan based on the following critique.
+
+        ORIGINAL GOAL: {state['user_query']}
+        COMPLETED STEPS (already executed successfully, keep their results):
+        {completed_text}
+        FAILED STEP: {task_plan[failed_step] if failed_step < len(task_plan) else "(none)"}
+        CRITIQUE: {reflection.critique}
+        RECOMMENDATION: {reflection.recommendation}
+
+        Generate ONLY the steps from the failed step onward, building on the completed steps'
+        results, that avoid the failure and lead directly to the final answer.
+        Use the Pydantic schema for output.
+        """
+
+        # LLM invocation logic using NewPlan schema
+        # rewriter_llm.with_structured_output(NewPlan).invoke(prompt)
+
+        # Mock NewPlan for illustration (the suffix after "Step 1: Get the current stock price."):
+        new_plan_output = NewPlan(
+            new_task_plan=["Step 2: Retrieve the stock's 52-week high.", "Step 3: Calculate the percentage difference.", "Step 4: Synthesize final answer."],
+            justification="The new plan explicitly retrieves the 52-week high (Step 2) before attempting calculation, preventing the missing data error."
+        )
+        plan_cache.store(state['user_query'], reflection.root_cause,
+                         new_plan_output.new_task_plan, new_plan_output.justification, completed)
 
-    print(f"**Plan Rewriter:** Successfully generated a revised plan.")
+    new_plan, resume_at = splice_plan(task_plan, failed_step, new_plan_output.new_task_plan)
+    print(f"**Plan Rewriter:** Kept {resume_at} completed step(s), rewrote {len(new_plan) - resume_at}.")
+
+    # Speculation was predicted from the old plan
+    invalidate_speculation(state)
 
-    # Reset state variables for the new run
     return AgentState(
-        task_plan=new_plan_output.new_task_plan,
-        current_step=0,         # Start from the first step of the new plan
+        task_plan=new_plan,
+        current_step=resume_at,  # Resume at the first rewritten step
+        step_results=state.get('step_results', [])[:resume_at],  # Results of the kept prefix stay valid
+        speculation_id="",
+        speculative_results={},
         system_error=None,      # Clear the error
-        status="replan_success" # Signal to restart execution
+        status="replan_success" # Signal to resume execution
+    )
+
+def execute_plan_step(state: AgentState, execute: Callable[[str], str],
+                      inputs: Optional[Any] = None) -> AgentState:
+    """
+    Runs task_plan[current_step] through the step-result memo. The inputs default to the goal
+    plus the earlier steps' results, so a step re-executed with the same context is a cache
+    hit, while a step whose upstream results changed runs again. A successful speculative
+    result for the step (see speculative_executor) is consumed first and skips the work.
+    """
+    step_index = state['current_step']
+    step = state['task_plan'][step_index]
+    step_results = state.get('step_results', [])[:step_index]
+    if inputs is None:
+        inputs = {"goal": state['user_query'], "previous": [r["result"] for r in step_results]}
+
+    speculative = take_speculative_result(state, step)
+    if speculative is not None:
+        result, hit = speculative[len("SUCCESS: "):], False
+        get_step_memo().put(step, inputs, result)
+        print(f"**Plan Executor:** Step {step_index + 1} served from speculative execution.")
+    else:
+        result, hit = get_step_memo().run(step, inputs, lambda: execute(step))
+    if hit:
+        print(f"**Plan Executor:** Step {step_index + 1} served from the step-result memo.")
+    if str(result).startswith("FAILURE"):
+        return AgentState(system_error=result, status="step_failed")
+
+    return AgentState(
+        step_results=step_results + [{"step": step, "result": result, "memo_hit": hit,
+                                      "speculative_hit": speculative is not None}],
+        current_step=step_index + 1,
+        status="step_complete",
     )
 
 # --- Update AgentState ---
 # Add a key to hold the reflection object
 class AgentState(TypedDict):
     # ... (existing keys) ...
-    reflection: Reflection = Field(default=None)
\ No newline at end of file
+    reflection: Reflection = Field(default=None)
+    step_results: List[Dict[str, Any]]  # One entry per completed task_plan step, in order
\ No newline at end of file
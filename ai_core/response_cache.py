@@ -0,0 +1,245 @@
+# D:\cognito_ai_assistant\ai_core\response_cache.py
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional, Protocol, Tuple
+
+if TYPE_CHECKING:  # numpy (via semantic_cache) is only imported once a cache is built
+    from .semantic_cache import SemanticCache
+
+# --- 1. CONFIGURATION ---
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # 'memory' or 'sqlite'
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))  # seconds
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_DB_PATH = os.getenv("RESPONSE_CACHE_DB_PATH", "response_cache.sqlite3")
+
+# --- 2. BACKENDS ---
+
+class CacheBackend(Protocol):
+    """Minimal interface a shared backend (SQLite, Redis, Memcached...) must provide."""
+    def get(self, key: str) -> Optional[Dict[str, Any]]: ...
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None: ...
+    def clear(self) -> None: ...
+    def __len__(self) -> int: ...
+
+class InMemoryLRUBackend:
+    """Per-process LRU with per-entry expiry (O(1) get/set via OrderedDict)."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCacheBackend:
+    """Shared backend for all workers on one host (SQLite in WAL mode, approximate LRU by last access)."""
+
+    def __init__(self, db_path: str = RESPONSE_CACHE_DB_PATH, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()  # guards the evictions counter (connections are per thread)
+        self.evictions = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_last_access ON response_cache (last_access)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            with conn:
+                conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            return None
+        with conn:
+            conn.execute("UPDATE response_cache SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM response_cache WHERE key IN "
+                    "(SELECT key FROM response_cache ORDER BY last_access LIMIT ?)", (overflow,)
+                )
+                with self._lock:
+                    self.evictions += overflow
+
+    def clear(self) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM response_cache")
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+# --- 3. RESPONSE CACHE ---
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(text: str) -> str:
+    """Case-folds, collapses whitespace and drops trailing punctuation so trivial variants share a key."""
+    return _WHITESPACE.sub(" ", text.casefold()).strip().rstrip("?!. ")
+
+class ResponseCache:
+    """
+    Caches the deterministic expert -> tool manager -> risk assessor -> critique result,
+    keyed on the normalized decoded query plus the routing decision (expert + model).
+    Exact misses fall back to the optional SemanticCache, which matches paraphrases.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: float = RESPONSE_CACHE_TTL,
+                 enabled: bool = RESPONSE_CACHE_ENABLED, semantic: Optional["SemanticCache"] = None):
+        self.backend = backend if backend is not None else InMemoryLRUBackend()
+        self.ttl = ttl
+        self.enabled = enabled
+        self.semantic = semantic
+        self._lock = threading.Lock()  # guards the counters below; backends lock their own entries
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def _route(state: Dict[str, Any]) -> Tuple[str, str, str]:
+        decoded = state.get("modality_metadata", {}).get("decoded_text") or state["messages"][-1].content
+        # Keyed on the routing decision, not on a model the cascade escalated to afterwards
+        model = state.get("routed_model") or state.get("current_model")
+        return normalize_query(decoded), str(state.get("target_expert")), str(model)
+
+    @classmethod
+    def key_for(cls, state: Dict[str, Any]) -> str:
+        raw_key = "|".join(cls._route(state))
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+    def lookup(self, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(self.key_for(state))
+        except Exception as e:
+            print(f"⚡ [CACHE] Lookup failed, treating as miss: {e}")
+            value = None
+        if value is not None:
+            self._count("hits")
+            return value
+
+        if self.semantic is not None:
+            value = self.semantic.lookup(*self._route(state))
+            if value is not None:
+                self._count("semantic_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def store(self, state: Dict[str, Any], value: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        try:
+            self.backend.set(self.key_for(state), value, self.ttl)
+            if self.semantic is not None:
+                self.semantic.store(*self._route(state), value)
+            self._count("stores")
+        except Exception as e:
+            print(f"⚡ [CACHE] Store failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, semantic_hits, misses, stores = self.hits, self.semantic_hits, self.misses, self.stores
+        lookups = hits + semantic_hits + misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "hits": hits,
+            "semantic_hits": semantic_hits,
+            "misses": misses,
+            "hit_rate": round((hits + semantic_hits) / lookups, 4) if lookups else 0.0,
+            "stores": stores,
+            "evictions": getattr(self.backend, "evictions", 0),
+            "entries": len(self.backend),
+            "semantic_entries": len(self.semantic) if self.semantic is not None else 0,
+            "semantic_evictions": self.semantic.evictions if self.semantic is not None else 0,
+        }
+
+# --- 4. PROCESS-WIDE CACHE ---
+
+_CACHE: Optional[ResponseCache] = None
+
+def _semantic_layer() -> Optional["SemanticCache"]:
+    from .semantic_cache import SEMANTIC_CACHE_ENABLED, SemanticCache
+    return SemanticCache() if SEMANTIC_CACHE_ENABLED else None
+
+def get_response_cache() -> ResponseCache:
+    """Returns the shared ResponseCache, building the configured backend on first use."""
+    global _CACHE
+    if _CACHE is None:
+        backend = SQLiteCacheBackend() if RESPONSE_CACHE_BACKEND == "sqlite" else InMemoryLRUBackend()
+        _CACHE = ResponseCache(backend, semantic=_semantic_layer())
+    return _CACHE
+
+def set_response_cache_backend(backend: CacheBackend) -> ResponseCache:
+    """Plugs in a custom shared backend (e.g. a Redis adapter implementing CacheBackend)."""
+    global _CACHE
+    _CACHE = ResponseCache(backend, semantic=_semantic_layer())
+    return _CACHE
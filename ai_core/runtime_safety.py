@@ -2,6 +2,18 @@
 
 from langchain_core.pydantic_v1 import BaseModel, Field
 from typing import Literal
+from .llm_batching import batched_llm, parse_choice
+from .llm_registry import MODERATOR
+
+# Small, tuned policy-check LLM; concurrent checks are micro-batched into one call
+SAFETY_LLM = batched_llm(MODERATOR)
+SAFETY_ACTIONS = ("APPROVE", "FLAG_AND_REJECT", "REWRITE_SAFE")
+SAFETY_PROMPT = (
+    "Check the following agent output against policy. Do not authorize 'delete' commands without "
+    "HITL approval. Do not output PII. Flag self-harm, illegal activity or excessive data exposure.\n"
+    "Output: {output}\n"
+    "Start your reply with exactly one of APPROVE, FLAG_AND_REJECT, REWRITE_SAFE, then a one-sentence justification."
+)
 
 # Schema for the Safety Agent's structured decision
 class SafetyDecision(BaseModel):
@@ -20,20 +32,25 @@ def runtime_safety_check(state: AgentState) -> str:
     """
     latest_message = state["messages"][-1].content # Check the last thought/tool call LLM output
     
-    # 1. LLM Policy Check (e.g., using a smaller, highly tuned model like Llama 3)
-    # The LLM's prompt includes strict rules (e.g., "Do not authorize 'delete' commands without HITL approval," 
-    # "Do not output PII").
-    
-    # Mock Safety Decision for illustration:
+    # 1. Hard rule, no LLM needed: critical actions always need HITL approval
     if "delete database" in latest_message.lower() and "HITL approved" not in latest_message:
         decision = "FLAG_AND_REJECT"
         justification = "Attempted unauthorized critical action (Database Deletion) without explicit HITL approval status."
-    elif len(latest_message.split()) > 500:
-        decision = "REWRITE_SAFE"
-        justification = "Output is excessively verbose; requires summarization to maintain clarity."
     else:
-        decision = "APPROVE"
-        justification = "Output is compliant and safe."
+        # 2. LLM Policy Check: concurrent checks are sent as one batch, identical outputs share a call
+        try:
+            verdict = SAFETY_LLM.invoke(SAFETY_PROMPT.format(output=latest_message))
+            decision = parse_choice(verdict, SAFETY_ACTIONS)
+            justification = str(getattr(verdict, "content", verdict))
+        except Exception as e:
+            print(f"**Runtime Safety Agent:** Policy LLM failed ({e}); rejecting.")
+            decision = None
+            justification = f"Policy check unavailable: {e}"
+        
+        # Fail closed: no verdict (LLM unavailable, or the reply does not start with an action)
+        if decision is None:
+            decision = "FLAG_AND_REJECT"
+            justification = f"No valid policy verdict; output withheld. ({justification})"
         
     print(f"**Runtime Safety Agent:** Decision: {decision}. Justification: {justification}")
     
@@ -74,8 +74,8 @@ class ModerationResult(BaseModel):
         tool_output = run_tool_by_name(tool_name, **tool_args)
         
         # ... The rest of the logic to update 'messages' and set 'status' to 'tool_executed' ...
-        return AgentState(messages=state["messages"] + [ToolMessage(content=tool_output)], status="tool_executed", iterations=state["iterations"] + 1)
+        return AgentState(messages=[ToolMessage(content=tool_output)], status="tool_executed", iterations=state["iterations"] + 1)
         
     else:
         # The LLM decided to return the final answer (a regular string)
-        return AgentState(messages=state["messages"] + [response], status="finished")
\ No newline at end of file
+        return AgentState(messages=[response], status="finished")
\ No newline at end of file
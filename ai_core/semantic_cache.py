@@ -0,0 +1,138 @@
+# D:\cognito_ai_assistant\ai_core\semantic_cache.py
+
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# --- 1. CONFIGURATION ---
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2048"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))  # seconds
+EMBEDDING_DIM = int(os.getenv("SEMANTIC_CACHE_DIM", "512"))
+
+# Cosine similarity required to reuse an answer. Regulated domains demand near-identical wording.
+SIMILARITY_THRESHOLDS = {
+    "finance_expert": 0.95,
+    "legal_expert": 0.97,
+    "health_expert": 0.97,
+    "fitness_expert": 0.9,
+    "business_expert": 0.88,
+    "general_qa": 0.85,
+}
+DEFAULT_THRESHOLD = 0.9
+
+# --- 2. LOCAL EMBEDDING (no network) ---
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Function words carry no topic signal and make short paraphrases look dissimilar
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can could do does for from how i in is it me my of on or "
+    "please should tell the to what when where which who why will with would you your".split()
+)
+
+def _bucket(feature: str, dim: int) -> int:
+    # Stable across processes (unlike hash()), so cached vectors stay comparable
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little") % dim
+
+def hashing_embedding(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Feature-hashed bag of content words, word bigrams and character trigrams, L2-normalised.
+    Paraphrases sharing most content words land close together; good enough to gate a cache
+    and swappable for a real embedding model through SemanticCache(embed_fn=...).
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    words = [w for w in _TOKEN.findall(text.lower()) if w not in _STOPWORDS]
+    features: List[str] = [f"w:{w}" for w in words]
+    features += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"#{w}#"
+        features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    for feature in features:
+        vector[_bucket(feature, dim)] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+# --- 3. SEMANTIC CACHE ---
+
+class SemanticCache:
+    """
+    Fixed-capacity, in-memory nearest-neighbour cache of expert answers.
+    Embeddings live in one preallocated float32 matrix, so a lookup is a single
+    matrix-vector product restricted to rows for the same expert and model.
+    Storing the same query again for a route replaces its row instead of adding a duplicate.
+    Full caches evict the least recently used row.
+    """
+
+    def __init__(self, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES, ttl: float = SEMANTIC_CACHE_TTL,
+                 dim: int = EMBEDDING_DIM, thresholds: Optional[Dict[str, float]] = None,
+                 embed_fn: Optional[Callable[[str], np.ndarray]] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.thresholds = dict(SIMILARITY_THRESHOLDS if thresholds is None else thresholds)
+        self.embed_fn = embed_fn or (lambda text: hashing_embedding(text, dim))
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._route_ids = np.full(max_entries, -1, dtype=np.int32)   # -1 marks a free slot
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._values: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self._keys: List[Optional[Tuple[int, str]]] = [None] * max_entries  # (route id, query) per row
+        self._slots: Dict[Tuple[int, str], int] = {}  # (route id, query) -> row
+        self._routes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _route_id(self, expert: str, model: str) -> int:
+        return self._routes.setdefault(f"{expert}|{model}", len(self._routes))
+
+    def lookup(self, text: str, expert: str, model: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached answer of the most similar query, if it clears the expert's threshold."""
+        query = self.embed_fn(text)
+        threshold = self.thresholds.get(expert, DEFAULT_THRESHOLD)
+        now = time.monotonic()
+        with self._lock:
+            route = self._routes.get(f"{expert}|{model}")
+            if route is None:
+                return None
+            candidates = np.flatnonzero((self._route_ids == route) & (self._expires_at > now))
+            if candidates.size == 0:
+                return None
+            similarities = self._vectors[candidates] @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < threshold:
+                return None
+            slot = int(candidates[best])
+            self._last_used[slot] = now
+            return dict(self._values[slot], similarity=float(similarities[best]))
+
+    def store(self, text: str, expert: str, model: str, value: Dict[str, Any]) -> None:
+        vector = self.embed_fn(text)
+        now = time.monotonic()
+        with self._lock:
+            route = self._route_id(expert, model)
+            key = (route, text)
+            slot = self._slots.get(key)
+            if slot is None:
+                free = np.flatnonzero((self._route_ids == -1) | (self._expires_at <= now))
+                if free.size:
+                    slot = int(free[0])
+                else:
+                    slot = int(np.argmin(self._last_used))
+                    self.evictions += 1
+                if self._keys[slot] is not None:
+                    del self._slots[self._keys[slot]]
+                self._keys[slot] = key
+                self._slots[key] = slot
+            self._vectors[slot] = vector
+            self._route_ids[slot] = route
+            self._expires_at[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._values[slot] = dict(value)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero((self._route_ids != -1) & (self._expires_at > time.monotonic())))
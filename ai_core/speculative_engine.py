@@ -0,0 +1,214 @@
+# D:\cognito_ai_assistant\ai_core\speculative_engine.py
+
+import asyncio
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from .metrics import METRICS
+
+# --- 1. CONFIGURATION ---
+
+SPECULATIVE_MAX_CONCURRENCY = int(os.getenv("SPECULATIVE_MAX_CONCURRENCY", "4"))
+SPECULATIVE_TASK_TIMEOUT = float(os.getenv("SPECULATIVE_TASK_TIMEOUT", "10"))  # seconds per task
+SPECULATIVE_MAX_IDS = int(os.getenv("SPECULATIVE_MAX_IDS", "64"))  # speculation ids kept before the oldest is evicted
+
+# --- 2. ENGINE ---
+
+class SpeculativeEngine:
+    """
+    Runs speculative tasks concurrently on a private event loop thread.
+
+    Tasks are grouped by a speculation id, normally the plan step they were predicted from.
+    At most max_concurrency tasks execute at once and each gets task_timeout seconds.
+    Results are stored as soon as each task finishes, and results() can be read at any time.
+    cancel() drops a speculation id whose plan moved on. Unfinished tasks of that id are
+    cancelled and its results are discarded. use() consumes a result (waiting for a task still
+    in flight until its deadline), and only the newest
+    max_ids speculation ids are kept (older ones are cancelled the same way), so memory
+    stays bounded for the life of the process.
+
+    Sync run_task callables run in worker threads. A cancelled or timed-out thread cannot
+    be interrupted, but its result is ignored.
+    """
+
+    def __init__(self, run_task: Callable[[str], Any], max_concurrency: int = SPECULATIVE_MAX_CONCURRENCY,
+                 task_timeout: float = SPECULATIVE_TASK_TIMEOUT, max_ids: int = SPECULATIVE_MAX_IDS):
+        self.run_task = run_task
+        self.max_concurrency = max_concurrency
+        self.task_timeout = task_timeout
+        self.max_ids = max_ids
+        self._loop = asyncio.new_event_loop()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._running: Dict[str, Dict[str, asyncio.Task]] = {}  # only touched on the loop thread
+        self._ids: "OrderedDict[str, None]" = OrderedDict()  # launch order, only touched on the loop thread
+        self._deadlines: Dict[Tuple[str, str], float] = {}  # (id, task) -> monotonic deadline, loop thread
+        self._results: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        self._counts = {"launched": 0, "completed": 0, "failed": 0, "timed_out": 0, "cancelled": 0,
+                        "evicted": 0, "hits": 0, "misses": 0, "pending": 0}
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop.run_forever, name="speculative-engine", daemon=True)
+        self._thread.start()
+
+    # Called from graph nodes (any thread)
+
+    def launch(self, speculation_id: str, tasks: Iterable[str]) -> int:
+        """Starts every task not already running or finished for this id; returns how many started."""
+        if self._closed:
+            raise RuntimeError("Speculative engine is closed.")
+        return asyncio.run_coroutine_threadsafe(self._launch(speculation_id, list(tasks)), self._loop).result()
+
+    def cancel(self, speculation_id: str) -> int:
+        """Invalidates a speculation id: cancels its outstanding tasks and discards its results."""
+        if self._closed:
+            return 0
+        return asyncio.run_coroutine_threadsafe(self._cancel(speculation_id), self._loop).result()
+
+    def results(self, speculation_id: str) -> Dict[str, str]:
+        """Results that have arrived so far for this id."""
+        with self._lock:
+            return dict(self._results.get(speculation_id, {}))
+
+    def use(self, speculation_id: str, task: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Consumes the speculative result for a task the main plan now needs. A task still in
+        flight is awaited for the rest of its timeout (or timeout seconds, if smaller) instead
+        of being run a second time; if it still has not finished it is counted as pending.
+        Only a successful result is returned and counted as a hit; a failed or timed-out one
+        is a miss (the main plan runs the step itself). Each result can be consumed once.
+        """
+        if not self._closed:
+            finished = asyncio.run_coroutine_threadsafe(self._wait_for(speculation_id, task, timeout),
+                                                        self._loop).result()
+            if not finished:
+                self._count("pending")
+                return None
+        with self._lock:
+            result = self._results.get(speculation_id, {}).pop(task, None)
+        hit = result is not None and result.startswith("SUCCESS:")
+        self._count("hits" if hit else "misses")
+        return result if hit else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["hits"] + counts["misses"] + counts["pending"]
+        # hit_rate: share of launched speculative work that the main plan actually consumed
+        counts["hit_rate"] = round(counts["hits"] / counts["launched"], 4) if counts["launched"] else 0.0
+        counts["lookup_hit_rate"] = round(counts["hits"] / lookups, 4) if lookups else 0.0
+        return counts
+
+    def close(self) -> None:
+        """Cancels all speculative work and stops the loop thread (registered with atexit)."""
+        if self._closed:
+            return
+        self._closed = True
+        for speculation_id in list(self._running):
+            asyncio.run_coroutine_threadsafe(self._cancel(speculation_id), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5.0)
+
+    # Loop thread
+
+    def _count(self, outcome: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[outcome] += amount
+        METRICS.inc("cognito_speculative_tasks_total", amount, outcome=outcome)
+
+    async def _launch(self, speculation_id: str, tasks: list) -> int:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._ids[speculation_id] = None
+        self._ids.move_to_end(speculation_id)
+        while len(self._ids) > self.max_ids:
+            oldest = next(iter(self._ids))
+            await self._cancel(oldest)
+            self._count("evicted")
+        running = self._running.setdefault(speculation_id, {})
+        with self._lock:
+            done = set(self._results.get(speculation_id, {}))
+        started = 0
+        for task in dict.fromkeys(tasks):
+            if task in running or task in done:
+                continue
+            self._deadlines[(speculation_id, task)] = time.monotonic() + self.task_timeout
+            running[task] = self._loop.create_task(self._run_one(speculation_id, task))
+            started += 1
+        if started:
+            self._count("launched", started)
+        return started
+
+    async def _cancel(self, speculation_id: str) -> int:
+        self._ids.pop(speculation_id, None)
+        running = self._running.pop(speculation_id, {})
+        for name, task in running.items():
+            self._deadlines.pop((speculation_id, name), None)
+            task.cancel()
+        if running:
+            await asyncio.gather(*running.values(), return_exceptions=True)
+        with self._lock:
+            self._results.pop(speculation_id, None)
+        return len(running)
+
+    async def _wait_for(self, speculation_id: str, task: str, timeout: Optional[float]) -> bool:
+        """Waits (without cancelling it) for an in-flight task; False if it is still running."""
+        running = self._running.get(speculation_id, {}).get(task)
+        if running is None:
+            return True
+        remaining = max(0.0, self._deadlines.get((speculation_id, task), 0.0) - time.monotonic())
+        if timeout is not None:
+            remaining = min(remaining, timeout)
+        await asyncio.wait({running}, timeout=remaining)
+        return running.done()
+
+    async def _call(self, task: str) -> Any:
+        if asyncio.iscoroutinefunction(self.run_task):
+            return await self.run_task(task)
+        return await asyncio.to_thread(self.run_task, task)
+
+    async def _run_one(self, speculation_id: str, task: str) -> None:
+        try:
+            async with self._semaphore:
+                result = await asyncio.wait_for(self._call(task), self.task_timeout)
+            outcome, value = "completed", f"SUCCESS: {result}"
+        except asyncio.CancelledError:
+            self._deadlines.pop((speculation_id, task), None)
+            self._count("cancelled")
+            raise
+        except asyncio.TimeoutError:
+            outcome, value = "timed_out", f"FAILURE: timed out after {self.task_timeout:.1f}s"
+        except Exception as e:
+            outcome, value = "failed", f"FAILURE: {str(e)}"
+
+        self._deadlines.pop((speculation_id, task), None)
+        with self._lock:
+            self._results.setdefault(speculation_id, {})[task] = value
+        running = self._running.get(speculation_id)
+        if running is not None:
+            running.pop(task, None)
+            if not running:
+                del self._running[speculation_id]
+        self._count(outcome)
+
+# --- 3. PROCESS-WIDE ENGINE ---
+
+_ENGINE: Optional[SpeculativeEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+def get_speculative_engine(run_task: Callable[[str], Any]) -> SpeculativeEngine:
+    """Returns the shared engine, starting it with run_task on first use."""
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = SpeculativeEngine(run_task)
+                atexit.register(_ENGINE.close)
+    return _ENGINE
+
+def speculative_engine_stats() -> Optional[Dict[str, Any]]:
+    """Stats of the shared engine, or None if no speculation has started in this process."""
+    return _ENGINE.stats() if _ENGINE is not None else None
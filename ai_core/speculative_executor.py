@@ -1,33 +1,73 @@
 # D:\cognito_ai_assistant\ai_core\speculative_executor.py
 
+import hashlib
+from typing import Any, Dict, Optional
+
+from .speculative_engine import get_speculative_engine
+
 # Assume SAFE_TOOLS is a subset of all tools (e.g., just RAG and Calculator)
 SAFE_TOOLS = [tool for tool in ALL_TOOLS if tool.name not in CRITICAL_TOOLS]
 SPECULATIVE_TOOL_EXECUTOR = ToolExecutor(SAFE_TOOLS)
 
+def _run_speculative_task(task: str) -> Any:
+    # 1. LLM converts speculative text task into a safe Tool Call object
+    tool_call_object = SPECULATIVE_LLM.invoke(f"Convert this task into a tool call: {task}")
+
+    # 2. Execute the safe tool call
+    return SPECULATIVE_TOOL_EXECUTOR.invoke(tool_call_object)
+
+def speculation_id(state: AgentState) -> str:
+    """Identifies the plan step the speculation was predicted from; a new plan or step means a new id."""
+    plan = "\n".join(state.get("task_plan", []))
+    return f"{hashlib.sha256(plan.encode('utf-8')).hexdigest()[:16]}:{state.get('current_step', 0)}"
+
 def execute_speculative_tasks(state: AgentState) -> AgentState:
     """
-    Executes tasks in the speculative_queue in parallel and stores the results.
+    Launches the tasks in the speculative_queue concurrently (bounded, with per-task timeouts)
+    and returns immediately; results land in the engine as they arrive.
+    Speculation from an earlier plan step is cancelled first.
     """
+    engine = get_speculative_engine(_run_speculative_task)
+    current_id = speculation_id(state)
+    previous_id = state.get("speculation_id")
+    if previous_id and previous_id != current_id:
+        cancelled = engine.cancel(previous_id)
+        print(f"**Speculative Executor:** Plan moved on; cancelled {cancelled} outstanding task(s).")
+
     tasks_to_run = state.get("speculative_queue", [])
     if not tasks_to_run:
-        return AgentState(status="no_speculative_work")
-
-    new_results = state.get("speculative_results", {}).copy()
-    
-    # Use standard Python concurrency (e.g., threading or asyncio) to run the tool calls
-    # For simplicity, we'll iterate synchronously here, but in production, this is concurrent.
-    for task in tasks_to_run:
-        try:
-            # 1. LLM converts speculative text task into a safe Tool Call object
-            tool_call_object = SPECULATIVE_LLM.invoke(f"Convert this task into a tool call: {task}")
-            
-            # 2. Execute the safe tool call
-            result = SPECULATIVE_TOOL_EXECUTOR.invoke(tool_call_object)
-            new_results[task] = f"SUCCESS: {result}"
-        except Exception as e:
-            new_results[task] = f"FAILURE: {str(e)}"
-
-    print(f"**Speculative Executor:** Completed {len(tasks_to_run)} tasks.")
-    
-    # Clear the queue and store the new results
-    return AgentState(speculative_queue=[], speculative_results=new_results, status="speculative_work_complete")
\ No newline at end of file
+        return AgentState(status="no_speculative_work", speculation_id=current_id)
+
+    started = engine.launch(current_id, tasks_to_run)
+    print(f"**Speculative Executor:** Started {started} of {len(tasks_to_run)} tasks in the background.")
+
+    # Clear the queue and store whatever results already arrived
+    return AgentState(
+        speculative_queue=[],
+        speculation_id=current_id,
+        speculative_results=engine.results(current_id),
+        status="speculative_work_started",
+    )
+
+def collect_speculative_results(state: AgentState) -> AgentState:
+    """Copies the speculative results that have arrived so far into the state."""
+    engine = get_speculative_engine(_run_speculative_task)
+    return AgentState(speculative_results=engine.results(state.get("speculation_id", speculation_id(state))))
+
+def take_speculative_result(state: AgentState, task: str) -> Optional[str]:
+    """
+    Called by plan_rewriter.execute_plan_step before it runs a step itself: a hit skips the
+    work (feeds the hit rate); a step still being speculated is awaited rather than re-run.
+    """
+    engine = get_speculative_engine(_run_speculative_task)
+    return engine.use(state.get("speculation_id", speculation_id(state)), task)
+
+def invalidate_speculation(state: AgentState) -> AgentState:
+    """Called when the plan is rewritten: outstanding speculative work is cancelled and discarded."""
+    if state.get("speculation_id"):
+        get_speculative_engine(_run_speculative_task).cancel(state["speculation_id"])
+    return AgentState(speculation_id="", speculative_results={})
+
+def speculative_stats() -> Dict[str, Any]:
+    """Launched/completed/timed-out/cancelled counts and the hit rate (served on /speculative/stats)."""
+    return get_speculative_engine(_run_speculative_task).stats()
@@ -3,9 +3,10 @@
 from typing import List, Dict, Any
 from langchain_core.messages import HumanMessage
 from langgraph.prebuilt import ToolExecutor
+from .llm_registry import MODERATOR, lazy_llm
 
 # Assume this LLM is dedicated to fast, speculative reasoning
-SPECULATIVE_LLM = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.3) 
+SPECULATIVE_LLM = lazy_llm(MODERATOR, temperature=0.3) 
 
 def speculative_planning(state: AgentState) -> AgentState:
     """
@@ -35,4 +36,5 @@ def speculative_planning(state: AgentState) -> AgentState:
 class AgentState(TypedDict):
     # ... (existing keys) ...
     speculative_queue: List[str] = Field(default=list) 
-    speculative_results: Dict[str, Any] = Field(default_factory=dict)
\ No newline at end of file
+    speculative_results: Dict[str, Any] = Field(default_factory=dict)
+    speculation_id: str  # plan step the speculative work belongs to (see speculative_executor)
\ No newline at end of file
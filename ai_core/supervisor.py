@@ -1,5 +1,18 @@
 # D:\cognito_ai_assistant\ai_core\supervisor.py (Modified)
 
+from .llm_batching import batched_llm, parse_choice
+from .llm_registry import MODERATOR
+
+# Small routing LLM; concurrent requests are micro-batched and identical prompts share one call
+SUPERVISOR_LLM = batched_llm(MODERATOR)
+AGENT_CHOICES = ("ResearchAgent", "CodeExpert", "FinalSynthesizer", "Reflector")
+SUPERVISOR_PROMPT = (
+    "Analyze the user's request. Is it primarily research/data gathering, or does it require code "
+    "execution/math/logic? Delegate to the appropriate agent.\n"
+    "Request: {query}\n"
+    "Answer with exactly one of: ResearchAgent, CodeExpert, FinalSynthesizer, Reflector."
+)
+
 class AgentToCall(BaseModel):
     """Specifies the next agent to route the task to."""
     next_agent: Literal["ResearchAgent", "CodeExpert", "FinalSynthesizer", "Reflector"] = Field(
@@ -12,16 +25,21 @@ def supervisor_router(state: AgentState) -> str:
     """
     user_query = state["user_query"]
     
-    # Logic for Supervisor LLM (Prompted to output the AgentToCall Pydantic schema)
-    # Prompt: "Analyze the user's request. Is it primarily research/data gathering, or does it require code execution/math/logic? Delegate to the appropriate agent."
+    # Supervisor LLM call: concurrent requests are sent as one batch, identical queries share a call
+    try:
+        next_agent = parse_choice(SUPERVISOR_LLM.invoke(SUPERVISOR_PROMPT.format(query=user_query)), AGENT_CHOICES)
+    except Exception as e:
+        print(f"**Supervisor:** Routing LLM failed ({e}); using keyword routing.")
+        next_agent = None
     
-    # Mock routing logic for illustration:
-    if "calculate" in user_query.lower() or "run python" in user_query.lower():
-        next_agent = "CodeExpert"
-    elif "find out" in user_query.lower() or "latest news" in user_query.lower():
-        next_agent = "ResearchAgent"
-    else:
-        next_agent = "FinalSynthesizer" # If neither, it can synthesize a final answer immediately
+    # Keyword routing when the LLM is unavailable or names no agent:
+    if next_agent is None:
+        if "calculate" in user_query.lower() or "run python" in user_query.lower():
+            next_agent = "CodeExpert"
+        elif "find out" in user_query.lower() or "latest news" in user_query.lower():
+            next_agent = "ResearchAgent"
+        else:
+            next_agent = "FinalSynthesizer" # If neither, it can synthesize a final answer immediately
 
     print(f"**Supervisor:** Delegating task to: {next_agent}")
     return next_agent
\ No newline at end of file
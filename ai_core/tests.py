@@ -1,3 +1,623 @@
-from django.test import TestCase
+# D:\cognito_ai_assistant\ai_core\tests.py
+# Plain unittest cases: run with `python manage.py test ai_core`, `python -m unittest ai_core.tests`
+# or pytest. None of them need the Django database or the network.
 
-# Create your tests here.
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from unittest import mock
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, StateGraph
+
+from . import audit_log, fusion_db, history, training_queue
+from . import graph as graph_module
+from .batch_signer import MerkleBatchSigner, verify_receipt
+from .checkpointer import SQLCheckpointSaver, thread_config
+from .experts import NODE_MAP, critique_revise
+from .graph import (APPROVAL_NODE, AgentState, create_cognito_omega_graph, get_cognito_omega_graph,
+                    route_critique_final)
+from .history import HistoryManager, count_tokens, message_tokens
+from .human_in_the_loop import WITHHELD_ANSWER, human_approval_gate, pending_approval, resume_approval
+from .llm_batching import MicroBatcher, parse_choice
+from .llm_registry import MODERATOR, FakeChatModel, LoopLocalAsyncClient
+from .metrics import QUANTILE_REFRESH_SAMPLES, LatencyHistogram, MetricsRegistry
+from .plan_cache import PlanCache, StepResultMemo
+from .response_cache import InMemoryLRUBackend, ResponseCache, normalize_query
+from .semantic_cache import SemanticCache
+from .speculative_engine import SpeculativeEngine
+from .tools import StreamingHasher, run_tool_calls
+
+
+class MicroBatcherTests(unittest.TestCase):
+
+    def test_concurrent_callers_coalesce_into_one_batch(self):
+        model = FakeChatModel(tier=MODERATOR, latency=0.01)
+        batcher = MicroBatcher(model, window_ms=50, max_batch=64)
+        prompts = [f"classify query #{i % 8}" for i in range(64)]
+
+        async def run():
+            return await asyncio.gather(*(batcher.ainvoke(p) for p in prompts))
+
+        results = asyncio.run(run())
+        self.assertEqual(model.calls, 8)
+        self.assertEqual(model.batches, 1)
+        for prompt, result in zip(prompts, results):
+            self.assertIn(prompt, result.content)
+        self.assertEqual(batcher.stats()["coalesced"], 56)
+
+    def test_cancelled_caller_does_not_affect_batch_mates(self):
+        model = FakeChatModel(tier=MODERATOR, latency=0.2)
+        batcher = MicroBatcher(model, window_ms=20, max_batch=64)
+
+        async def run():
+            impatient = asyncio.ensure_future(asyncio.wait_for(batcher.ainvoke("shared prompt"), timeout=0.05))
+            patient = [batcher.ainvoke("shared prompt"), batcher.ainvoke("other prompt")]
+            with self.assertRaises(asyncio.TimeoutError):
+                await impatient
+            return await asyncio.wait_for(asyncio.gather(*patient), timeout=5)
+
+        shared, other = asyncio.run(run())
+        self.assertIn("shared prompt", shared.content)
+        self.assertIn("other prompt", other.content)
+        self.assertEqual(model.calls, 2)
+
+    def test_stuck_batch_times_out_its_callers(self):
+        batcher = MicroBatcher(FakeChatModel(tier=MODERATOR, latency=1.0), window_ms=1, timeout=0.05)
+        started = time.monotonic()
+        with self.assertRaises(FutureTimeoutError):
+            batcher.invoke("prompt")
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(batcher.ainvoke("other prompt"))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_sync_caller_resolves_after_async_cancellation(self):
+        model = FakeChatModel(tier=MODERATOR, latency=0.1)
+        batcher = MicroBatcher(model, window_ms=20, max_batch=64)
+        cancelled = batcher.submit("prompt")
+        waiting = batcher.submit("prompt")
+        self.assertTrue(cancelled.cancel())
+        self.assertIn("prompt", waiting.result(timeout=5).content)
+
+
+class MerkleBatchSignerTests(unittest.TestCase):
+
+    def test_cancelled_awaiter_does_not_strand_batch_mates(self):
+        signer = MerkleBatchSigner(window_ms=50)
+        digests = [f"{i:064x}" for i in range(3)]
+
+        async def run():
+            cancelled = asyncio.ensure_future(signer.asign_digest(digests[0]))
+            others = [asyncio.ensure_future(signer.asign_digest(d)) for d in digests[1:]]
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            return await asyncio.wait_for(asyncio.gather(*others), timeout=5)
+
+        receipts = asyncio.run(run())
+        self.assertEqual([r["batch_size"] for r in receipts], [2, 2])
+        for digest, receipt in zip(digests[1:], receipts):
+            self.assertTrue(verify_receipt(digest, receipt))
+
+    def test_sync_signer_resolves_after_cancellation(self):
+        signer = MerkleBatchSigner(window_ms=20)
+        cancelled = signer.submit("a" * 64)
+        waiting = signer.submit("b" * 64)
+        self.assertTrue(cancelled.cancel())
+        self.assertTrue(verify_receipt("b" * 64, waiting.result(timeout=5)))
+
+
+class CompiledGraphTests(unittest.TestCase):
+
+    def test_graph_is_compiled_once_per_checkpointer(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        saver = InMemorySaver()
+        self.addCleanup(graph_module._GRAPHS.pop, saver, None)
+        with ThreadPoolExecutor(8) as pool:
+            shared = set(map(id, pool.map(lambda _: get_cognito_omega_graph(), range(16))))
+        self.assertEqual(len(shared), 1)
+
+        checkpointed = get_cognito_omega_graph(checkpointer=saver)
+        self.assertIs(get_cognito_omega_graph(checkpointer=saver), checkpointed)
+        self.assertIsNot(checkpointed, get_cognito_omega_graph())
+        self.assertIs(checkpointed.checkpointer, saver)
+
+
+class PreRoutingFanOutTests(unittest.TestCase):
+
+    def _state_at_supervisor(self, parallel):
+        nodes = dict(NODE_MAP)
+        nodes["mlcc_nlu_agent"] = lambda state: {"original_language": "fr", "cultural_context": "fr-FR"}
+        nodes["emotion_intent_detector"] = lambda state: {"answer_confidence": 0.4}
+        seen = {}
+
+        def supervisor(state):
+            seen.update(language=state["original_language"], confidence=state.get("answer_confidence"))
+            return NODE_MAP["supervisor"](state)
+        nodes["supervisor"] = supervisor
+
+        app = create_cognito_omega_graph(nodes, instrument=False, parallel_pre_routing=parallel,
+                                         checkpointer=InMemorySaver())
+        config = thread_config("fan-out")
+        app.invoke({"messages": [], "raw_user_input": "Which investment fits me?", "modality_metadata": {},
+                    "original_language": "en", "cultural_context": "general", "original_modality": "text",
+                    "current_model": "gpt-3.5-turbo", "risk_score": 0.0}, config, interrupt_after=["supervisor"])
+        values = app.get_state(config).values
+        values["messages"] = [(m.type, m.content) for m in values["messages"]]
+        return values, seen
+
+    def test_fan_out_reaches_the_same_state_as_the_chain(self):
+        sequential, seen_sequential = self._state_at_supervisor(parallel=False)
+        parallel, seen_parallel = self._state_at_supervisor(parallel=True)
+        self.assertEqual(parallel, sequential)
+        self.assertEqual(seen_parallel, {"language": "fr", "confidence": 0.4})  # supervisor waits for both
+        self.assertEqual(seen_parallel, seen_sequential)
+
+
+class RouteCritiqueTests(unittest.TestCase):
+
+    def test_low_confidence_escalation_retries_the_expert(self):
+        # The critique passes, but low answer confidence on a cheap tier must still escalate
+        state = {"messages": [AIMessage(content="Answer. MANDATORY HIGH-RISK WARNING", id="a1")],
+                 "target_expert": "finance_expert", "model_tier": MODERATOR, "answer_confidence": 0.1,
+                 "revision_count": 0}
+        update = critique_revise(state)
+        self.assertTrue(update["cascade_escalated"])
+        self.assertEqual(route_critique_final({**state, **update}), "finance_expert")
+
+    def test_perfect_critique_goes_to_fusion(self):
+        state = {"critique_report": "PERFECT: Answer is accurate.", "target_expert": "finance_expert"}
+        self.assertEqual(route_critique_final(state), "knowledge_fusion")
+
+
+class PlanCacheTests(unittest.TestCase):
+
+    def test_suffix_is_keyed_by_completed_prefix(self):
+        cache = PlanCache(enabled=True)
+        cache.store("Compare AAPL to its high", "MISSING_DATA", ["Step 2: fetch high"], "why",
+                    completed=["Step 1: Get the current stock price."])
+        self.assertIsNotNone(cache.lookup("compare aapl to its high", "MISSING_DATA",
+                                          ["Step 1: Get the current stock price."]))
+        self.assertIsNone(cache.lookup("compare aapl to its high", "MISSING_DATA", []))
+
+
+def _cache_state(query, expert="general_qa", model="gpt-4o-mini"):
+    return {"messages": [HumanMessage(content=query)], "modality_metadata": {"decoded_text": query},
+            "target_expert": expert, "routed_model": model}
+
+
+class ResponseCacheTests(unittest.TestCase):
+
+    def test_trivial_query_variants_share_a_key(self):
+        self.assertEqual(normalize_query("  What is  ROI?? "), "what is roi")
+        self.assertEqual(ResponseCache.key_for(_cache_state("What is ROI?")),
+                         ResponseCache.key_for(_cache_state("what   is roi")))
+        self.assertNotEqual(ResponseCache.key_for(_cache_state("What is ROI?")),
+                            ResponseCache.key_for(_cache_state("What is ROI?", expert="finance_expert")))
+
+    def test_expired_entries_miss(self):
+        cache = ResponseCache(InMemoryLRUBackend(), ttl=-1, enabled=True)
+        cache.store(_cache_state("q"), {"answer": "a"})
+        self.assertIsNone(cache.lookup(_cache_state("q")))
+        self.assertEqual(len(cache.backend), 0)
+
+    def test_lru_evicts_least_recently_used(self):
+        backend = InMemoryLRUBackend(max_entries=2)
+        backend.set("a", {"v": 1}, 60)
+        backend.set("b", {"v": 2}, 60)
+        backend.get("a")
+        backend.set("c", {"v": 3}, 60)
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.get("a"), {"v": 1})
+        self.assertEqual(backend.evictions, 1)
+
+    def test_stats_count_hits_semantic_hits_and_misses(self):
+        cache = ResponseCache(InMemoryLRUBackend(), ttl=60, enabled=True,
+                              semantic=SemanticCache(max_entries=8, thresholds={"general_qa": 0.5}))
+        cache.store(_cache_state("best running shoes for marathon training"), {"answer": "a"})
+        self.assertEqual(cache.lookup(_cache_state("Best running shoes for marathon training.")), {"answer": "a"})
+        self.assertIsNotNone(cache.lookup(_cache_state("running shoes marathon training")))
+        self.assertIsNone(cache.lookup(_cache_state("tax deadline in march")))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["semantic_hits"], stats["misses"], stats["stores"]), (1, 1, 1, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 0.6667)
+
+
+class SemanticCacheTests(unittest.TestCase):
+
+    def test_thresholds_are_per_expert(self):
+        cache = SemanticCache(max_entries=8, thresholds={"general_qa": 0.5, "legal_expert": 0.99})
+        for expert in ("general_qa", "legal_expert"):
+            cache.store("can my landlord raise the rent mid lease", expert, "m", {"answer": expert})
+        paraphrase = "can landlord raise rent during lease"
+        self.assertEqual(cache.lookup(paraphrase, "general_qa", "m")["answer"], "general_qa")
+        self.assertIsNone(cache.lookup(paraphrase, "legal_expert", "m"))
+        self.assertIsNone(cache.lookup(paraphrase, "general_qa", "other-model"))
+
+    def test_repeated_store_replaces_the_entry(self):
+        cache = SemanticCache(max_entries=4)
+        for i in range(3):
+            cache.store("same query", "general_qa", "m", {"answer": i})
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.lookup("same query", "general_qa", "m")["answer"], 2)
+
+    def test_full_cache_evicts_least_recently_used_and_expired_rows_miss(self):
+        cache = SemanticCache(max_entries=2)
+        cache.store("alpha query", "general_qa", "m", {"answer": "alpha"})
+        cache.store("beta query", "general_qa", "m", {"answer": "beta"})
+        cache.lookup("alpha query", "general_qa", "m")
+        cache.store("gamma query", "general_qa", "m", {"answer": "gamma"})
+        self.assertEqual(cache.evictions, 1)
+        self.assertIsNone(cache.lookup("beta query", "general_qa", "m"))
+        self.assertEqual(cache.lookup("alpha query", "general_qa", "m")["answer"], "alpha")
+
+        expired = SemanticCache(max_entries=2, ttl=-1)
+        expired.store("alpha query", "general_qa", "m", {"answer": "alpha"})
+        self.assertIsNone(expired.lookup("alpha query", "general_qa", "m"))
+
+
+class StepResultMemoTests(unittest.TestCase):
+
+    def test_failed_step_is_never_executed_concurrently(self):
+        memo = StepResultMemo()
+        running, overlaps, calls = [0], [], []
+        guard = threading.Lock()
+
+        def execute():
+            with guard:
+                running[0] += 1
+                overlaps.append(running[0])
+                calls.append(1)
+            time.sleep(0.02)
+            with guard:
+                running[0] -= 1
+            return "FAILURE: upstream down"  # never stored, so every caller executes
+
+        threads = [threading.Thread(target=memo.run, args=("step", {}, execute)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 8)
+        self.assertEqual(max(overlaps), 1)
+        self.assertEqual(memo._key_locks, {})
+
+
+class SpeculativeEngineTests(unittest.TestCase):
+
+    def _engine(self, **kwargs):
+        def run_task(task):
+            if task.startswith("bad"):
+                raise ValueError(task)
+            return task.upper()
+        engine = SpeculativeEngine(run_task, **kwargs)
+        self.addCleanup(engine.close)
+        return engine
+
+    def _wait(self, engine, speculation_id, count):
+        deadline = time.monotonic() + 5
+        while len(engine.results(speculation_id)) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_only_successful_results_are_hits_and_each_is_consumed_once(self):
+        engine = self._engine()
+        engine.launch("s1", ["good", "bad"])
+        self._wait(engine, "s1", 2)
+        self.assertEqual(engine.use("s1", "good"), "SUCCESS: GOOD")
+        self.assertIsNone(engine.use("s1", "good"))
+        self.assertIsNone(engine.use("s1", "bad"))
+        stats = engine.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_old_speculation_ids_are_evicted(self):
+        engine = self._engine(max_ids=2)
+        for i in range(5):
+            engine.launch(f"s{i}", [f"task {i}"])
+            self._wait(engine, f"s{i}", 1)
+        self.assertEqual(engine.results("s0"), {})
+        self.assertEqual(engine.results("s4"), {"task 4": "SUCCESS: TASK 4"})
+        self.assertLessEqual(len(engine._results), 2)
+        self.assertEqual(engine.stats()["evicted"], 3)
+
+    def test_in_flight_task_is_awaited_instead_of_missed(self):
+        def run_task(task):
+            time.sleep(float(task))
+            return "done"
+        engine = SpeculativeEngine(run_task, task_timeout=5)
+        self.addCleanup(engine.close)
+        engine.launch("s1", ["0.2", "3"])
+        self.assertEqual(engine.use("s1", "0.2"), "SUCCESS: done")
+        self.assertIsNone(engine.use("s1", "3", timeout=0.05))
+        stats = engine.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["pending"]), (1, 0, 1))
+
+
+class AuditLogWriterTests(unittest.TestCase):
+
+    def _writer(self, **kwargs):
+        workdir = tempfile.mkdtemp()
+        writer = audit_log.AuditLogWriter(db_path=os.path.join(workdir, "audit.sqlite3"), **kwargs)
+        self.addCleanup(writer.close)
+        return writer
+
+    def test_failed_batch_is_retried_not_dropped(self):
+        writer = self._writer(flush_interval=0.01)
+        real_write_batch = audit_log.write_batch
+        failures = iter([ValueError("disk full"), ValueError("disk full")])
+
+        def flaky_write_batch(conn, entries):
+            error = next(failures, None)
+            if error is not None:
+                raise error
+            return real_write_batch(conn, entries)
+
+        with mock.patch.object(audit_log, "write_batch", flaky_write_batch):
+            for i in range(5):
+                writer.submit("EVENT", {"i": i})
+            self.assertTrue(writer.flush(timeout=10))
+        self.assertEqual(writer.written, 5)
+        self.assertEqual(writer.failed_attempts, 2)
+        report = audit_log.verify_chain(writer.db_path)
+        self.assertTrue(report["ok"])
+        self.assertEqual(report["entries"], 5)
+
+    def test_flush_and_submit_fail_fast_once_closed(self):
+        writer = self._writer()
+        writer.submit("EVENT", {})
+        writer.close()
+        started = time.monotonic()
+        self.assertFalse(writer.flush())
+        self.assertLess(time.monotonic() - started, 1.0)
+        with self.assertRaises(RuntimeError):
+            writer.submit("EVENT", {})
+
+
+class RunToolCallsTests(unittest.TestCase):
+
+    class _Tool:
+        def __init__(self, latency):
+            self.latency = latency
+
+        def invoke(self, args):
+            time.sleep(self.latency)
+            return f"done {args['q']}"
+
+    def test_hung_tools_do_not_block_later_calls(self):
+        tool_map = {"hung": self._Tool(1.0), "fast": self._Tool(0.0)}
+        hung_calls = [{"name": "hung", "args": {"q": i}, "id": f"h{i}"} for i in range(20)]
+        results = run_tool_calls(hung_calls, tool_map, timeout=0.05)
+        self.assertTrue(all("timed out" in r["content"] for r in results))
+
+        started = time.monotonic()
+        results = run_tool_calls([{"name": "fast", "args": {"q": "x"}, "id": "f1"}], tool_map, timeout=0.5)
+        self.assertEqual(results[0]["content"], "done x")
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_duplicate_and_missing_ids_keep_their_own_results(self):
+        tool_map = {"fast": self._Tool(0.0)}
+        calls = [{"name": "fast", "args": {"q": "a"}, "id": "same"},
+                 {"name": "fast", "args": {"q": "b"}, "id": "same"},
+                 {"name": "fast", "args": {"q": "c"}, "id": None},
+                 {"name": "fast", "args": {"q": "d"}}]
+        results = run_tool_calls(calls, tool_map, timeout=1.0)
+        self.assertEqual([r["content"] for r in results], ["done a", "done b", "done c", "done d"])
+        self.assertEqual([r["tool_call_id"] for r in results], ["same", "same", None, None])
+
+
+class StreamingHasherTests(unittest.TestCase):
+
+    def test_digest_ignores_chunking_but_binds_field_order(self):
+        whole = StreamingHasher().update("answer", "The final answer.").update("expert", "general_qa")
+        chunked = (StreamingHasher().update("answer", "The fin").update("answer", b"al ans")
+                   .update("answer", "wer.").update("expert", "general_qa"))
+        self.assertEqual(whole.hexdigest(), chunked.hexdigest())
+
+        reordered = StreamingHasher().update("expert", "general_qa").update("answer", "The final answer.")
+        self.assertNotEqual(whole.hexdigest(), reordered.hexdigest())
+        # Moving bytes across a field boundary must not collide either
+        shifted = StreamingHasher().update("answer", "The final answer.g").update("expert", "eneral_qa")
+        self.assertNotEqual(whole.hexdigest(), shifted.hexdigest())
+
+
+class FusionWriterTests(unittest.TestCase):
+
+    def test_flush_returns_immediately_after_close(self):
+        writer = fusion_db.FusionDBWriter(db_path=os.path.join(tempfile.mkdtemp(), "fusion.sqlite3"))
+        writer.submit({"block": "A", "expert": "general_qa"})
+        self.assertTrue(writer.flush(timeout=5))
+        writer.close()
+        started = time.monotonic()
+        self.assertFalse(writer.flush())
+        self.assertLess(time.monotonic() - started, 1.0)
+
+
+class FusionCompactTests(unittest.TestCase):
+
+    def test_compact_is_idempotent_and_imports_appended_rows_once(self):
+        workdir = tempfile.mkdtemp()
+        csv_path, db_path = os.path.join(workdir, "fusion.csv"), os.path.join(workdir, "fusion.sqlite3")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write('block,expert,timestamp\n"A, with comma",finance_expert,1.0\nB,legal_expert,2.0\n"A, with comma",finance_expert,3.0\n')
+
+        def occurrences():
+            conn = fusion_db.connect(db_path)
+            try:
+                return sum(row[0] for row in conn.execute("SELECT occurrences FROM block_occurrences"))
+            finally:
+                conn.close()
+
+        self.assertEqual(fusion_db.compact(csv_path, db_path)["rows_imported"], 3)
+        self.assertEqual(fusion_db.compact(csv_path, db_path)["rows_imported"], 0)
+        self.assertEqual(occurrences(), 3)
+
+        with open(csv_path, "a", encoding="utf-8") as f:
+            f.write("C,general_qa,4.0\n")
+        self.assertEqual(fusion_db.compact(csv_path, db_path)["rows_imported"], 1)
+        self.assertEqual(occurrences(), 4)
+
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("block,expert,timestamp\nD,general_qa,5.0\n")
+        with self.assertRaises(ValueError):
+            fusion_db.compact(csv_path, db_path)
+        self.assertEqual(occurrences(), 4)
+
+
+class TrainingQueueSinkTests(unittest.TestCase):
+
+    def test_flush_after_close_and_orphaned_segments_are_rotated(self):
+        directory = tempfile.mkdtemp()
+        # A process that no longer exists left its active segment behind
+        with open(os.path.join(directory, "active-999999999.jsonl"), "w", encoding="utf-8") as f:
+            f.write('{"expert": "general_qa", "prompt": "p0", "ideal_response": "r0", "request_id": null}\n')
+
+        sink = training_queue.TrainingQueueSink(directory=directory)
+        sink.submit({"expert": "general_qa", "prompt": "p1", "ideal_response": "r1", "request_id": None})
+        self.assertTrue(sink.flush(timeout=5))
+        sink.close()
+        started = time.monotonic()
+        self.assertFalse(sink.flush())
+        self.assertLess(time.monotonic() - started, 1.0)
+
+        names = os.listdir(directory)
+        self.assertFalse([n for n in names if n.startswith("active-")])
+        self.assertEqual(len([n for n in names if n.endswith(".jsonl.gz")]), 2)
+        prompts = [r["prompt"] for r in training_queue.iter_training_records(directory, include_legacy=False)]
+        self.assertEqual(prompts, ["p0", "p1"])
+
+
+class HumanApprovalTests(unittest.TestCase):
+
+    def setUp(self):
+        self.saver = SQLCheckpointSaver(db_path=os.path.join(tempfile.mkdtemp(), "checkpoints.sqlite3"),
+                                        gc_interval=0)
+        self.addCleanup(self.saver.close)
+
+    def _gated_graph(self):
+        workflow = StateGraph(AgentState)
+        workflow.add_node("answer", lambda state: {"messages": [AIMessage(content="Buy.", id="a1")],
+                                                   "risk_score": 0.95})
+        workflow.add_node(APPROVAL_NODE, human_approval_gate)
+        workflow.set_entry_point("answer")
+        workflow.add_edge("answer", APPROVAL_NODE)
+        workflow.add_edge(APPROVAL_NODE, END)
+        return workflow.compile(checkpointer=self.saver)
+
+    def test_high_risk_answer_pauses_and_rejection_withholds_it(self):
+        self._gated_graph().invoke({"messages": []}, thread_config("t1"))
+        # A fresh graph over the same saver resumes the run, as another worker would
+        app = self._gated_graph()
+        self.assertEqual(pending_approval(app, "t1")["answer"], "Buy.")
+        final_state = resume_approval(app, "t1", "REJECT")
+        self.assertEqual([m.content for m in final_state["messages"]], [WITHHELD_ANSWER])
+        self.assertIsNone(pending_approval(app, "t1"))
+
+    def test_paused_run_pruned_to_its_last_checkpoint_still_resumes(self):
+        app = self._gated_graph()
+        app.invoke({"messages": []}, thread_config("t2"))
+        self.assertGreater(self.saver.stats()["checkpoints"], 1)
+        self.saver.prune(["t2"])
+        self.assertEqual(self.saver.stats()["checkpoints"], 1)
+        final_state = resume_approval(app, "t2", "APPROVE")
+        self.assertEqual([m.content for m in final_state["messages"]], ["Buy."])
+        self.saver.delete_thread("t2")
+        self.assertEqual(self.saver.stats()["checkpoints"], 0)
+
+    def test_gate_is_wired_only_with_a_checkpointer(self):
+        self.assertNotIn(APPROVAL_NODE, create_cognito_omega_graph(NODE_MAP, instrument=False).nodes)
+        served = create_cognito_omega_graph(NODE_MAP, instrument=False, checkpointer=self.saver)
+        self.assertIn(APPROVAL_NODE, served.nodes)
+
+
+class ParseChoiceTests(unittest.TestCase):
+
+    def test_only_the_leading_token_is_a_verdict(self):
+        actions = ["APPROVE", "FLAG_AND_REJECT", "REWRITE_SAFE"]
+        self.assertEqual(parse_choice("**flag_and_reject**: leaks PII", actions), "FLAG_AND_REJECT")
+        self.assertEqual(parse_choice(AIMessage(content=" APPROVE. Compliant."), actions), "APPROVE")
+        self.assertIsNone(parse_choice("I cannot APPROVE this; FLAG_AND_REJECT", actions))
+        self.assertIsNone(parse_choice("", actions))
+
+
+class LoopLocalAsyncClientTests(unittest.TestCase):
+
+    def test_each_event_loop_gets_its_own_pool(self):
+        import httpx
+        client = LoopLocalAsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, text="ok")))
+
+        async def call():
+            response = await client.get("http://llm.invalid/")
+            return response.text, client._loop_client()
+
+        loops = [asyncio.new_event_loop(), asyncio.new_event_loop()]
+        for loop in loops:
+            self.addCleanup(loop.close)
+        (text_a, pool_a), (text_b, pool_b) = [loop.run_until_complete(call()) for loop in loops]
+        self.assertEqual((text_a, text_b), ("ok", "ok"))
+        self.assertIsNot(pool_a, pool_b)
+        self.assertIs(loops[0].run_until_complete(call())[1], pool_a)
+
+
+class MetricsTests(unittest.TestCase):
+
+    def test_quantiles_use_a_periodically_refreshed_sorted_copy(self):
+        histogram = LatencyHistogram()
+        for i in range(200):
+            histogram.observe(i / 1000)
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.099)
+        with mock.patch("builtins.sorted", side_effect=AssertionError("re-sorted")):
+            histogram.observe(1.0)
+            histogram.quantile(0.5)  # one new sample: served from the cached copy
+        for _ in range(QUANTILE_REFRESH_SAMPLES):
+            histogram.observe(1.0)
+        self.assertGreater(histogram.quantile(0.5), 0.099)
+
+    def test_counters_have_help_and_type(self):
+        registry = MetricsRegistry()
+        registry.inc("cognito_signatures_total", mode="batched")
+        registry.inc("cognito_signatures_total", mode="per_response")
+        text = registry.render_prometheus([("cognito_response_cache_misses_total", {}, 3)])
+        self.assertEqual(text.count("# TYPE cognito_signatures_total counter"), 1)
+        self.assertIn("# HELP cognito_response_cache_misses_total", text)
+        self.assertIn("# TYPE cognito_response_cache_misses_total counter\ncognito_response_cache_misses_total 3", text)
+
+
+class HistoryWindowTests(unittest.TestCase):
+
+    def test_window_fits_budget_with_the_regenerated_summary(self):
+        manager = HistoryManager(max_tokens=300, summary_max_tokens=200)
+        messages = [HumanMessage(content="request", id="m0")]
+        messages += [AIMessage(content=f"turn {i} " + "word " * 30, id=f"m{i}") for i in range(1, 20)]
+        window = manager.window(messages, summary="- ai: earlier turn")
+        self.assertIsInstance(window[1], SystemMessage)
+        self.assertLessEqual(sum(message_tokens(m) for m in window), 300)
+
+    def test_token_count_cache_does_not_keep_texts(self):
+        text = "tool output " * 10000
+        self.assertEqual(count_tokens(text), count_tokens(text))
+        self.assertTrue(all(isinstance(key, bytes) and len(key) == 16 for key in history._TOKEN_COUNTS))
+
+
+class MCTSPlannerTests(unittest.TestCase):
+
+    def test_concurrent_plans_on_one_planner_are_serialized(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from mcts_planner.mcts_engine import MCTS_ROLLOUT_WORKERS, MCTSPlanner, default_step_catalogue
+
+        self.assertEqual(MCTS_ROLLOUT_WORKERS, 0)  # no process pool forked from a server by default
+        catalogue = default_step_catalogue("growth rate")
+        planner = MCTSPlanner(seed=0)
+        with ThreadPoolExecutor(4) as pool:
+            plans = list(pool.map(lambda _: planner.plan("growth rate", catalogue, budget_ms=30)[0], range(8)))
+        for plan in plans:
+            self.assertEqual(catalogue[plan[-1]].agent_name, "FinalSynthesizer")
+            self.assertEqual(len(plan), len(set(plan)))
+
+
+if __name__ == "__main__":
+    unittest.main()
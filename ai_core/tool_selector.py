@@ -2,6 +2,8 @@
 
 from typing import List, Literal
 from langchain_core.pydantic_v1 import BaseModel, Field
+from .llm_batching import batched_llm, parse_choice
+from .llm_registry import MODERATOR
 
 # Define the Tool Groups (must map to your code's tool collections)
 class ToolGroups(BaseModel):
@@ -17,8 +19,13 @@ TOOL_MAPPING = {
     "GENERAL_RESEARCH": ["web_search", "rag_retriever"]
 }
 
-# Assume a fast, small LLM for this classification task
-SELECTOR_LLM = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.0) 
+# Assume a fast, small LLM for this classification task (concurrent requests are micro-batched)
+SELECTOR_LLM = batched_llm(MODERATOR) 
+SELECTOR_PROMPT = (
+    "Analyze the user query and classify it into one of the following domains: {domains}.\n"
+    "Query: {query}\n"
+    "Answer with the domain name only."
+)
 
 def tool_selector_node(state: AgentState) -> AgentState:
     """
@@ -26,15 +33,22 @@ def tool_selector_node(state: AgentState) -> AgentState:
     """
     user_query = state["user_query"]
     
-    # LLM Prompt: "Analyze the user query and classify it into one of the following domains: [List Domains]. Use the Pydantic schema."
+    # Classification call: concurrent requests are sent as one batch, identical queries share a call
+    prompt = SELECTOR_PROMPT.format(domains=", ".join(TOOL_MAPPING), query=user_query)
+    try:
+        selected_group = parse_choice(SELECTOR_LLM.invoke(prompt), list(TOOL_MAPPING))
+    except Exception as e:
+        print(f"**Tool Selector:** Classification LLM failed ({e}); using keyword classification.")
+        selected_group = None
     
-    # Mock ToolGroup classification for illustration:
-    if "email" in user_query.lower() or "send message" in user_query.lower():
-        selected_group = "EMAIL_COMMUNICATION"
-    elif "stock" in user_query.lower() or "risk" in user_query.lower():
-        selected_group = "FINANCE_ANALYSIS"
-    else:
-        selected_group = "GENERAL_RESEARCH" # Default to a safe set
+    # Keyword classification when the LLM is unavailable or names no domain:
+    if selected_group is None:
+        if "email" in user_query.lower() or "send message" in user_query.lower():
+            selected_group = "EMAIL_COMMUNICATION"
+        elif "stock" in user_query.lower() or "risk" in user_query.lower():
+            selected_group = "FINANCE_ANALYSIS"
+        else:
+            selected_group = "GENERAL_RESEARCH" # Default to a safe set
 
     # Map the group to the list of tool names
     selected_tool_names = TOOL_MAPPING.get(selected_group, TOOL_MAPPING["GENERAL_RESEARCH"])
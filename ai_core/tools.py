@@ -1,10 +1,17 @@
 # D:\cognito_ai_assistant\ai_core\tools.py
 
+import asyncio
 import hashlib
+import hmac
+import os
 import time
-import pandas as pd
 import json
-from typing import Dict, Any, List
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, List, Optional, Union
+
+from .fusion_db import get_fusion_writer
+from .training_queue import RECORD_FIELDS, get_training_sink
 
 # --- SECURITY CONSTANTS ---
 # WARNING: These are MOCK values. For production, use secure key management and DID services.
@@ -13,20 +20,73 @@ PUBLIC_DID = "did:cognito:omega:v1:0xFinalTrustedAI"
 
 # --- SECURITY FUNCTIONS ---
 
-def sign_data_with_did(data_to_sign: str) -> str:
-    """Simulates cryptographic signing of data using the system's DID private key."""
+HASH_CHUNK_CHARS = 64 * 1024  # text is encoded and hashed in slices, never as one full copy
+
+class StreamingHasher:
+    """
+    Incremental SHA-256 over named fields, fed as message contents and fields are produced.
+    Nothing is concatenated or re-serialized: each field has its own running hash (so the
+    digest does not depend on how a field was chunked), and the final digest binds the
+    field names, their order and their hashes.
+    """
+
+    def __init__(self, domain: str = "cognito-omega-v1"):
+        self._domain = domain
+        self._fields: Dict[str, Any] = {}
+
+    def update(self, field: str, value: Any) -> "StreamingHasher":
+        """Feeds (more of) a field: str/bytes content as-is, other values as compact JSON."""
+        hasher = self._fields.get(field)
+        if hasher is None:
+            hasher = self._fields[field] = hashlib.sha256()
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            hasher.update(value)
+            return self
+        text = value if isinstance(value, str) else json.dumps(value, default=str)
+        for start in range(0, len(text), HASH_CHUNK_CHARS):
+            hasher.update(text[start:start + HASH_CHUNK_CHARS].encode('utf-8'))
+        return self
+
+    def copy(self) -> "StreamingHasher":
+        clone = StreamingHasher(self._domain)
+        clone._fields = {name: hasher.copy() for name, hasher in self._fields.items()}
+        return clone
+
+    def digest(self) -> bytes:
+        outer = hashlib.sha256(self._domain.encode('utf-8'))
+        for name, hasher in self._fields.items():
+            outer.update(b"\x00" + name.encode('utf-8') + b"\x00" + hasher.digest())
+        return outer.digest()
+
+    def hexdigest(self) -> str:
+        return self.digest().hex()
+
+def _signature_base(data: Union[str, StreamingHasher]) -> str:
+    # Add the private key to the data being hashed to simulate a secure signature mechanism;
+    # a StreamingHasher is signed through its digest, so the payload is never copied
+    if isinstance(data, StreamingHasher):
+        return hashlib.sha256((data.hexdigest() + PRIVATE_KEY).encode('utf-8')).hexdigest()
+    return hashlib.sha256((data + PRIVATE_KEY).encode('utf-8')).hexdigest()
+
+def sign_data_with_did(data_to_sign: Union[str, StreamingHasher]) -> str:
+    """Simulates cryptographic signing of data (or a StreamingHasher's digest) using the system's DID private key."""
     # In a real system, this uses secure hardware/software modules for signing.
-    
-    hasher = hashlib.sha256()
-    # Add the private key to the data being hashed to simulate a secure signature mechanism
-    hasher.update((data_to_sign + PRIVATE_KEY).encode('utf-8')) 
-    signature_base = hasher.hexdigest()
+    signature_base = _signature_base(data_to_sign)
     
     signature = f"SIGNED_BY:{PUBLIC_DID}|TIMESTAMP:{time.time()}|HASH:{signature_base}"
     return signature
 
-def calculate_verifiable_hash(data: str) -> str:
-    """Calculates a secure, tamper-evident hash for the audit log."""
+def verify_did_signature(data: Union[str, StreamingHasher], signature: str) -> bool:
+    """Checks a signature produced by sign_data_with_did (the mock recomputes the keyed hash)."""
+    fields = dict(part.split(":", 1) for part in signature.split("|") if ":" in part)
+    if fields.get("SIGNED_BY") != PUBLIC_DID:
+        return False
+    return hmac.compare_digest(fields.get("HASH", ""), _signature_base(data))
+
+def calculate_verifiable_hash(data: Union[str, StreamingHasher]) -> str:
+    """Calculates a secure, tamper-evident hash for the audit log (a StreamingHasher is just finalized)."""
+    if isinstance(data, StreamingHasher):
+        return data.hexdigest()
     hasher = hashlib.sha256()
     hasher.update(data.encode('utf-8'))
     return hasher.hexdigest()
@@ -34,33 +94,31 @@ def calculate_verifiable_hash(data: str) -> str:
 # --- AUTONOMOUS LEARNING STORAGE ---
 
 def save_fusion_block(fusion_data: Dict[str, Any]):
-    """Saves the Fusion Block to FusionDB (simulated as a CSV)."""
+    """Saves the Fusion Block to FusionDB (buffered; a background thread writes batches to SQLite)."""
     try:
-        df = pd.DataFrame([fusion_data])
-        
-        # Check if the file exists and is not empty to avoid writing header multiple times
-        try:
-            with open("fusion_db.csv", 'r') as f:
-                content = f.read(1)
-                header = False if content else True
-        except FileNotFoundError:
-            header = True
-
-        df.to_csv("fusion_db.csv", mode='a', header=header, index=False)
-        print("🧠 [TOOL] Fusion Block saved to fusion_db.csv.")
+        get_fusion_writer().submit(fusion_data)
     except Exception as e:
         # Graceful failure on logging/storage errors
         print(f"Error saving fusion block: {e}")
     
-def log_training_script(script_data: str):
-    """Logs the autonomous training script for future fine-tuning."""
+def log_training_script(record: Dict[str, Any]):
+    """Logs an autonomous training record (expert, prompt, ideal response, request id) for future fine-tuning."""
     try:
-        with open("autonomous_training_queue.txt", "a") as f:
-            f.write(script_data + "\n---\n")
-        print("✨ [TOOL] Autonomous Training Script logged.")
+        entry = {field: record.get(field) for field in RECORD_FIELDS}
+        entry["timestamp"] = record.get("timestamp", time.time())
+        get_training_sink().submit(entry)
     except Exception as e:
         print(f"Error logging training script: {e}")
 
+# Async variants so graph.ainvoke never blocks the event loop on storage I/O
+async def asave_fusion_block(fusion_data: Dict[str, Any]):
+    # Only enqueues into the FusionDB buffer, so no thread hop is needed
+    save_fusion_block(fusion_data)
+
+async def alog_training_script(record: Dict[str, Any]):
+    # Only enqueues into the training queue sink, so no thread hop is needed
+    log_training_script(record)
+
 # --- EXTERNAL TOOL MOCKS (Simulating APIs/Databases) ---
 
 def mock_external_search(query: str) -> str:
@@ -77,4 +135,83 @@ def mock_legal_database(query: str) -> str:
 
 def mock_fitness_tracker(query: str) -> str:
     """Mock fitness tracking data retrieval."""
-    return f"Fitness Data: Calorie burn target reached. Personalized plan updated."
\ No newline at end of file
+    return f"Fitness Data: Calorie burn target reached. Personalized plan updated."
+
+# --- TOOL DISPATCH ---
+
+# Maps the ToolCall.tool_name emitted by the experts to its implementation (unknown names fall back to search)
+TOOL_REGISTRY = {
+    "finance": mock_finance_api,
+    "legal": mock_legal_database,
+    "fitness": mock_fitness_tracker,
+    "search": mock_external_search,
+}
+
+def run_tool(tool_name: str, query: str) -> str:
+    """Executes a registered tool synchronously."""
+    return TOOL_REGISTRY.get(tool_name, mock_external_search)(query)
+
+async def arun_tool(tool_name: str, query: str) -> str:
+    """Executes a registered tool in a worker thread (external APIs are blocking clients)."""
+    return await asyncio.to_thread(run_tool, tool_name, query)
+
+# --- PARALLEL TOOL CALLS ---
+
+TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT", "30"))  # seconds per tool call
+TOOL_CALL_MAX_THREADS = int(os.getenv("TOOL_CALL_MAX_THREADS", "64"))  # live tool threads, hung ones included
+
+# Every call gets its own daemon thread instead of a pooled worker: a tool that hangs past its
+# timeout only ties up its own thread (which is not joined at interpreter exit), never a worker
+# that later calls would queue behind. The semaphore caps how many such threads may be alive;
+# beyond it new calls fail fast.
+_TOOL_CALL_THREADS = threading.BoundedSemaphore(TOOL_CALL_MAX_THREADS)
+
+def _start_tool_call(func: Any, args: Any) -> Future:
+    future: Future = Future()
+    if not _TOOL_CALL_THREADS.acquire(blocking=False):
+        future.set_exception(RuntimeError(
+            f"{TOOL_CALL_MAX_THREADS} tool calls still running (hung calls included); try again later."))
+        return future
+
+    def target() -> None:
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(args))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            _TOOL_CALL_THREADS.release()
+
+    threading.Thread(target=target, name="tool-call", daemon=True).start()
+    return future
+
+def run_tool_calls(tool_calls: List[Dict[str, Any]], tool_map: Dict[str, Any],
+                   timeout: float = TOOL_CALL_TIMEOUT) -> List[Dict[str, str]]:
+    """
+    Runs independent LLM tool calls ({'name', 'args', 'id'}) concurrently.
+    Returns one {'tool_call_id', 'name', 'content'} per call in the order of tool_calls,
+    whatever order they finish in. Unknown tools, exceptions and timeouts (counted from
+    submission) become error strings for that call only.
+    """
+    # One future per position: ids may repeat or be missing, so they cannot key the calls
+    futures: List[Optional[Future]] = []
+    for tool_call in tool_calls:
+        tool_func = tool_map.get(tool_call["name"])
+        futures.append(_start_tool_call(tool_func.invoke, tool_call["args"]) if tool_func is not None else None)
+
+    deadline = time.monotonic() + timeout
+    results = []
+    for tool_call, future in zip(tool_calls, futures):
+        if future is None:
+            content = f"TOOL ERROR: Unknown tool '{tool_call['name']}'."
+        else:
+            try:
+                content = str(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeoutError:
+                # The thread cannot be interrupted; its late result is ignored
+                content = f"TOOL EXECUTION ERROR: '{tool_call['name']}' timed out after {timeout:.1f}s."
+            except Exception as e:
+                content = f"TOOL EXECUTION ERROR: {str(e)}"
+        results.append({"tool_call_id": tool_call.get("id"), "name": tool_call["name"], "content": content})
+    return results
@@ -0,0 +1,249 @@
+# D:\cognito_ai_assistant\ai_core\training_queue.py
+
+import argparse
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+# --- 1. CONFIGURATION ---
+
+# Each process appends JSONL to its own active segment; full segments are rotated and gzip-compressed
+TRAINING_QUEUE_DIR = os.getenv("TRAINING_QUEUE_DIR", "training_queue")
+TRAINING_SEGMENT_BYTES = int(os.getenv("TRAINING_SEGMENT_BYTES", str(8 * 1024 * 1024)))
+TRAINING_FLUSH_INTERVAL = float(os.getenv("TRAINING_FLUSH_INTERVAL", "1.0"))  # seconds
+TRAINING_MAX_PENDING = int(os.getenv("TRAINING_MAX_PENDING", "10000"))
+
+# Pre-JSONL file written with '---' separators, still readable by iter_training_records
+LEGACY_QUEUE_PATH = "autonomous_training_queue.txt"
+LEGACY_PATTERN = re.compile(r"TRAINING PROMPT \(Expert: (?P<expert>[^)]*)\): (?P<prompt>.*?) \| IDEAL RESPONSE: (?P<ideal>.*)")
+
+RECORD_FIELDS = ("expert", "prompt", "ideal_response", "request_id")
+
+# --- 2. BACKGROUND SINK ---
+
+_FLUSH = object()
+_STOP = object()
+
+class TrainingQueueSink:
+    """
+    Writes training records as JSONL from a background thread.
+    The active segment is rotated once it exceeds segment_bytes and the closed
+    segment is compressed to .jsonl.gz, so the queue never grows as one file.
+    close() rotates the active segment too, and on start the sink adopts (rotates) the
+    active segments of processes that died without closing.
+    """
+
+    def __init__(self, directory: str = TRAINING_QUEUE_DIR, segment_bytes: int = TRAINING_SEGMENT_BYTES,
+                 flush_interval: float = TRAINING_FLUSH_INTERVAL, max_pending: int = TRAINING_MAX_PENDING):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.active_path = os.path.join(directory, f"active-{os.getpid()}.jsonl")
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="training-queue-sink", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        """Enqueues a record without touching the disk (called on the request path)."""
+        if self._closed:
+            raise RuntimeError("Training queue sink is closed.")
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            print("Error logging training script: training queue buffer is full, record dropped.")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until every record submitted so far is written. Returns False on timeout, and
+        immediately if the sink is closed or its thread has stopped (nothing would answer).
+        """
+        if self._closed or not self._thread.is_alive():
+            return False
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put((_FLUSH, done), timeout=timeout)
+        except queue.Full:
+            return False
+        while not done.wait(0.1):
+            if not self._thread.is_alive() or (deadline is not None and time.monotonic() >= deadline):
+                return done.is_set()
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Writes pending records and stops the sink thread (registered with atexit)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._adopt_orphans()
+        while True:
+            item = self._queue.get()
+            batch: List[Dict[str, Any]] = []
+            control = []
+
+            # Drain whatever else is queued (up to flush_interval) so one write() covers many records
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, dict):
+                    batch.append(item)
+                else:
+                    control.append(item)
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write_batch(batch)
+            for item in control:
+                if item is _STOP:
+                    # A clean shutdown leaves no active segment behind
+                    self._rotate_safely(self.active_path)
+                    return
+                item[1].set()
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in batch)
+            with open(self.active_path, "a", encoding="utf-8") as f:
+                f.write(payload)
+                size = f.tell()
+            print(f"✨ [TOOL] {len(batch)} Autonomous Training Script(s) logged.")
+            if size >= self.segment_bytes:
+                self._rotate(self.active_path)
+        except Exception as e:
+            print(f"Error logging training script: {e}")
+
+    def _adopt_orphans(self) -> None:
+        """Rotates active segments left by processes that exited without close() (crash, SIGKILL)."""
+        for path in glob.glob(os.path.join(self.directory, "active-*.jsonl")):
+            match = re.fullmatch(r"active-(\d+)\.jsonl", os.path.basename(path))
+            if match and int(match[1]) != os.getpid() and not _pid_alive(int(match[1])):
+                print(f"✨ [TRAINING QUEUE] Rotating orphaned segment {os.path.basename(path)}.")
+                self._rotate_safely(path)
+
+    def _rotate_safely(self, path: str) -> None:
+        try:
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                self._rotate(path)
+        except Exception as e:
+            print(f"Error rotating training segment {path}: {e}")
+
+    def _rotate(self, path: str) -> None:
+        """Closes an active segment under a time-ordered name and gzip-compresses it."""
+        segment = os.path.join(self.directory, f"segment-{time.time_ns()}-{os.getpid()}.jsonl")
+        os.replace(path, segment)
+        with open(segment, "rb") as src, gzip.open(segment + ".gz.tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(segment + ".gz.tmp", segment + ".gz")
+        os.remove(segment)
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows; open a query handle instead
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+# --- 3. PROCESS-WIDE SINK ---
+
+_SINK: Optional[TrainingQueueSink] = None
+_SINK_LOCK = threading.Lock()
+
+def get_training_sink() -> TrainingQueueSink:
+    """Returns the shared sink, starting its thread on first use."""
+    global _SINK
+    if _SINK is None:
+        with _SINK_LOCK:
+            if _SINK is None:
+                _SINK = TrainingQueueSink()
+                atexit.register(_SINK.close)
+    return _SINK
+
+# --- 4. STREAMING READER ---
+
+def _segment_sort_key(path: str):
+    # Rotated segments carry their rotation time; active segments are the newest data
+    name = os.path.basename(path)
+    if name.startswith("segment-"):
+        return (0, int(name.split("-")[1]))
+    return (1, os.path.getmtime(path))
+
+def iter_legacy_records(path: str = LEGACY_QUEUE_PATH) -> Iterator[Dict[str, Any]]:
+    """Lazily parses the old '---'-separated training file."""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            match = LEGACY_PATTERN.match(line.strip())
+            if match:
+                yield {"expert": match["expert"], "prompt": match["prompt"],
+                       "ideal_response": match["ideal"], "request_id": None}
+
+def iter_training_records(directory: str = TRAINING_QUEUE_DIR, include_legacy: bool = True) -> Iterator[Dict[str, Any]]:
+    """Yields training records oldest-first, one line at a time, across compressed and active segments."""
+    if include_legacy:
+        yield from iter_legacy_records()
+
+    paths = glob.glob(os.path.join(directory, "segment-*.jsonl.gz")) + glob.glob(os.path.join(directory, "active-*.jsonl"))
+    for path in sorted(paths, key=_segment_sort_key):
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+        except FileNotFoundError:
+            # Active segment rotated away while we were listing; its data is in a newer .gz
+            continue
+
+if __name__ == '__main__':
+    # Usage: python -m ai_core.training_queue export finetune.jsonl
+    # Streams every record into chat-format fine-tuning JSONL without loading the queue into memory.
+    parser = argparse.ArgumentParser(description="Training queue utilities.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export", help="Export records as chat fine-tuning JSONL.")
+    export_cmd.add_argument("output")
+    export_cmd.add_argument("--dir", default=TRAINING_QUEUE_DIR)
+    export_cmd.add_argument("--no-legacy", action="store_true")
+    args = parser.parse_args()
+
+    count = 0
+    with open(args.output, "w", encoding="utf-8") as out:
+        for record in iter_training_records(args.dir, include_legacy=not args.no_legacy):
+            out.write(json.dumps({"messages": [
+                {"role": "system", "content": f"You are the Cognito Omega {record['expert']}."},
+                {"role": "user", "content": record["prompt"]},
+                {"role": "assistant", "content": record["ideal_response"]},
+            ]}, ensure_ascii=False) + "\n")
+            count += 1
+    print(f"✨ [TRAINING QUEUE] Exported {count} record(s) to {args.output}.")
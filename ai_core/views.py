@@ -1,30 +1,39 @@
 # D:\cognito_ai_assistant\ai_core\views.py - NEW CORE LOGIC
 
 import json
-import json
+import threading
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 # Use the async decorator for the view
 from django.views.decorators.http import require_http_methods
 from langchain_core.messages import HumanMessage
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
-from langchain_community.llms import HuggingFaceHub
-from langchain_core.messages import HumanMessage
 from langgraph.graph import StateGraph, END
-from .tools import all_tools # Import your tools list
 from .agent_state import AgentState
-from .agent_nodes import execute_agent_or_tool, reflect_and_critique, generate_final_answer
 
 
 # --- Setup LLM and Tool Chain (Re-use from previous step) ---
-# NOTE: Replace with your actual LLM setup (e.g., OpenAI(model="gpt-4o"))
-llm = HuggingFaceHub(
-    repo_id="HuggingFaceH4/zephyr-7b-beta",
-    huggingfacehub_api_token="YOUR_HUGGINGFACE_TOKEN", # Set this token
-    model_kwargs={"temperature": 0.1, "max_length": 1024}
-)
-tool_calling_llm = llm.bind_tools(all_tools)
+# Nothing is built at import: the client and the compiled graph are created on first use
+# and memoized for the life of the process.
+_TOOL_CALLING_LLM = None
+_APP = None
+_INIT_LOCK = threading.Lock()
+
+def get_tool_calling_llm():
+    global _TOOL_CALLING_LLM
+    if _TOOL_CALLING_LLM is None:
+        with _INIT_LOCK:
+            if _TOOL_CALLING_LLM is None:
+                from langchain_community.llms import HuggingFaceHub
+                from .tools import all_tools # Import your tools list
+
+                # NOTE: Replace with your actual LLM setup (e.g., OpenAI(model="gpt-4o"))
+                llm = HuggingFaceHub(
+                    repo_id="HuggingFaceH4/zephyr-7b-beta",
+                    huggingfacehub_api_token="YOUR_HUGGINGFACE_TOKEN", # Set this token
+                    model_kwargs={"temperature": 0.1, "max_length": 1024}
+                )
+                _TOOL_CALLING_LLM = llm.bind_tools(all_tools)
+    return _TOOL_CALLING_LLM
 
 
 # --- Conditional Router Function ---
@@ -50,43 +59,56 @@ def should_continue(state: AgentState) -> str:
 
 
 # --- Build the LangGraph Workflow ---
-workflow = StateGraph(AgentState)
-
-# 1. Add the nodes (actions)
-workflow.add_node("execute", execute_agent_or_tool)
-workflow.add_node("reflect", reflect_and_critique)
-workflow.add_node("final_answer", generate_final_answer)
-
-# 2. Set the entry point
-workflow.set_entry_point("execute")
-
-# 3. Add the conditional edges (the dynamic flow)
-# After execution, either finish or go to reflection
-workflow.add_conditional_edges(
-    "execute", # FROM node
-    should_continue, # The router function
-    {
-        END: END,           # Case 1: Finished immediately
-        "reflect": "reflect" # Case 2: Tool called, must reflect
-    }
-)
-
-# After reflection, either finish (generate answer) or loop back to re-execute
-workflow.add_conditional_edges(
-    "reflect", 
-    should_continue,
-    {
-        "proceed_to_answer": "final_answer", # Case 1: Reflection successful
-        "execute": "execute",                # Case 2: Reflection suggests re-plan/retry
-        "final_answer": "final_answer"       # Case 3: Retry limit reached, just generate best answer
-    }
-)
-
-# After generating the final answer, the graph always ends
-workflow.add_edge("final_answer", END)
-
-# Compile the final application graph
-app = workflow.compile()
+def _build_app():
+    # agent_nodes imports this module for get_tool_calling_llm
+    from .agent_nodes import execute_agent_or_tool, reflect_and_critique, generate_final_answer
+
+    workflow = StateGraph(AgentState)
+
+    # 1. Add the nodes (actions)
+    workflow.add_node("execute", execute_agent_or_tool)
+    workflow.add_node("reflect", reflect_and_critique)
+    workflow.add_node("final_answer", generate_final_answer)
+
+    # 2. Set the entry point
+    workflow.set_entry_point("execute")
+
+    # 3. Add the conditional edges (the dynamic flow)
+    # After execution, either finish or go to reflection
+    workflow.add_conditional_edges(
+        "execute", # FROM node
+        should_continue, # The router function
+        {
+            END: END,           # Case 1: Finished immediately
+            "reflect": "reflect" # Case 2: Tool called, must reflect
+        }
+    )
+
+    # After reflection, either finish (generate answer) or loop back to re-execute
+    workflow.add_conditional_edges(
+        "reflect", 
+        should_continue,
+        {
+            "proceed_to_answer": "final_answer", # Case 1: Reflection successful
+            "execute": "execute",                # Case 2: Reflection suggests re-plan/retry
+            "final_answer": "final_answer"       # Case 3: Retry limit reached, just generate best answer
+        }
+    )
+
+    # After generating the final answer, the graph always ends
+    workflow.add_edge("final_answer", END)
+
+    # Compile the final application graph
+    return workflow.compile()
+
+def get_app():
+    """The compiled agent graph, built on the first request and shared by all later ones."""
+    global _APP
+    if _APP is None:
+        with _INIT_LOCK:
+            if _APP is None:
+                _APP = _build_app()
+    return _APP
 
 
 @csrf_exempt
@@ -108,7 +130,7 @@ def chat_response(request):
 
             # --- Run the Agent Workflow ---
             # app.stream() is better for production, but app.invoke() is simpler for demonstration
-            final_state = app.invoke(initial_state)
+            final_state = get_app().invoke(initial_state)
 
             # The final answer is the content of the last message in the list
             final_response_text = final_state["messages"][-1].content
@@ -124,7 +146,7 @@ def chat_response(request):
 
     return JsonResponse({'response': 'Invalid request method.'}, status=405)
 
-# The setup for llm, tool_calling_llm, workflow, and app remains the same as before
+# The setup for the LLM, tool chain and graph is shared through get_tool_calling_llm() and get_app()
 
 # Use the async decorator and require POST method
 @csrf_exempt
@@ -149,7 +171,7 @@ async def chat_response(request):
 
         # --- Run the Agent Workflow Asynchronously ---
         # Note the 'await' keyword and the use of 'app.ainvoke'
-        final_state = await app.ainvoke(initial_state)
+        final_state = await get_app().ainvoke(initial_state)
 
         # The final answer is the content of the last message in the list
         final_response_text = final_state["messages"][-1].content
@@ -1,40 +1,56 @@
 # D:\cognito_ai_assistant\api_server.py
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Dict, Any, List
-from ai_core.graph import create_cognito_omega_graph, AgentState, NODE_MAP
-from langchain_core.messages import HumanMessage
 from dotenv import load_dotenv
-import os
 
 # --- 1. SETUP ---
+# Load .env before ai_core reads its env-var configuration at import
 load_dotenv()
-# The global graph instance
-try:
-    COGNITO_GRAPH = create_cognito_omega_graph(NODE_MAP)
-except Exception as e:
-    print(f"FATAL ERROR: Could not initialize LangGraph: {e}")
-    COGNITO_GRAPH = None
-    
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from typing import Dict, Any, List, AsyncIterator, Literal, Optional
+from ai_core.graph import get_cognito_omega_graph
+from ai_core.checkpointer import get_checkpointer, thread_config
+from ai_core.human_in_the_loop import apending_approval, aresume_approval
+from ai_core.response_cache import get_response_cache
+from ai_core.metrics import METRICS
+from ai_core.speculative_engine import speculative_engine_stats
+from langchain_core.messages import BaseMessage, HumanMessage
+import json
+import os
+import time
+import uuid
+
 app = FastAPI(title="Cognito Omega AI Service", version="1.0")
 
+# High-risk answers pause for human sign-off: runs are checkpointed under their request_id
+# (COGNITO_CHECKPOINT_* settings) and resumed through /query/{thread_id}/approval
+HUMAN_APPROVAL = os.getenv("COGNITO_HUMAN_APPROVAL", "0") == "1"
+
+def cognito_graph():
+    """The process-wide compiled graph, built on the first request rather than at import."""
+    try:
+        return get_cognito_omega_graph(checkpointer=get_checkpointer() if HUMAN_APPROVAL else None)
+    except Exception as e:
+        # Not memoized on failure, so the next request retries the build
+        print(f"FATAL ERROR: Could not initialize LangGraph: {e}")
+        raise HTTPException(status_code=503, detail="AI Service is not initialized.")
+
 # --- 2. INPUT SCHEMA ---
 class QueryInput(BaseModel):
     """Schema for incoming user queries."""
     raw_user_input: str
     user_id: str = "guest_user" # Important for future user-specific state/memory
 
-# --- 3. API ENDPOINT ---
-@app.post("/query")
-async def run_cognito_query(query_data: QueryInput) -> Dict[str, Any]:
-    """Runs a user query through the Cognito Omega Graph."""
-    
-    if COGNITO_GRAPH is None:
-        raise HTTPException(status_code=503, detail="AI Service is not initialized.")
+class ApprovalInput(BaseModel):
+    """A reviewer's decision on a paused high-risk answer."""
+    decision: Literal["APPROVE", "REJECT"]
 
-    # Initialize the graph state with the required keys
-    initial_state: Dict[str, Any] = {
+# --- 3. STATE HELPERS ---
+def build_initial_state(query_data: QueryInput) -> Dict[str, Any]:
+    """Initialize the graph state with the required keys."""
+    return {
         "messages": [], 
         "raw_user_input": query_data.raw_user_input,
         "agent_reputation": { 
@@ -47,28 +63,200 @@ async def run_cognito_query(query_data: QueryInput) -> Dict[str, Any]:
         "current_model": "gpt-3.5-turbo",
         "risk_score": 0.0, "risk_assessment_report": "",
         "critique_report": "", "fusion_block": "", 
-        "audit_hash": "", "digital_signature": ""
+        "audit_hash": "", "digital_signature": "",
+        "request_id": uuid.uuid4().hex
     }
 
+def run_config(thread_id: str) -> Optional[Dict[str, Any]]:
+    """Checkpointed runs are keyed by thread_id (the request_id); without approval nothing is persisted."""
+    return thread_config(thread_id) if HUMAN_APPROVAL else None
+
+async def paused_approval(graph, thread_id: str) -> Optional[Any]:
+    """
+    The approval payload the run is waiting on, or None if it ran to completion. Only a paused
+    run keeps its checkpoints, pruned to the one it resumes from; a finished run's are deleted.
+    """
+    if not HUMAN_APPROVAL:
+        return None
+    approval = await apending_approval(graph, thread_id)
+    if approval is None:
+        await graph.checkpointer.adelete_thread(thread_id)
+    else:
+        await graph.checkpointer.aprune([thread_id])
+    return approval
+
+def build_pending_response(thread_id: str, approval: Any) -> Dict[str, Any]:
+    """Response for a run paused at the approval gate; the worker is free until it is resumed."""
+    return {"status": "pending_approval", "thread_id": thread_id, "approval": approval}
+
+def build_response(final_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the final answer and audit data from the final graph state."""
+    final_message = final_state.get("messages", [{}])[-1].content
+    return {
+        "status": "success",
+        "thread_id": final_state.get("request_id"),
+        "final_answer": final_message,
+        "audit_hash": final_state.get("audit_hash", "N/A"),
+        "expert_used": final_state.get("target_expert"),
+        "risk_score": final_state.get("risk_score"),
+        "revision_count": final_state.get("revision_count", 0),
+        "model_used": final_state.get("current_model"),
+        "escalated": final_state.get("cascade_escalated", False),
+        "trust_receipt": final_state.get("trust_receipt")
+    }
+
+def _to_jsonable(value: Any) -> Any:
+    """Compact JSON view of a state delta (messages are reduced to type + content)."""
+    if isinstance(value, BaseMessage):
+        return {"type": value.type, "content": value.content}
+    if isinstance(value, dict):
+        return {k: _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# --- 4. API ENDPOINTS ---
+@app.post("/query")
+async def run_cognito_query(query_data: QueryInput) -> Dict[str, Any]:
+    """Runs a user query through the Cognito Omega Graph."""
+    
+    graph = cognito_graph()
+    initial_state = build_initial_state(query_data)
+    thread_id = initial_state["request_id"]
+
     try:
-        # Run the entire graph
-        final_state = COGNITO_GRAPH.invoke(initial_state)
-        
-        # Extract the final answer and audit data
-        final_message = final_state.get("messages", [{}])[-1].content
-        audit_hash = final_state.get("audit_hash", "N/A")
-        
-        return {
-            "status": "success",
-            "final_answer": final_message,
-            "audit_hash": audit_hash,
-            "expert_used": final_state.get("target_expert"),
-            "risk_score": final_state.get("risk_score")
-        }
+        # Run the entire graph without blocking the event loop (I/O nodes are awaited,
+        # remaining sync nodes are dispatched to LangGraph's executor)
+        started = time.perf_counter()
+        final_state = await graph.ainvoke(initial_state, run_config(thread_id))
+        approval = await paused_approval(graph, thread_id)
+        if approval is not None:
+            return build_pending_response(thread_id, approval)
+        METRICS.observe_request(final_state.get("target_expert"), time.perf_counter() - started)
+        return build_response(final_state)
         
     except Exception as e:
         print(f"Graph Execution Error: {e}")
         raise HTTPException(status_code=500, detail=f"AI execution error: {str(e)}")
 
-# --- 4. START THE SERVER (Local Testing Command) ---
+async def stream_cognito_events(initial_state: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    Yields SSE frames while the graph runs:
+      event: node  -> {"node", "elapsed_ms", "delta"} as each node completes
+      event: token -> {"node", "token"} for every chat-model token streamed inside a node
+      event: final -> the same payload /query returns
+      event: pending_approval -> the same payload /query returns for a paused run
+      event: error -> {"detail"} if execution fails
+    """
+    node_started: Dict[str, float] = {}
+    request_started = time.perf_counter()
+    graph = cognito_graph()
+    thread_id = initial_state["request_id"]
+    try:
+        async for event in graph.astream_events(initial_state, run_config(thread_id), version="v2"):
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+
+            # Node-level runs are direct children of the graph run and carry the node's name
+            is_node_run = node is not None and event["name"] == node and len(event.get("parent_ids", [])) == 1
+
+            if kind == "on_chain_start" and is_node_run:
+                node_started[event["run_id"]] = time.perf_counter()
+            elif kind == "on_chain_end" and is_node_run:
+                started = node_started.pop(event["run_id"], time.perf_counter())
+                yield _sse("node", {
+                    "node": node,
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "delta": _to_jsonable(event["data"].get("output")),
+                })
+            elif kind == "on_chat_model_stream":
+                # LangChain streams chat models automatically under astream_events, so experts
+                # that call llm.invoke/ainvoke surface their tokens here without extra wiring
+                token = event["data"]["chunk"].content
+                if token:
+                    yield _sse("token", {"node": node, "token": token})
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                # A run paused at the approval gate also ends here, with a partial state
+                approval = await paused_approval(graph, thread_id)
+                if approval is not None:
+                    yield _sse("pending_approval", build_pending_response(thread_id, approval))
+                    continue
+                final_state = event["data"]["output"]
+                METRICS.observe_request(final_state.get("target_expert"), time.perf_counter() - request_started)
+                yield _sse("final", build_response(final_state))
+
+    except Exception as e:
+        print(f"Graph Execution Error: {e}")
+        yield _sse("error", {"detail": f"AI execution error: {str(e)}"})
+
+@app.post("/query/stream")
+async def stream_cognito_query(query_data: QueryInput) -> StreamingResponse:
+    """Runs a user query through the graph, streaming per-node progress as Server-Sent Events."""
+
+    cognito_graph()  # build (or fail with 503) before the stream starts
+
+    return StreamingResponse(
+        stream_cognito_events(build_initial_state(query_data)),
+        media_type="text/event-stream",
+        # Disable proxy buffering (ALB/nginx) so events reach the client as they are produced
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/query/{thread_id}/approval")
+async def get_pending_approval(thread_id: str) -> Dict[str, Any]:
+    """The high-risk answer a paused run is waiting on (404 if the thread is not paused)."""
+    graph = cognito_graph()
+    approval = await paused_approval(graph, thread_id)
+    if approval is None:
+        raise HTTPException(status_code=404, detail="No run is waiting for approval under this thread_id.")
+    return build_pending_response(thread_id, approval)
+
+@app.post("/query/{thread_id}/approval")
+async def resume_cognito_query(thread_id: str, approval_data: ApprovalInput) -> Dict[str, Any]:
+    """Resumes a paused run from its checkpoint (on any worker) with the reviewer's decision."""
+    graph = cognito_graph()
+    if await paused_approval(graph, thread_id) is None:
+        raise HTTPException(status_code=404, detail="No run is waiting for approval under this thread_id.")
+
+    try:
+        final_state = await aresume_approval(graph, thread_id, approval_data.decision)
+        approval = await paused_approval(graph, thread_id)
+        if approval is not None:
+            return build_pending_response(thread_id, approval)
+        return build_response(final_state)
+
+    except Exception as e:
+        print(f"Graph Execution Error: {e}")
+        raise HTTPException(status_code=500, detail=f"AI execution error: {str(e)}")
+
+@app.get("/cache/stats")
+async def response_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the response cache in this worker."""
+    return get_response_cache().stats()
+
+@app.get("/speculative/stats")
+async def speculative_stats() -> Dict[str, Any]:
+    """Speculative execution counters and hit rate in this worker (empty until speculation starts)."""
+    return speculative_engine_stats() or {}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    """Prometheus scrape endpoint: per-node/per-expert latency histograms, revision loops, cache counters."""
+    cache = get_response_cache().stats()
+    cache_counters = [
+        ("cognito_response_cache_hits_total", {"kind": "exact"}, cache["hits"]),
+        ("cognito_response_cache_hits_total", {"kind": "semantic"}, cache["semantic_hits"]),
+        ("cognito_response_cache_misses_total", {}, cache["misses"]),
+    ]
+    return PlainTextResponse(
+        METRICS.render_prometheus(cache_counters),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+# --- 5. START THE SERVER (Local Testing Command) ---
 # To run locally: uvicorn api_server:app --host 0.0.0.0 --port 8000
\ No newline at end of file
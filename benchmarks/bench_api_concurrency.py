@@ -0,0 +1,61 @@
+# D:\cognito_ai_assistant\benchmarks\bench_api_concurrency.py
+"""
+Load test for the FastAPI /query endpoint: N concurrent clients against the in-process ASGI app.
+Tools are replaced by a blocking stub (--tool-latency seconds) to stand in for real external APIs,
+so throughput should grow with concurrency instead of serializing on the event loop.
+Run from the project root:  python benchmarks/bench_api_concurrency.py --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ai_core import tools  # noqa: E402
+import api_server  # noqa: E402
+
+# "latest data" makes every expert emit a tool call, so each request pays the tool latency
+QUERY = {"raw_user_input": "What is the latest data on renewable energy adoption?"}
+
+
+async def _run(concurrency: int, requests_per_client: int) -> float:
+    transport = httpx.ASGITransport(app=api_server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+
+        async def worker() -> None:
+            for _ in range(requests_per_client):
+                response = await client.post("/query", json=QUERY)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests-per-client", type=int, default=4)
+    parser.add_argument("--tool-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    def slow_tool(query: str) -> str:
+        time.sleep(args.tool_latency)
+        return f"Stub tool result for '{query[:30]}...'"
+
+    for name in list(tools.TOOL_REGISTRY):
+        tools.TOOL_REGISTRY[name] = slow_tool
+
+    print(f"tool latency={args.tool_latency * 1000:.0f} ms, {args.requests_per_client} requests/client")
+    print(f"{'clients':>8} | {'requests':>8} | {'seconds':>8} | {'req/s':>8}")
+    for concurrency in args.concurrency:
+        elapsed = asyncio.run(_run(concurrency, args.requests_per_client))
+        total = concurrency * args.requests_per_client
+        print(f"{concurrency:>8} | {total:>8} | {elapsed:>8.2f} | {total / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
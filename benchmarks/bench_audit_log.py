@@ -0,0 +1,95 @@
+# D:\cognito_ai_assistant\benchmarks\bench_audit_log.py
+"""
+Audit write throughput: one INSERT + commit per entry (the old AUDIT_DB.insert pattern) vs.
+AuditLogWriter's chained multi-row batches. Submitting threads model concurrent requests.
+Afterwards the chain is verified by streaming, one row is tampered with, and it is verified again.
+Run from the project root:  python benchmarks/bench_audit_log.py --entries 20000 --threads 8
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ai_core.audit_log import AuditLogWriter, verify_chain  # noqa: E402
+
+DETAILS = {"step_index": 3, "status": "tool_executed", "LLM_Output_Type": "ai", "LLM_Tool_Calls": ["search_web"]}
+
+
+def _per_row(db_path: str, entries: int, threads: int) -> float:
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE audit (timestamp REAL, thread_id TEXT, event_type TEXT, details TEXT)")
+    lock = threading.Lock()
+
+    def worker(n: int, offset: int) -> None:
+        for i in range(n):
+            with lock, conn:
+                conn.execute("INSERT INTO audit VALUES (?, ?, ?, ?)",
+                             (time.time(), f"t{offset + i}", "TRANSITION_TOOL_EXECUTED", json.dumps(DETAILS)))
+
+    start = time.perf_counter()
+    _run_threads(worker, entries, threads)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def _batched(db_path: str, entries: int, threads: int, batch_size: int) -> float:
+    writer = AuditLogWriter(db_path=db_path, batch_size=batch_size)
+
+    def worker(n: int, offset: int) -> None:
+        for i in range(n):
+            writer.submit("TRANSITION_TOOL_EXECUTED", DETAILS, thread_id=f"t{offset + i}")
+
+    start = time.perf_counter()
+    _run_threads(worker, entries, threads)
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    writer.close()
+    return elapsed
+
+
+def _run_threads(worker, entries: int, threads: int) -> None:
+    per_thread = entries // threads
+    pool = [threading.Thread(target=worker, args=(per_thread, i * per_thread)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+    entries = args.entries // args.threads * args.threads
+    workdir = tempfile.mkdtemp()
+
+    per_row = _per_row(os.path.join(workdir, "per_row.sqlite3"), entries, args.threads)
+    chained_db = os.path.join(workdir, "audit.sqlite3")
+    batched = _batched(chained_db, entries, args.threads, args.batch_size)
+    print(f"{entries} entries from {args.threads} threads")
+    print(f"  per-row insert+commit : {per_row:7.2f} s  ({entries / per_row:9.0f} entries/s)")
+    print(f"  chained batches ({args.batch_size:>4}) : {batched:7.2f} s  ({entries / batched:9.0f} entries/s)")
+
+    start = time.perf_counter()
+    report = verify_chain(chained_db)
+    print(f"verify: ok={report['ok']} batches={report['batches']} entries={report['entries']} "
+          f"in {time.perf_counter() - start:.2f} s")
+
+    with sqlite3.connect(chained_db) as conn:
+        conn.execute("UPDATE audit_entries SET details = '{}' WHERE seq = ?", (entries // 2,))
+    report = verify_chain(chained_db)
+    print(f"after tampering with entry {entries // 2}: ok={report['ok']} error={report['error']!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# D:\cognito_ai_assistant\benchmarks\bench_history.py
+"""
+Prompt tokens and state memory as a conversation grows: unbounded history vs. HistoryManager.
+Every turn appends an AI tool request, a tool result and an answer through the add_messages
+reducer (as the graph does). The managed run also applies HistoryManager.compact each turn
+and sends HistoryManager.window as the prompt. Managed columns should stay flat.
+Run from the project root:  python benchmarks/bench_history.py --turns 200 --budget 3000
+"""
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage  # noqa: E402
+from langgraph.graph.message import add_messages  # noqa: E402
+
+from ai_core.history import HistoryManager, count_tokens, message_tokens  # noqa: E402
+
+
+def _turn(i: int, payload_words: int) -> list:
+    call_id = f"call_{i}"
+    return [
+        AIMessage(content="", tool_calls=[{"name": "search_web", "args": {"q": f"query {i}"}, "id": call_id}]),
+        ToolMessage(content=" ".join(f"result{i}-{w}" for w in range(payload_words)), tool_call_id=call_id),
+        AIMessage(content=f"Intermediate answer for step {i}: " + "details " * 20),
+    ]
+
+
+def _run(turns: int, payload_words: int, manager: HistoryManager = None) -> list:
+    messages, summary, rows = add_messages([], [HumanMessage(content="Track the market for me.")]), "", []
+    tracemalloc.start()
+    for i in range(1, turns + 1):
+        new = _turn(i, payload_words)
+        if manager is None:
+            messages = add_messages(messages, new)
+            prompt = messages
+        else:
+            update = manager.compact(messages, summary, reserve=sum(message_tokens(m) for m in new))
+            summary = update.get("history_summary", summary)
+            messages = add_messages(messages, update.get("messages", []) + new)
+            prompt = manager.window(messages, summary)
+        if i in (10, 50, 100, 200, 500, 1000) or i == turns:
+            prompt_tokens = sum(count_tokens(str(m.content)) for m in prompt)
+            rows.append((i, len(messages), prompt_tokens, tracemalloc.get_traced_memory()[0] / 1024))
+    tracemalloc.stop()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=3000, help="HistoryManager max_tokens")
+    parser.add_argument("--payload-words", type=int, default=60, help="words per tool result")
+    args = parser.parse_args()
+
+    unbounded = _run(args.turns, args.payload_words)
+    managed = _run(args.turns, args.payload_words, HistoryManager(max_tokens=args.budget))
+
+    print(f"{'turn':>6} | {'msgs':>6} {'prompt tok':>11} {'KiB':>9} | {'msgs':>6} {'prompt tok':>11} {'KiB':>9}")
+    print(f"{'':>6} | {'unbounded':^28} | {'HistoryManager':^28}")
+    for (turn, n1, t1, m1), (_, n2, t2, m2) in zip(unbounded, managed):
+        print(f"{turn:>6} | {n1:>6} {t1:>11} {m1:>9.1f} | {n2:>6} {t2:>11} {m2:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# D:\cognito_ai_assistant\benchmarks\bench_llm_batching.py
+"""
+Micro-batching + single-flight for concurrent small classification calls.
+N concurrent callers (supervisor routing / tool selection / safety checks) send prompts drawn
+from --distinct templates to a FakeChatModel with --model-latency seconds per call.
+Reports calls and batches received by the model, with and without the MicroBatcher.
+Run from the project root:  python benchmarks/bench_llm_batching.py --callers 64 --distinct 8
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ai_core.llm_batching import MicroBatcher  # noqa: E402
+from ai_core.llm_registry import MODERATOR, FakeChatModel  # noqa: E402
+
+
+def _prompts(callers: int, distinct: int) -> list:
+    return [f"Classify the routing domain of query #{i % distinct}." for i in range(callers)]
+
+
+async def _direct(model: FakeChatModel, prompts: list) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(model.ainvoke(p) for p in prompts))
+    return time.perf_counter() - start
+
+
+async def _batched(batcher: MicroBatcher, prompts: list) -> float:
+    start = time.perf_counter()
+    results = await asyncio.gather(*(batcher.ainvoke(p) for p in prompts))
+    # Every caller must get the answer to its own prompt back
+    assert all(p in r.content for p, r in zip(prompts, results))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--callers", type=int, default=64)
+    parser.add_argument("--distinct", type=int, default=8)
+    parser.add_argument("--model-latency", type=float, default=0.05)
+    parser.add_argument("--window-ms", type=float, default=10)
+    parser.add_argument("--max-batch", type=int, default=16)
+    args = parser.parse_args()
+    prompts = _prompts(args.callers, args.distinct)
+
+    direct_model = FakeChatModel(tier=MODERATOR, latency=args.model_latency)
+    direct_seconds = asyncio.run(_direct(direct_model, prompts))
+
+    batched_model = FakeChatModel(tier=MODERATOR, latency=args.model_latency)
+    batcher = MicroBatcher(batched_model, window_ms=args.window_ms, max_batch=args.max_batch)
+    batched_seconds = asyncio.run(_batched(batcher, prompts))
+
+    print(f"{args.callers} callers, {args.distinct} distinct prompts, model latency={args.model_latency * 1000:.0f} ms, "
+          f"window={args.window_ms:.0f} ms")
+    print(f"{'mode':>8} | {'model calls':>11} | {'batches':>7} | {'wall ms':>8}")
+    print(f"{'direct':>8} | {direct_model.calls:>11} | {direct_model.batches:>7} | {direct_seconds * 1000:>8.1f}")
+    print(f"{'batched':>8} | {batched_model.calls:>11} | {batched_model.batches:>7} | {batched_seconds * 1000:>8.1f}")
+    print(f"batcher stats: {batcher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
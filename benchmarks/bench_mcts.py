@@ -0,0 +1,42 @@
+# D:\cognito_ai_assistant\benchmarks\bench_mcts.py
+"""
+MCTS planner throughput within the planning budget: simulations, tree size and chosen plan,
+for a cold tree, a reused tree (same query replanned) and a re-rooted tree (first step executed),
+in-process and across a rollout process pool.
+Run from the project root:  python benchmarks/bench_mcts.py --budget-ms 200 --workers 0 4
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from mcts_planner.mcts_engine import MCTSPlanner, default_step_catalogue  # noqa: E402
+
+QUERY = "Find the latest data on solar panel prices and calculate the 5-year growth rate"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 4])
+    args = parser.parse_args()
+    catalogue = default_step_catalogue(QUERY)
+
+    print(f"budget={args.budget_ms:.0f} ms, query={QUERY!r}")
+    print(f"{'workers':>7} | {'run':>8} | {'sims':>8} | {'sims/s':>9} | {'nodes':>6} | {'reused':>6} | plan")
+    for workers in args.workers:
+        planner = MCTSPlanner(rollout_workers=workers, seed=0)
+        planner.plan(QUERY, catalogue, budget_ms=20)  # warm-up (numpy, process pool start)
+        planner = MCTSPlanner(rollout_workers=workers, seed=0)
+        executed = []
+        for run in ("cold", "reused", "rerooted"):
+            plan, stats = planner.plan(QUERY, catalogue, executed, budget_ms=args.budget_ms)
+            steps = " -> ".join(catalogue[a].agent_name for a in plan)
+            print(f"{workers:>7} | {run:>8} | {stats['simulations']:>8} | {stats['simulations_per_s']:>9} | "
+                  f"{stats['nodes']:>6} | {stats['reused_nodes']:>6} | {steps}")
+            if run == "reused":
+                executed = plan[:1]
+
+
+if __name__ == "__main__":
+    main()
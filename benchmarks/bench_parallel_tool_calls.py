@@ -0,0 +1,75 @@
+# D:\cognito_ai_assistant\benchmarks\bench_parallel_tool_calls.py
+"""
+Latency of executing one LLM turn's tool_calls: sequential loop vs. run_tool_calls.
+Stub tools sleep for the given latencies (seconds); one stub raises and one exceeds the
+timeout to show errors stay isolated. Parallel latency should track the slowest tool
+(or the timeout) instead of the sum.
+Run from the project root:  python benchmarks/bench_parallel_tool_calls.py --latencies 0.1 0.2 0.3 0.4
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ai_core.tools import run_tool_calls  # noqa: E402
+
+
+class StubTool:
+    def __init__(self, latency: float, fail: bool = False):
+        self.latency = latency
+        self.fail = fail
+
+    def invoke(self, args: dict) -> str:
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("stub failure")
+        return f"stub result for {args['q']} after {self.latency * 1000:.0f} ms"
+
+
+def _sequential(tool_calls: list, tool_map: dict) -> list:
+    results = []
+    for tool_call in tool_calls:
+        try:
+            content = tool_map[tool_call["name"]].invoke(tool_call["args"])
+        except Exception as e:
+            content = f"TOOL EXECUTION ERROR: {str(e)}"
+        results.append({"tool_call_id": tool_call["id"], "content": content})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latencies", type=float, nargs="+", default=[0.1, 0.2, 0.3, 0.4])
+    parser.add_argument("--timeout", type=float, default=1.0)
+    args = parser.parse_args()
+
+    tool_map = {f"tool_{i}": StubTool(latency) for i, latency in enumerate(args.latencies)}
+    tool_map["failing_tool"] = StubTool(0.05, fail=True)
+    tool_calls = [{"name": name, "args": {"q": name}, "id": f"call_{i}"} for i, name in enumerate(tool_map)]
+
+    start = time.perf_counter()
+    _sequential(tool_calls, tool_map)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = run_tool_calls(tool_calls, tool_map, timeout=args.timeout)
+    parallel = time.perf_counter() - start
+    assert [r["tool_call_id"] for r in results] == [c["id"] for c in tool_calls]
+
+    print(f"{len(tool_calls)} tool calls, latencies={args.latencies} s (+1 failing stub)")
+    print(f"sum of latencies: {sum(args.latencies) * 1000:.0f} ms, slowest: {max(args.latencies) * 1000:.0f} ms")
+    print(f"sequential: {sequential * 1000:.0f} ms | parallel: {parallel * 1000:.0f} ms")
+
+    # A stuck tool is cut off at the timeout while its siblings still return
+    tool_map["stuck_tool"] = StubTool(args.timeout * 3)
+    tool_calls.append({"name": "stuck_tool", "args": {"q": "stuck"}, "id": "call_stuck"})
+    start = time.perf_counter()
+    results = run_tool_calls(tool_calls, tool_map, timeout=args.timeout)
+    print(f"with a stuck tool: {(time.perf_counter() - start) * 1000:.0f} ms (timeout {args.timeout * 1000:.0f} ms)")
+    for result in results:
+        print(f"  {result['tool_call_id']:>10}: {result['content'][:60]}")
+
+
+if __name__ == "__main__":
+    main()
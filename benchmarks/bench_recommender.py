@@ -0,0 +1,67 @@
+# D:\cognito_ai_assistant\benchmarks\bench_recommender.py
+"""
+Throughput benchmark: per-query recommend() vs batched recommend_many().
+Run from the project root:  python benchmarks/bench_recommender.py --catalog-size 5000
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ai_core.ml_service.recommender import TaskRecommender  # noqa: E402
+
+VOCAB = (
+    "aws iam lambda docker django fargate ecs pipeline etl rds s3 terraform kubernetes python "
+    "security auth login model training inference summarization container deploy network vpc "
+    "monitoring logging cache queue api gateway cloudformation budget cost schema migration"
+).split()
+
+
+def _synthetic_catalog(path: Path, size: int, rng: random.Random) -> None:
+    rows = [{
+        "task_id": i,
+        "title": " ".join(rng.choices(VOCAB, k=3)).title(),
+        "description": " ".join(rng.choices(VOCAB, k=12)) + ".",
+        "category": rng.choice(["Cloud", "DevOps", "Security", "ML", "Software Development"]),
+    } for i in range(size)]
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--catalog-size", type=int, default=5000)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 100, 10_000])
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = Path(tmp) / "tasks.csv"
+        _synthetic_catalog(data_path, args.catalog_size, rng)
+        recommender = TaskRecommender(data_path=data_path, index_dir=Path(tmp) / "index")
+        recommender.ensure_ready()
+
+        print(f"catalog={args.catalog_size} tasks, top_n={args.top_n}")
+        print(f"{'queries':>8} | {'loop q/s':>12} | {'batched q/s':>12} | speedup")
+        for n_queries in args.batches:
+            queries = [" ".join(rng.choices(VOCAB, k=8)) for _ in range(n_queries)]
+
+            start = time.perf_counter()
+            looped = [recommender.recommend(q, args.top_n) for q in queries]
+            loop_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            batched = recommender.recommend_many(queries, args.top_n)
+            batch_s = time.perf_counter() - start
+
+            assert len(looped) == len(batched) == n_queries
+            print(f"{n_queries:>8} | {n_queries / loop_s:>12.0f} | {n_queries / batch_s:>12.0f} | {loop_s / batch_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
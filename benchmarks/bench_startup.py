@@ -0,0 +1,78 @@
+# D:\cognito_ai_assistant\benchmarks\bench_startup.py
+"""
+Cold-start cost: each target runs in a fresh interpreter under `python -X importtime`. The
+report gives the summed import time of the target's top-level imports, the slowest of those
+imports, the wall time of its setup statement, and peak RSS. The "graph" target also compiles
+the process-wide graph, then fetches it again to check that the second call reuses it.
+Run from the project root:  python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+TARGETS = {
+    "experts": "import ai_core.experts",
+    "api_server": "import api_server",
+    "graph": ("from ai_core.graph import get_cognito_omega_graph\n"
+              "t = time.perf_counter(); a = get_cognito_omega_graph(); compile_ms = (time.perf_counter() - t) * 1000\n"
+              "t = time.perf_counter(); b = get_cognito_omega_graph(); extra['reuse_us'] = (time.perf_counter() - t) * 1e6\n"
+              "extra['compile_ms'] = compile_ms; extra['memoized'] = a is b"),
+}
+
+CHILD = """
+import resource, time, json
+extra = {{}}
+started = time.perf_counter()
+{setup}
+extra['wall_ms'] = (time.perf_counter() - started) * 1000
+extra['rss_mib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print('RESULT ' + json.dumps(extra))
+"""
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _run_once(setup: str):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD.format(setup=setup)], cwd=ROOT,
+                          capture_output=True, text=True, env={**os.environ, "LLM_BACKEND": "fake"})
+    result = next((line for line in proc.stdout.splitlines() if line.startswith("RESULT ")), None)
+    if result is None:
+        raise RuntimeError(proc.stderr[-2000:])
+    top_level, children = [], []
+    for match in LINE.finditer(proc.stderr):
+        depth = len(match.group(3))  # 1 = imported by the child script, 3 = imported by one of those
+        if depth in (1, 3):
+            (top_level if depth == 1 else children).append((int(match.group(2)), match.group(4)))
+    report = json.loads(result[len("RESULT "):])
+    report["import_ms"] = sum(us for us, _ in top_level) / 1000
+    report["slowest"] = sorted(children, reverse=True)[:5]
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--targets", nargs="*", default=list(TARGETS))
+    args = parser.parse_args()
+
+    for name in args.targets:
+        runs = [_run_once(TARGETS[name]) for _ in range(args.repeat)]
+        median = lambda key: statistics.median(run[key] for run in runs)  # noqa: E731
+        print(f"{name:<11} import {median('import_ms'):7.1f} ms  wall {median('wall_ms'):7.1f} ms  "
+              f"peak RSS {median('rss_mib'):6.1f} MiB")
+        if "compile_ms" in runs[0]:
+            print(f"{'':<11} first get_cognito_omega_graph() {median('compile_ms'):.1f} ms, "
+                  f"second {median('reuse_us'):.1f} us, same instance: {all(run['memoized'] for run in runs)}")
+        slowest = ", ".join(f"{module} {us / 1000:.0f} ms" for us, module in runs[-1]["slowest"])
+        print(f"{'':<11} slowest imports: {slowest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# D:\cognito_ai_assistant\benchmarks\bench_streaming_hash.py
+"""
+Peak memory of hashing and signing a large answer: the old identity/audit path (an f-string of
+the full answer, `data + PRIVATE_KEY`, then .encode() of each) vs. StreamingHasher, which feeds
+the answer in HASH_CHUNK_CHARS slices and signs only its digest. Peaks are measured with
+tracemalloc and exclude the answer itself, so they show the extra copies each path makes.
+The answer is also fed in --chunks pieces (as a streamed response would arrive) to check
+that the digest does not depend on chunking.
+Run from the project root:  python benchmarks/bench_streaming_hash.py --answer-mb 1
+"""
+import argparse
+import hashlib
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ai_core.tools import (  # noqa: E402
+    PRIVATE_KEY, PUBLIC_DID, StreamingHasher, calculate_verifiable_hash, sign_data_with_did, verify_did_signature,
+)
+
+AUDIT_HASH = "0xPENDING_HASH"
+
+
+def _old_path(answer: str) -> str:
+    # Pre-StreamingHasher verifiable_identity_node: per-response signature + batched digest
+    data_to_sign = f"ANSWER:{answer}|HASH:{AUDIT_HASH}|DID:{PUBLIC_DID}"
+    hashlib.sha256((data_to_sign + PRIVATE_KEY).encode("utf-8")).hexdigest()
+    return hashlib.sha256(data_to_sign.encode("utf-8")).hexdigest()
+
+
+def _new_path(answer: str) -> str:
+    hasher = StreamingHasher().update("answer", answer).update("audit_hash", AUDIT_HASH).update("did", PUBLIC_DID)
+    sign_data_with_did(hasher)
+    return calculate_verifiable_hash(hasher)
+
+
+def _measure(fn, answer: str, repeat: int):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(answer)
+    elapsed = (time.perf_counter() - start) / repeat
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--answer-mb", type=float, default=1.0)
+    parser.add_argument("--non-ascii", action="store_true", help="mix in multi-byte characters")
+    parser.add_argument("--chunks", type=int, default=97)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    unit = "résumé — 数据 " if args.non_ascii else "The quick brown fox jumps over the lazy dog. "
+    answer = (unit * (int(args.answer_mb * 2**20) // len(unit) + 1))[:int(args.answer_mb * 2**20)]
+
+    old_peak, old_s = _measure(_old_path, answer, args.repeat)
+    new_peak, new_s = _measure(_new_path, answer, args.repeat)
+    print(f"answer: {len(answer) / 2**20:.2f} M chars ({len(answer.encode('utf-8')) / 2**20:.2f} MiB utf-8)")
+    print(f"  f-string + encode : peak extra {old_peak / 2**20:8.2f} MiB  {old_s * 1000:7.2f} ms/response")
+    print(f"  StreamingHasher   : peak extra {new_peak / 2**20:8.2f} MiB  {new_s * 1000:7.2f} ms/response")
+
+    step = len(answer) // args.chunks + 1
+    streamed = StreamingHasher()
+    for start in range(0, len(answer), step):
+        streamed.update("answer", answer[start:start + step])
+    streamed.update("audit_hash", AUDIT_HASH).update("did", PUBLIC_DID)
+    whole = StreamingHasher().update("answer", answer).update("audit_hash", AUDIT_HASH).update("did", PUBLIC_DID)
+    print(f"digest independent of chunking ({args.chunks} chunks): {streamed.hexdigest() == whole.hexdigest()}")
+    signature = sign_data_with_did(whole)
+    tampered = StreamingHasher().update("answer", answer[:-1] + "!").update("audit_hash", AUDIT_HASH).update("did", PUBLIC_DID)
+    print(f"signature verifies: {verify_did_signature(streamed, signature)}; "
+          f"tampered answer accepted: {verify_did_signature(tampered, signature)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+# D:\cognito_ai_assistant\mcts_planner\mcts_engine.py
+
+import atexit
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# --- 1. CONFIGURATION ---
+
+MCTS_BUDGET_MS = float(os.getenv("MCTS_BUDGET_MS", "200"))
+MCTS_MAX_NODES = int(os.getenv("MCTS_MAX_NODES", "200000"))
+MCTS_MAX_DEPTH = int(os.getenv("MCTS_MAX_DEPTH", "5"))
+MCTS_EXPLORATION = float(os.getenv("MCTS_EXPLORATION", "1.4"))  # UCT constant c
+MCTS_ROLLOUTS_PER_LEAF = int(os.getenv("MCTS_ROLLOUTS_PER_LEAF", "128"))  # vectorized rollouts per expanded leaf
+MCTS_LEAVES_PER_BATCH = int(os.getenv("MCTS_LEAVES_PER_BATCH", "32"))
+# Rollout processes; 0 or 1 evaluates in-process. The pool is opt-in: it forks worker processes,
+# which is unsafe from a multithreaded server (API workers), so only enable it in batch/CLI use
+MCTS_ROLLOUT_WORKERS = int(os.getenv("MCTS_ROLLOUT_WORKERS", "0"))
+
+AGENTS = ("ResearchAgent", "CodeExpert", "FinalSynthesizer")
+TERMINAL_AGENT = "FinalSynthesizer"  # a plan ends once the synthesizer runs
+PAD = -1  # marks unused positions in fixed-width action sequences
+
+# --- 2. ACTIONS (candidate TaskSteps) ---
+
+class StepCandidate(NamedTuple):
+    """One candidate TaskStep; plans are ordered subsets of a catalogue of these."""
+    agent_name: str
+    task_description: str
+    expected_output: str
+
+class RolloutSpec(NamedTuple):
+    num_actions: int
+    terminal: Tuple[bool, ...]  # per action: does it end the plan?
+    max_depth: int
+
+def default_step_catalogue(user_query: str) -> List[StepCandidate]:
+    """Steps the ResearchAgent, CodeExpert and FinalSynthesizer can contribute to a plan."""
+    return [
+        StepCandidate("ResearchAgent", f"Find the latest data for: {user_query}", "A block of data in Markdown table format."),
+        StepCandidate("ResearchAgent", f"Collect definitions and background sources for: {user_query}", "Background definitions with cited sources."),
+        StepCandidate("CodeExpert", "Analyze the research results and perform all necessary calculations.", "The final calculation result."),
+        StepCandidate("CodeExpert", "Re-check the calculation result with an independent method.", "A verified calculation."),
+        StepCandidate("FinalSynthesizer", "Synthesize the final answer from the gathered results for the user.", "A concise final answer."),
+    ]
+
+# --- 3. ROLLOUT AND REWARD (pluggable, vectorized over many rollouts) ---
+
+def random_rollout(prefix: Tuple[int, ...], k: int, rng: np.random.Generator, spec: RolloutSpec) -> np.ndarray:
+    """
+    Completes `prefix` k times with uniformly random unused actions, stopping after the
+    terminal action or at max_depth. Returns int16[k, max_depth] padded with PAD.
+    """
+    out = np.full((k, spec.max_depth), PAD, dtype=np.int16)
+    depth = len(prefix)
+    if depth:
+        out[:, :depth] = prefix
+        if spec.terminal[prefix[-1]]:
+            return out
+    remaining = min(spec.max_depth - depth, spec.num_actions - depth)
+    if remaining <= 0:
+        return out
+
+    keys = rng.random((k, spec.num_actions))
+    if depth:
+        keys[:, list(prefix)] = np.inf  # never repeat a step
+    order = np.argsort(keys, axis=1)[:, :remaining]
+    # Drop everything after the first terminal action in each row
+    ended = np.logical_or.accumulate(np.asarray(spec.terminal)[order], axis=1)
+    past_terminal = np.zeros_like(ended)
+    past_terminal[:, 1:] = ended[:, :-1]
+    out[:, depth:depth + remaining] = np.where(past_terminal, PAD, order)
+    return out
+
+# Capability vocabulary for the cheap reward heuristics: what a step's expected_output
+# provides, what its task_description consumes and what the user query needs
+CAPABILITIES = {
+    "data": ("data", "table", "statistics", "figures"),
+    "background": ("definition", "background", "sources"),
+    "calculation": ("calculation", "computed"),
+    "verification": ("verified", "re-check"),
+    "answer": ("final answer",),
+}
+CONSUMES = {
+    "data": ("research results",),
+    "calculation": ("calculation result",),
+    "answer": (),
+    "background": (),
+    "verification": (),
+}
+QUERY_NEEDS = {
+    "data": ("data", "latest", "statistics", "price", "news", "find"),
+    "background": ("explain", "what is", "define", "background", "why"),
+    "calculation": ("calculate", "compute", "how much", "forecast", "estimate", "analy"),
+    "verification": ("verify", "double-check", "accurate", "audit"),
+}
+
+class HeuristicReward:
+    """
+    Scores complete plans in [0, 1] by comparing steps' expected_output against the query:
+    0.6 * needed capabilities covered + 0.2 * steps whose inputs were produced earlier
+    + 0.2 * ends with the synthesizer - step_cost per step beyond what the query needs.
+    Picklable, so rollout processes can evaluate it.
+    """
+
+    def __init__(self, user_query: str, catalogue: Sequence[StepCandidate], step_cost: float = 0.05):
+        caps = list(CAPABILITIES)
+        query = user_query.lower()
+        self.provides = np.array([[any(k in s.expected_output.lower() for k in CAPABILITIES[c]) for c in caps]
+                                  for s in catalogue], dtype=bool)
+        self.consumes = np.array([[any(k in s.task_description.lower() for k in CONSUMES[c]) for c in caps]
+                                  for s in catalogue], dtype=bool)
+        self.needs = np.array([c == "answer" or any(k in query for k in QUERY_NEEDS.get(c, ())) for c in caps], dtype=bool)
+        self.terminal = np.array([s.agent_name == TERMINAL_AGENT for s in catalogue], dtype=bool)
+        self.step_cost = step_cost
+
+    def __call__(self, plans: np.ndarray) -> np.ndarray:
+        valid = plans >= 0
+        steps = np.where(valid, plans, 0)
+        provided = self.provides[steps] & valid[..., None]   # [n, depth, capability]
+        consumed = self.consumes[steps] & valid[..., None]
+        have = np.logical_or.accumulate(provided, axis=1)
+        have_before = np.zeros_like(have)
+        have_before[:, 1:] = have[:, :-1]
+
+        length = valid.sum(axis=1)
+        unmet_inputs = (consumed & ~have_before).any(axis=2).sum(axis=1)
+        order_ok = 1.0 - unmet_inputs / np.maximum(length, 1)
+        coverage = (have[:, -1, :] & self.needs).sum(axis=1) / self.needs.sum()
+        last = steps[np.arange(len(plans)), np.maximum(length - 1, 0)]
+        ends_well = self.terminal[last] & (length > 0)
+        extra_steps = np.maximum(length - self.needs.sum(), 0)
+        reward = 0.6 * coverage + 0.2 * order_ok + 0.2 * ends_well - self.step_cost * extra_steps
+        return np.clip(reward, 0.0, 1.0)
+
+def _evaluate_leaves(prefixes: List[Tuple[int, ...]], k: int, seed: int, spec: RolloutSpec,
+                     rollout_fn: Callable, reward_fn: Callable) -> np.ndarray:
+    """Runs k rollouts per prefix and returns the reward sum per prefix (module-level: picklable)."""
+    rng = np.random.default_rng(seed)
+    plans = np.concatenate([rollout_fn(prefix, k, rng, spec) for prefix in prefixes])
+    return reward_fn(plans).reshape(len(prefixes), k).sum(axis=1)
+
+# --- 4. COMPACT TREE ---
+
+class MCTSTree:
+    """
+    Struct-of-arrays search tree: node i's statistics live at index i of preallocated
+    numpy arrays (visits int32, reward sum float32, child table int32[num_actions]).
+    About 40 bytes per node with five actions, so 10^5+ nodes stay in a few MB.
+    """
+
+    def __init__(self, num_actions: int, capacity: int):
+        self.capacity = capacity
+        self.visits = np.zeros(capacity, dtype=np.int32)
+        self.value = np.zeros(capacity, dtype=np.float32)
+        self.children = np.full((capacity, num_actions), -1, dtype=np.int32)
+        self.action = np.full(capacity, PAD, dtype=np.int16)
+        self.size = 1  # node 0 is the root
+
+    def add_child(self, node: int, action: int) -> int:
+        child = self.size
+        self.size += 1
+        self.children[node, action] = child
+        self.action[child] = action
+        return child
+
+    def subtree(self, node: int) -> "MCTSTree":
+        """Copies the subtree under `node` into a fresh tree with `node` as its root (tree reuse)."""
+        tree = MCTSTree(self.children.shape[1], self.capacity)
+        mapping = {node: 0}
+        queue = deque([node])
+        while queue:
+            old = queue.popleft()
+            new = mapping[old]
+            tree.visits[new], tree.value[new] = self.visits[old], self.value[old]
+            for action, old_child in enumerate(self.children[old]):
+                if old_child >= 0:
+                    mapping[old_child] = tree.add_child(new, action)
+                    queue.append(int(old_child))
+        return tree
+
+# --- 5. PLANNER ---
+
+_POOL: Optional[ProcessPoolExecutor] = None
+
+def _rollout_pool(workers: int) -> ProcessPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        _POOL = ProcessPoolExecutor(max_workers=workers)
+        atexit.register(_POOL.shutdown, wait=False, cancel_futures=True)
+    return _POOL
+
+class MCTSPlanner:
+    """
+    UCT search over TaskStep sequences. Leaves are collected in batches (virtual loss keeps
+    a batch from piling onto one path), each expanded leaf gets many vectorized rollouts,
+    and with rollout_workers > 1 batches are evaluated across a process pool while the next
+    batch is being selected. The tree is kept between plan() calls: the same query continues
+    from the existing statistics, and executed steps re-root the tree at that prefix.
+    plan() holds a per-planner lock, so concurrent callers never search the same tree at once.
+    """
+
+    def __init__(self, reward_factory: Callable[[str, Sequence[StepCandidate]], Callable] = HeuristicReward,
+                 rollout_fn: Callable = random_rollout, max_depth: int = MCTS_MAX_DEPTH,
+                 exploration: float = MCTS_EXPLORATION, rollouts_per_leaf: int = MCTS_ROLLOUTS_PER_LEAF,
+                 leaves_per_batch: int = MCTS_LEAVES_PER_BATCH, rollout_workers: int = MCTS_ROLLOUT_WORKERS,
+                 seed: Optional[int] = None):
+        self.reward_factory = reward_factory
+        self.rollout_fn = rollout_fn
+        self.max_depth = max_depth
+        self.exploration = exploration
+        self.rollouts_per_leaf = rollouts_per_leaf
+        self.leaves_per_batch = leaves_per_batch
+        self.rollout_workers = rollout_workers
+        self.rng = np.random.default_rng(seed)
+        self.tree: Optional[MCTSTree] = None
+        self.root_prefix: Tuple[int, ...] = ()
+        self._signature: Optional[Tuple[str, Tuple[StepCandidate, ...]]] = None
+        self._lock = threading.Lock()  # guards tree, rng and re-root state
+
+    def plan(self, user_query: str, catalogue: Optional[Sequence[StepCandidate]] = None,
+             executed: Sequence[int] = (), budget_ms: float = MCTS_BUDGET_MS,
+             max_nodes: int = MCTS_MAX_NODES) -> Tuple[List[int], Dict[str, Any]]:
+        """
+        Searches for up to budget_ms (or until max_nodes) and returns the most-visited plan
+        as catalogue indices (including the executed prefix) plus search statistics.
+        """
+        catalogue = tuple(catalogue if catalogue is not None else default_step_catalogue(user_query))
+        executed = tuple(executed)
+        with self._lock:
+            return self._plan(user_query, catalogue, executed, budget_ms, max_nodes)
+
+    def _plan(self, user_query: str, catalogue: Tuple[StepCandidate, ...], executed: Tuple[int, ...],
+              budget_ms: float, max_nodes: int) -> Tuple[List[int], Dict[str, Any]]:
+        reused = self._prepare_tree(user_query, catalogue, executed, max_nodes)
+
+        spec = RolloutSpec(len(catalogue), tuple(s.agent_name == TERMINAL_AGENT for s in catalogue), self.max_depth)
+        reward_fn = self.reward_factory(user_query, catalogue)
+        started = time.perf_counter()
+        simulations = self._search(spec, reward_fn, started + budget_ms / 1000, max_nodes)
+        elapsed = time.perf_counter() - started
+
+        plan = self._best_plan(spec)
+        root_visits = max(int(self.tree.visits[0]), 1)
+        stats = {
+            "simulations": simulations,
+            "nodes": self.tree.size,
+            "reused_nodes": reused,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "simulations_per_s": int(simulations / elapsed) if elapsed else 0,
+            "root_mean_reward": round(float(self.tree.value[0]) / root_visits, 4),
+            "plan_reward": round(float(reward_fn(self._as_plans([plan]))[0]), 4),
+        }
+        return plan, stats
+
+    def _prepare_tree(self, user_query: str, catalogue: Tuple[StepCandidate, ...], executed: Tuple[int, ...],
+                      max_nodes: int) -> int:
+        """Reuses (or re-roots) the previous tree when the replan is for the same query and steps."""
+        signature = (user_query, catalogue)
+        if self.tree is not None and signature == self._signature and executed[:len(self.root_prefix)] == self.root_prefix:
+            node = 0
+            for action in executed[len(self.root_prefix):]:
+                node = int(self.tree.children[node, action])
+                if node < 0:
+                    break
+            if node >= 0:
+                if node != 0:
+                    self.tree = self.tree.subtree(node)
+                self.root_prefix = executed
+                return self.tree.size
+
+        capacity = min(max_nodes, MCTS_MAX_NODES) + 1
+        self.tree = MCTSTree(len(catalogue), capacity)
+        self.root_prefix = executed
+        self._signature = signature
+        return 0
+
+    def _select(self, spec: RolloutSpec, virtual_loss: int, can_expand: bool) -> Tuple[List[int], Tuple[int, ...]]:
+        """UCT descent from the root; expands one untried step. Adds virtual visits on the path."""
+        tree = self.tree
+        node, path, prefix = 0, [0], list(self.root_prefix)
+        while True:
+            if (prefix and spec.terminal[prefix[-1]]) or len(prefix) >= spec.max_depth:
+                break
+            row = tree.children[node]
+            legal = np.ones(spec.num_actions, dtype=bool)
+            legal[prefix] = False
+            untried = np.flatnonzero(legal & (row < 0))
+            if untried.size and can_expand and tree.size < tree.capacity:
+                action = int(untried[self.rng.integers(untried.size)])
+                node = tree.add_child(node, action)
+                path.append(node)
+                prefix.append(action)
+                break
+            children = row[legal & (row >= 0)]
+            if children.size == 0:
+                break
+            visits = tree.visits[children].astype(np.float64)
+            uct = tree.value[children] / visits + self.exploration * np.sqrt(math.log(tree.visits[node]) / visits)
+            node = int(children[np.argmax(uct)])
+            path.append(node)
+            prefix.append(int(tree.action[node]))
+        tree.visits[path] += virtual_loss
+        return path, tuple(prefix)
+
+    def _search(self, spec: RolloutSpec, reward_fn: Callable, deadline: float, max_nodes: int) -> int:
+        k = self.rollouts_per_leaf
+        simulations = 0
+        use_pool = self.rollout_workers > 1
+        pending: deque = deque()
+
+        def collect():
+            paths, prefixes = [], []
+            for _ in range(self.leaves_per_batch):
+                path, prefix = self._select(spec, k, self.tree.size < max_nodes - 1)
+                paths.append(path)
+                prefixes.append(prefix)
+            return paths, prefixes
+
+        def backpropagate(paths, sums):
+            for path, total in zip(paths, sums):
+                # Visits were added as virtual loss during selection; now add the rewards
+                self.tree.value[path] += np.float32(total)
+
+        while True:
+            # Time or node budget: stop selecting new leaves, drain what is in flight
+            if time.perf_counter() < deadline and self.tree.size < max_nodes:
+                paths, prefixes = collect()
+                seed = int(self.rng.integers(2**63))
+                if not use_pool:
+                    backpropagate(paths, _evaluate_leaves(prefixes, k, seed, spec, self.rollout_fn, reward_fn))
+                    simulations += len(paths) * k
+                    continue
+                future = _rollout_pool(self.rollout_workers).submit(
+                    _evaluate_leaves, prefixes, k, seed, spec, self.rollout_fn, reward_fn)
+                pending.append((paths, future))
+                if len(pending) < self.rollout_workers:
+                    continue
+            if not pending:
+                break
+            paths, future = pending.popleft()
+            backpropagate(paths, future.result())
+            simulations += len(paths) * k
+        return simulations
+
+    def _best_plan(self, spec: RolloutSpec) -> List[int]:
+        """Most-visited path; completed with the synthesizer if the search stopped short of it."""
+        node, plan = 0, list(self.root_prefix)
+        while not (plan and spec.terminal[plan[-1]]) and len(plan) < spec.max_depth:
+            row = self.tree.children[node]
+            children = row[row >= 0]
+            if children.size == 0:
+                break
+            node = int(children[np.argmax(self.tree.visits[children])])
+            plan.append(int(self.tree.action[node]))
+        if not (plan and spec.terminal[plan[-1]]):
+            finals = [a for a in range(spec.num_actions) if spec.terminal[a] and a not in plan]
+            if finals:
+                plan = plan[:spec.max_depth - 1] + [finals[0]]
+        return plan
+
+    def _as_plans(self, plans: List[List[int]]) -> np.ndarray:
+        out = np.full((len(plans), self.max_depth), PAD, dtype=np.int16)
+        for i, plan in enumerate(plans):
+            out[i, :len(plan)] = plan
+        return out
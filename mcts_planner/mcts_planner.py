@@ -1,7 +1,13 @@
 # D:\cognito_ai_assistant\mcts_planner\mcts_planner.py
 
+import os
+import threading
+from collections import OrderedDict
 from typing import List
 from langchain_core.pydantic_v1 import BaseModel, Field, Literal
+from .mcts_engine import MCTSPlanner, default_step_catalogue
+
+MCTS_PLANNER_CACHE_SIZE = int(os.getenv("MCTS_PLANNER_CACHE_SIZE", "16"))  # queries whose search trees are kept
 
 class TaskStep(BaseModel):
     """A single, concrete action the Agent should take."""
@@ -18,39 +24,54 @@ class MCTS_Plan(BaseModel):
     execution_steps: List[TaskStep] = Field(..., description="The ordered list of steps to execute.")
 
 
+# One planner per query (LRU-bounded): replans of the same query reuse its search tree, while
+# concurrent requests for different queries search independent trees (each planner is locked)
+_PLANNERS: "OrderedDict[str, MCTSPlanner]" = OrderedDict()
+_PLANNERS_LOCK = threading.Lock()
+
+def get_mcts_planner(user_query: str) -> MCTSPlanner:
+    """Returns the planner that owns user_query's search tree, creating it on first use."""
+    with _PLANNERS_LOCK:
+        planner = _PLANNERS.get(user_query)
+        if planner is None:
+            planner = _PLANNERS[user_query] = MCTSPlanner()
+            while len(_PLANNERS) > MCTS_PLANNER_CACHE_SIZE:
+                _PLANNERS.popitem(last=False)
+        _PLANNERS.move_to_end(user_query)
+        return planner
+
 def mcts_planner_node(state: AgentState) -> AgentState:
     """
-    Simulates the MCTS planning process to generate the optimal execution plan.
+    Runs Monte Carlo Tree Search over TaskStep sequences (see mcts_engine) within the
+    planning budget and returns the most-visited plan.
     """
-    # 1. MCTS Simulation (Internal to the LLM)
-    # The Prompt: "You are an MCTS Planner. Explore multiple paths of agent delegation 
-    # and tool use (ResearchAgent, CodeExpert, FinalSynthesizer) for the user query. 
-    # Output the optimal 3-5 step plan using the MCTS_Plan Pydantic schema."
-    
-    # 2. LLM Call (Using the MCTS_Plan schema for structured output)
-    # The MCTS LLM must be a powerful one (e.g., GPT-4)
-    # planner_llm = LLM_MODEL.with_structured_output(MCTS_Plan)
-    
-    # --- Mock MCTS Plan for demonstration: ---
-    if "data" in state["user_query"].lower() and "calculate" in state["user_query"].lower():
-        plan = MCTS_Plan(
-            reasoning="The task requires external data first, then calculation. The optimal path is Research -> Code -> Synthesize.",
-            execution_steps=[
-                TaskStep(step_id=1, agent_name="ResearchAgent", task_description=f"Find the latest data for: {state['user_query']}", expected_output="A block of data in Markdown table format."),
-                TaskStep(step_id=2, agent_name="CodeExpert", task_description="Analyze the research results and perform all necessary calculations.", expected_output="The final calculation result."),
-                TaskStep(step_id=3, agent_name="FinalSynthesizer", task_description="Synthesize the final answer from the calculation result for the user.", expected_output="A concise final answer.")
-            ]
-        )
-    else:
-        # Default simpler plan
-        plan = MCTS_Plan(reasoning="Simple task, direct to research and synthesize.", execution_steps=[...])
-
-    print("**MCTS Planner:** Plan generated with confidence. Steps:", len(plan.execution_steps))
+    user_query = state["user_query"]
+    catalogue = default_step_catalogue(user_query)
+
+    # 1. On a replan, the steps already executed become the root of the reused tree
+    done = state.get("current_plan", [])[:state.get("current_step_index", 0)]
+    positions = {(c.agent_name, c.task_description): i for i, c in enumerate(catalogue)}
+    executed = [positions[key] for key in ((s.agent_name, s.task_description) for s in done) if key in positions]
+
+    # 2. MCTS Simulation (UCT selection, vectorized heuristic rollouts, time/node budget)
+    actions, stats = get_mcts_planner(user_query).plan(user_query, catalogue, executed)
+
+    plan = MCTS_Plan(
+        reasoning=(f"MCTS explored {stats['simulations']} simulations over {stats['nodes']} nodes in "
+                   f"{stats['elapsed_ms']} ms; selected plan reward {stats['plan_reward']}."),
+        execution_steps=[
+            TaskStep(step_id=i + 1, agent_name=catalogue[a].agent_name,
+                     task_description=catalogue[a].task_description, expected_output=catalogue[a].expected_output)
+            for i, a in enumerate(actions)
+        ],
+    )
+
+    print("**MCTS Planner:** Plan generated with confidence. Steps:", len(plan.execution_steps), stats)
     
-    # 3. Update State
+    # 3. Update State (executed steps stay at the front of the plan)
     return AgentState(
         current_plan=plan.execution_steps,
-        current_step_index=0, # Start at the first step
+        current_step_index=len(executed),
         status="plan_generated"
     )
 
@@ -1,43 +1,15 @@
-from ai_core.graph import create_cognito_omega_graph
-from ai_core.experts import (
-    multi_modal_decoder, mlcc_nlu_agent, emotion_intent_detector, supervisor,
-    universal_model_selector, q_value_prioritizer, cognitive_latency_check,
-    finance_expert, legal_expert, fitness_expert, business_expert, health_expert, general_qa,
-    dynamic_tool_manager, causal_risk_assessor, critique_revise,
-    knowledge_fusion_node, meta_cognition_node, verifiable_identity_node, verifiable_audit_node
-)
 from typing import Dict, Any
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
+# Load environment variables from .env file (before ai_core reads its configuration)
 load_dotenv()
 
-# --- 1. Map all nodes for the graph builder ---
-NODE_MAP = {
-    "multi_modal_decoder": multi_modal_decoder,
-    "mlcc_nlu_agent": mlcc_nlu_agent,
-    "emotion_intent_detector": emotion_intent_detector,
-    "supervisor": supervisor,
-    "universal_model_selector": universal_model_selector,
-    "q_value_prioritizer": q_value_prioritizer,
-    "cognitive_latency_check": cognitive_latency_check,
-    "finance_expert": finance_expert,
-    "legal_expert": legal_expert,
-    "fitness_expert": fitness_expert,
-    "business_expert": business_expert,
-    "health_expert": health_expert,
-    "general_qa": general_qa,
-    "dynamic_tool_manager": dynamic_tool_manager,
-    "causal_risk_assessor": causal_risk_assessor,
-    "critique_revise": critique_revise,
-    "knowledge_fusion_node": knowledge_fusion_node,
-    "meta_cognition_node": meta_cognition_node,
-    "verifiable_identity_node": verifiable_identity_node,
-    "verifiable_audit_node": verifiable_audit_node,
-}
+from ai_core.graph import get_cognito_omega_graph
+
+# --- 1. Nodes for the graph builder are registered in ai_core.experts.NODE_MAP ---
 
-# --- 2. Initialize and Compile the Graph ---
-app = create_cognito_omega_graph(NODE_MAP)
+# --- 2. Initialize and Compile the Graph (memoized per process) ---
+app = get_cognito_omega_graph()
 
 # --- 3. Define Initial State and Input (High-Risk Test Case) ---
 # Testing the Multi-Modal, Risk Assessor, and Finance flow
@@ -68,7 +40,7 @@ try:
             if key != "__end__":
                 print(f"|--- Node Executed: {key}")
                 # LangGraph stream yields the diffs (changes). Merging them builds the final state.
-                final_state.update(value) 
+                final_state.update(value or {}) # Nodes that only have side effects yield no update
 
     print("\n--- FINAL EXECUTION COMPLETE ---")
     